@@ -1,4 +1,4 @@
-﻿import os
+﻿import queue
 import sys
 import time
 import threading
@@ -6,7 +6,7 @@ import logging
 import re
 from pathlib import Path
 
-import sounddevice as sd
+import numpy as np
 
 from PySide6.QtCore import QObject, Signal, QThread, QTimer
 from PySide6.QtWidgets import QApplication
@@ -15,13 +15,26 @@ from ui.main_window import MainWindow
 from ui.theme import apply_theme
 from storage.settings import SettingsManager, AppSettings
 from storage.scoreboard import Scoreboard
+from audio.aec import EchoCancellingReader, EchoReference
+from audio.bargein import BargeInDetector, load_spotter
+from audio.backends import create_backend
+from audio.bus import AudioBus
+from audio.endpoint import Endpointer
+from audio.metrics import LatencyStats
 from audio.vad import VADRecorder
-from audio.stt import STTManager
+from audio.stt import STTManager, TranscriptionResult
+from audio.stt_process import close_worker
+from audio.stt_scheduler import PRIORITY_BARGE_IN, PRIORITY_TURN, PRIORITY_WAKE, STTScheduler
+from audio.whisper_server import close_servers
+from audio.streaming import StreamingTranscriber
+from audio.transcript_gate import DROP, PASS, REPEAT, TranscriptGate
 from audio.wakeword import WakeWordService
 from audio.tts import PiperTTS
+from audio.tts_cache import TTSCache
 from audio.playback import AudioPlayer
 from llm.ollama_client import OllamaClient
 from llm.prompts import DEFAULT_SYSTEM_PROMPT
+from llm.sentences import SentenceSplitter
 from games.guess_number import GuessNumberGame
 from games.rps import RPSGame
 from games.trivia import TriviaGame
@@ -34,66 +47,161 @@ STATE_LISTENING = "Listening"
 STATE_THINKING = "Thinking"
 STATE_SPEAKING = "Speaking"
 
+GREETING_REPLY = "I'm doing good—thanks for asking."
+UNCLEAR_REPLY = "Sorry, I didn't catch that. Can you say it again?"
+
 
 class ListenWorker(QThread):
     transcript = Signal(str)
+    partial = Signal(str)
+    repeat = Signal()
     error = Signal(str)
 
-    def __init__(self, settings: AppSettings, stt: STTManager):
+    def __init__(
+        self,
+        settings: AppSettings,
+        stt: STTManager,
+        bus: AudioBus,
+        start=None,
+        endpointer=None,
+        latency=None,
+        gate=None,
+        vocabulary=None,
+    ):
         super().__init__()
         self.settings = settings
         self.stt = stt
+        self.bus = bus
+        self.start_position = start
+        self.endpointer = endpointer
+        self.latency = latency
+        self.gate = gate
+        self.vocabulary = vocabulary
         self._stop_event = threading.Event()
 
     def stop(self):
         self._stop_event.set()
 
+    def _on_partial(self, text: str):
+        if self.endpointer is not None:
+            self.endpointer.set_partial_text(text)
+        self.partial.emit(text)
+
     def run(self):
+        streamer = None
         try:
             recorder = VADRecorder(
                 sample_rate=self.settings.sample_rate,
                 aggressiveness=self.settings.vad_aggressiveness,
-                device=self.settings.mic_device,
+                source=self.bus,
             )
+            # The cascade and game answers decode the finished utterance instead
+            if (
+                self.settings.streaming_stt
+                and not self.settings.stt_cascade_model
+                and not self.vocabulary
+                and self.stt.supports_words
+            ):
+                # Decode while the user is still talking
+                streamer = StreamingTranscriber(
+                    self.stt,
+                    sample_rate=self.settings.sample_rate,
+                    language=self.settings.language,
+                    on_partial=self._on_partial,
+                ).start()
             audio = recorder.record(
                 stop_event=self._stop_event,
                 max_record_ms=self.settings.max_record_ms,
                 min_record_ms=self.settings.min_record_ms,
                 silence_ms=self.settings.silence_ms,
+                start=self.start_position,
+                endpointer=self.endpointer,
+                on_audio=streamer.feed if streamer is not None else None,
             )
             if self._stop_event.is_set():
                 return
+            if self.endpointer is not None and len(audio):
+                LOG.info("Endpointing: %s", self.endpointer.metrics())
             if audio is None or len(audio) == 0:
                 self.transcript.emit("")
                 return
-            text = self.stt.transcribe(
-                audio,
-                self.settings.sample_rate,
-                model_override=None,
-                language=self.settings.language,
-            )
-            self.transcript.emit(text.strip())
+            ended = time.perf_counter()
+            text = streamer.finish() if streamer is not None else None
+            if text is None:
+                result = self.stt.transcribe_result(
+                    audio,
+                    self.settings.sample_rate,
+                    model_override=None,
+                    language=self.settings.language,
+                    vocabulary=self.vocabulary,
+                )
+            else:
+                result = TranscriptionResult(text, duration=len(audio) / self.settings.sample_rate)
+            elapsed_ms = (time.perf_counter() - ended) * 1000
+            if self.latency is not None:
+                self.latency.add(elapsed_ms)
+            if streamer is not None and not streamer.failed:
+                LOG.info(
+                    "STT: final text %.0f ms after end of speech (%d streaming passes, %.1f s tail)",
+                    elapsed_ms,
+                    streamer.passes,
+                    streamer.tail_seconds,
+                )
+            elif self.vocabulary:
+                LOG.info(
+                    "STT: game answer %r %.0f ms after end of speech (%s, %d of %d not matched)",
+                    result.text,
+                    elapsed_ms,
+                    result.model or "whisper.cpp",
+                    self.stt.vocabulary_misses,
+                    self.stt.vocabulary_turns,
+                )
+            else:
+                LOG.info("STT: final text %.0f ms after end of speech", elapsed_ms)
+            if self.settings.stt_cascade_model and self.stt.cascade_turns:
+                LOG.info("STT cascade: %s", self.stt.cascade_stats())
+            text = result.text.strip()
+            if text and self.gate is not None and not result.snapped:
+                verdict = self.gate.check(result)
+                if verdict != PASS:
+                    LOG.info("Transcript gate: %s %r (%s), %s", verdict, text, self.gate.reason, self.gate.stats())
+                if verdict == DROP:
+                    text = ""
+                elif verdict == REPEAT:
+                    self.repeat.emit()
+                    return
+            self.transcript.emit(text)
         except Exception as exc:
             LOG.exception("ListenWorker error")
             self.error.emit(str(exc))
+        finally:
+            if streamer is not None:
+                streamer.cancel()
 
 
 class LLMWorker(QThread):
     partial = Signal(str)
+    sentence = Signal(str)
     done = Signal(str)
     error = Signal(str)
 
-    def __init__(self, client: OllamaClient, messages, model: str, temperature: float):
+    def __init__(self, client: OllamaClient, messages, model: str, temperature: float, split_sentences=False):
         super().__init__()
         self.client = client
         self.messages = messages
         self.model = model
         self.temperature = temperature
+        self.splitter = SentenceSplitter() if split_sentences else None
+        self.text = ""
         self._stop_event = threading.Event()
 
     def stop(self):
         self._stop_event.set()
 
+    @property
+    def stopped(self):
+        return self._stop_event.is_set()
+
     def run(self):
         try:
             buffer_text = ""
@@ -105,7 +213,17 @@ class LLMWorker(QThread):
                 if not chunk:
                     continue
                 buffer_text += chunk
+                self.text = buffer_text
                 self.partial.emit(buffer_text)
+                if self.splitter is not None:
+                    for sentence in self.splitter.feed(chunk):
+                        self.sentence.emit(sentence)
+            if self.splitter is not None:
+                rest = self.splitter.flush()
+                if rest:
+                    self.sentence.emit(rest)
+            if self._stop_event.is_set():
+                return
             self.done.emit(buffer_text.strip())
         except Exception as exc:
             LOG.exception("LLMWorker error")
@@ -117,81 +235,222 @@ class SpeechWorker(QThread):
     done = Signal()
     error = Signal(str)
 
-    def __init__(self, text: str, settings: AppSettings, tts: PiperTTS, player: AudioPlayer):
+    # Speaks a reply sentence by sentence: each sentence plays as its audio
+    # is synthesized, and the next one is synthesized while it plays.
+    # Without text up front, sentences are added as the LLM produces them
+    # until finish().
+    def __init__(
+        self, text, settings: AppSettings, tts: PiperTTS, player: AudioPlayer, latency=None, since=None, keep=()
+    ):
         super().__init__()
-        self.text = text
         self.settings = settings
         self.tts = tts
         self.player = player
+        self.latency = latency
+        self.since = since
         self._stop_event = threading.Event()
+        self._sentences = queue.Queue()
+        self._audio = queue.Queue(maxsize=2)
+        if text:
+            splitter = SentenceSplitter(keep=keep)
+            for sentence in splitter.feed(text) + [splitter.flush()]:
+                if sentence:
+                    self.add(sentence)
+            self.finish()
+
+    def add(self, sentence: str):
+        self._sentences.put(sentence)
+
+    def finish(self):
+        self._sentences.put(None)
 
     def stop(self):
         self._stop_event.set()
+        self._sentences.put(None)
+        # Cut the speaker off now rather than at the next callback
+        self.player.stop()
 
-    def run(self):
+    def _put_audio(self, item):
+        while not self._stop_event.is_set():
+            try:
+                self._audio.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _synthesize(self):
         try:
-            wav_path = self.tts.synthesize(self.text)
+            while not self._stop_event.is_set():
+                sentence = self._sentences.get()
+                if sentence is None or self._stop_event.is_set():
+                    break
+                sample_rate, chunks = self.tts.stream_pcm(sentence)
+                # Playback of a sentence starts with its first chunk
+                pending = queue.Queue()
+                self._put_audio((pending, sample_rate))
+                try:
+                    for chunk in chunks:
+                        if self._stop_event.is_set():
+                            break
+                        pending.put(chunk)
+                finally:
+                    chunks.close()
+                    pending.put(None)
+        except Exception as exc:
+            self._put_audio(exc)
+        finally:
+            self._put_audio(None)
+
+    def _chunks(self, pending):
+        while not self._stop_event.is_set():
             try:
-                def on_amp(level: float):
-                    self.amplitude.emit(level)
+                chunk = pending.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if chunk is None:
+                return
+            yield chunk
+
+    def _next_audio(self):
+        while not self._stop_event.is_set():
+            try:
+                return self._audio.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return None
 
-                self.player.play_wav(
-                    wav_path,
+    def run(self):
+        try:
+            start = time.perf_counter()
+            threading.Thread(target=self._synthesize, name="tts-synth", daemon=True).start()
+
+            def on_amp(level: float):
+                self.amplitude.emit(level)
+
+            first = True
+            while True:
+                item = self._next_audio()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                pending, sample_rate = item
+                self.player.play_stream(
+                    self._chunks(pending),
+                    sample_rate,
                     device=self.settings.speaker_device,
                     on_amplitude=on_amp,
                     stop_event=self._stop_event,
+                    wait=False,
                 )
-            finally:
-                try:
-                    os.remove(wav_path)
-                except OSError:
-                    pass
+                if first and self.player.first_sample_at is not None:
+                    first = False
+                    self._log_first_sample(start)
+            # Sentences were queued back to back; wait for the last one to play
+            self.player.drain(self._stop_event)
+            if first and self.player.first_sample_at is not None:
+                self._log_first_sample(start)
             self.done.emit()
         except Exception as exc:
             LOG.exception("SpeechWorker error")
             self.error.emit(str(exc))
 
+    def _log_first_sample(self, start):
+        elapsed_ms = (self.player.first_sample_at - start) * 1000
+        if self.latency is not None:
+            self.latency.add(elapsed_ms)
+            LOG.info(
+                "TTS: first sample after %.0f ms (%s, p50 %.0f ms)",
+                elapsed_ms,
+                self.tts.last_engine,
+                self.latency.percentile(50),
+            )
+        if self.since is not None:
+            LOG.info(
+                "Reply: first sample %.0f ms after the question was transcribed",
+                (self.player.first_sample_at - self.since) * 1000,
+            )
+
 
 class StopListener(threading.Thread):
-    def __init__(self, settings: AppSettings, stt: STTManager, on_stop):
+    def __init__(
+        self,
+        settings: AppSettings,
+        stt: STTManager,
+        bus: AudioBus,
+        on_stop,
+        echo_reference=None,
+        spotter=None,
+        latency=None,
+    ):
         super().__init__(daemon=True)
         self.settings = settings
         self.stt = stt
+        self.bus = bus
         self.on_stop = on_stop
+        self.echo_reference = echo_reference
+        self.latency = latency
+        self.detector = BargeInDetector(
+            sample_rate=settings.sample_rate,
+            spotter=spotter,
+            transcribe=self._transcribe,
+            threshold=settings.bargein_threshold,
+        )
         self._stop_event = threading.Event()
 
     def stop(self):
         self._stop_event.set()
 
+    def _transcribe(self, audio):
+        return self.stt.transcribe(
+            audio,
+            self.settings.sample_rate,
+            model_override=self.settings.wakeword_model,
+            language=self.settings.language,
+        )
+
     def run(self):
         recorder = VADRecorder(
             sample_rate=self.settings.sample_rate,
             aggressiveness=self.settings.vad_aggressiveness,
-            device=self.settings.mic_device,
+            source=self.bus,
         )
-        while not self._stop_event.is_set():
-            audio = recorder.record(
-                stop_event=self._stop_event,
-                max_record_ms=1200,
-                min_record_ms=200,
-                silence_ms=300,
-            )
-            if self._stop_event.is_set():
-                return
-            if audio is None or len(audio) == 0:
-                continue
-            try:
-                text = self.stt.transcribe(
-                    audio,
-                    self.settings.sample_rate,
-                    model_override=self.settings.wakeword_model,
-                    language=self.settings.language,
-                )
-            except Exception:
-                continue
-            if "stop" in text.lower():
+        reader = self.bus.subscribe()
+        if self.echo_reference is not None:
+            # Remove Bemo's own voice before the VAD sees it
+            reader = EchoCancellingReader(reader, self.echo_reference)
+        try:
+            while not self._stop_event.is_set():
+                frames = reader.read_block(timeout=0.1)
+                if frames is None:
+                    continue
+                word = self.detector.push(frames, recorder.classify(frames), reader.position)
+                if word is None or self._stop_event.is_set():
+                    continue
                 self.on_stop()
+                # From the end of the user's word to the speaker going quiet
+                spoken = self.bus.write_time(self.detector.last_speech_position)
+                if spoken is not None:
+                    elapsed_ms = (time.monotonic() - spoken) * 1000
+                    if self.latency is not None:
+                        self.latency.add(elapsed_ms)
+                    LOG.info(
+                        "Barge-in: %r (confidence %.2f), silent after %.0f ms (p50 %.0f ms)",
+                        word,
+                        self.detector.confidence,
+                        elapsed_ms,
+                        self.latency.percentile(50) if self.latency is not None else elapsed_ms,
+                    )
                 return
+        finally:
+            reader.close()
+            if isinstance(reader, EchoCancellingReader):
+                LOG.info(
+                    "Stop listener: %d checks, echo cancelled on %d frames (%.1f dB)",
+                    self.detector.checks,
+                    reader.cancelled_frames,
+                    reader.reduction_db(),
+                )
 
 
 class GameManager:
@@ -224,6 +483,10 @@ class GameManager:
     def stop(self):
         self.active_key = None
 
+    def vocabulary(self):
+        game = self.current()
+        return game.vocabulary() if game is not None else None
+
     def maybe_start_from_text(self, text: str):
         t = text.lower()
         if "guess" in t and "number" in t:
@@ -264,13 +527,41 @@ class AssistantController(QObject):
             device=self.settings.whisper_device,
             whisper_cpp_path=self.settings.whisper_cpp_path,
             whisper_cpp_model=self.settings.whisper_cpp_model,
+            model_budget_mb=self.settings.stt_model_budget_mb,
+            whisper_cpp_server_path=self.settings.whisper_cpp_server_path,
+            out_of_process=self.settings.stt_out_of_process,
+            cascade_model=self.settings.stt_cascade_model,
+            cascade_logprob=self.settings.stt_cascade_logprob,
+            cascade_no_speech=self.settings.stt_cascade_no_speech,
+            vocabulary_model=self.settings.game_stt_model or self.settings.wakeword_model,
         )
+        # Wake word, barge-in and the user's turn share one set of models;
+        # the scheduler decides who decodes first
+        self.stt_scheduler = STTScheduler(self.stt)
         self.tts = PiperTTS(
             voice=self.settings.tts_voice,
             speaker_id=self.settings.tts_speaker,
             piper_path=self.settings.piper_path,
+            in_process=self.settings.tts_in_process,
+            cache=TTSCache(self.settings_manager.data_dir / "tts_cache", max_mb=self.settings.tts_cache_mb)
+            if self.settings.tts_cache_mb > 0
+            else None,
+        )
+        self.audio_backend = create_backend(self.settings)
+        self.audio_bus = AudioBus(
+            sample_rate=self.settings.sample_rate, device=self.settings.mic_device, backend=self.audio_backend
+        )
+        self.echo_reference = None
+        if self.settings.echo_cancellation:
+            self.echo_reference = EchoReference(self.audio_bus, extra_delay_ms=self.settings.aec_delay_ms)
+        self.player = AudioPlayer(backend=self.audio_backend, echo_reference=self.echo_reference)
+        self.endpointer = Endpointer(aggressiveness=self.settings.endpoint_aggressiveness)
+        self.bargein_latency = LatencyStats()
+        self.stt_latency = LatencyStats()
+        self.tts_latency = LatencyStats()
+        self.transcript_gate = TranscriptGate(
+            min_logprob=self.settings.gate_min_logprob, max_no_speech=self.settings.gate_max_no_speech
         )
-        self.player = AudioPlayer()
         self.ollama = OllamaClient(self.settings.ollama_base_url)
 
         self.ui = MainWindow()
@@ -285,15 +576,22 @@ class AssistantController(QObject):
         self.game_manager = GameManager(self.scoreboard)
         self.wakeword = WakeWordService(
             mode=self.settings.wakeword_mode,
-            stt=self.stt,
+            stt=self.stt_scheduler.client(PRIORITY_WAKE),
             settings=self.settings,
             on_wake=self.on_wake_word,
+            bus=self.audio_bus,
+            templates_dir=self.settings.wakeword_templates_dir
+            or self.settings_manager.data_dir / "wakeword_templates",
         )
 
         self.listen_worker = None
         self.llm_worker = None
         self.speech_worker = None
+        self._stock_sentences = set()
+        self._pipeline = None  # sentences already spoken of a streamed reply, and its limits
+        self._question_at = None
         self.stop_listener = None
+        self._bargein_spotter_loaded = None
         self.state = STATE_IDLE
         self.history = []
         self.memory = []
@@ -390,9 +688,41 @@ class AssistantController(QObject):
     def start(self):
         self.ui.set_kiosk_mode(self.settings.kiosk_mode)
         self.ui.show()
+        try:
+            self.audio_bus.start()
+        except Exception as exc:
+            LOG.exception("Microphone unavailable")
+            self.ui.set_warning(f"Microphone unavailable: {exc}")
         self.wakeword.start()
+        self.preload_stt_models()
+        self.tts.preload()
+        self.warm_tts_cache()
         QTimer.singleShot(1200, self.startup_greet)
 
+    def preload_stt_models(self):
+        # The wake word model is needed first, the main model once someone talks
+        names = [self.settings.whisper_model]
+        if self.settings.stt_cascade_model:
+            names.insert(0, self.settings.stt_cascade_model)
+        if self.settings.wakeword_mode == "simple":
+            names.insert(0, self.settings.wakeword_model)
+        names.append(self.settings.game_stt_model or self.settings.wakeword_model)
+        self.stt.preload(names)
+
+    def warm_tts_cache(self):
+        # Split like SpeechWorker does, so the cached entries are the sentences it asks for
+        phrases = [self._startup_greeting, GREETING_REPLY, UNCLEAR_REPLY]
+        for game in self.game_manager.games.values():
+            phrases.extend(game.phrases())
+        sentences = []
+        for phrase in phrases:
+            splitter = SentenceSplitter()
+            sentences.extend(s for s in splitter.feed(phrase) + [splitter.flush()] if s)
+        # Games add text after a stock phrase ("Correct! <explanation>"); keep
+        # it a sentence of its own so the cached audio is used
+        self._stock_sentences = set(sentences)
+        self.tts.warm(sentences)
+
     def startup_greet(self):
         greeting = self._startup_greeting
         self.ui.append_transcript("Bemo", greeting)
@@ -406,6 +736,7 @@ class AssistantController(QObject):
             self.listen_worker.stop()
         if self.llm_worker:
             self.llm_worker.stop()
+        self._pipeline = None
         if self.speech_worker:
             self.speech_worker.stop()
         if self.stop_listener:
@@ -427,18 +758,47 @@ class AssistantController(QObject):
     def on_wake_word(self):
         if self.state != STATE_IDLE:
             return
-        self.manual_listen()
+        # Pick up right where the wake phrase ended so the first words are kept
+        self._start_listening(start=self.wakeword.wake_position)
 
     def manual_listen(self):
+        self._start_listening()
+
+    def _start_listening(self, start=None):
         if self.state != STATE_IDLE:
             return
         self.wakeword.pause()
+        # A wake word check still queued or decoding is stale now
+        self.stt_scheduler.cancel(PRIORITY_WAKE)
         self.update_ui_state(STATE_LISTENING)
-        self.listen_worker = ListenWorker(self.settings, self.stt)
+        self.listen_worker = ListenWorker(
+            self.settings,
+            self.stt_scheduler.client(PRIORITY_TURN),
+            self.audio_bus,
+            start=start,
+            endpointer=self.endpointer,
+            latency=self.stt_latency,
+            gate=self.transcript_gate if self.settings.transcript_gate else None,
+            vocabulary=self.game_manager.vocabulary(),
+        )
         self.listen_worker.transcript.connect(self.on_transcript)
+        self.listen_worker.repeat.connect(self.on_unclear_transcript)
+        self.listen_worker.partial.connect(self.on_partial_transcript)
         self.listen_worker.error.connect(self.on_listen_error)
         self.listen_worker.start()
 
+    def on_partial_transcript(self, text: str):
+        if self.state == STATE_LISTENING and text:
+            self.ui.set_status(f"{STATE_LISTENING}: {text}")
+
+    def on_unclear_transcript(self):
+        # Heard speech but not clearly enough to answer; ask without involving the LLM
+        self.wakeword.resume()
+        self.update_ui_state(STATE_IDLE)
+        reply = UNCLEAR_REPLY
+        self.ui.append_transcript("Bemo", reply)
+        self.reply_with_text(reply)
+
     def on_listen_error(self, message: str):
         self.ui.set_warning(f"Listen error: {message}")
         self.update_ui_state(STATE_IDLE)
@@ -453,6 +813,7 @@ class AssistantController(QObject):
         return t in wake_variants
 
     def on_transcript(self, text: str):
+        LOG.info("STT scheduler: %s", self.stt_scheduler.stats())
         self.wakeword.resume()
         if self._is_wake_only(text):
             self.update_ui_state(STATE_IDLE)
@@ -568,20 +929,11 @@ class AssistantController(QObject):
 
         # Prefer 1-2 sentences max (1 sentence for greetings/short inputs)
         sentences = re.split(r"(?<=[.!?])\s+", cleaned)
-        user_words = len(re.findall(r"\w+", user_text or ""))
-        greeting_like = any(k in user_lower for k in ["hi", "hello", "hey", "how are you", "what's up"])
-        question_like = ("?" in user_text) or any(k in user_lower for k in ["who", "what", "why", "how", "tell me", "about", "explain"])
-        # Short canned response for simple greetings
-        if greeting_like and not question_like and user_words <= 8:
-            return "I'm doing good—thanks for asking."
-        if greeting_like and not question_like:
-            max_sentences = 1
-        elif question_like:
-            max_sentences = 4
-        else:
-            max_sentences = 2
+        canned, max_sentences, max_chars = self._reply_limits(user_text)
+        if canned:
+            return canned
+        question_like = max_chars > 240
         short = " ".join(sentences[:max_sentences]).strip()
-        max_chars = 520 if question_like else 240
         if len(short) > max_chars:
             short = short[:max_chars].rsplit(" ", 1)[0] + "..."
         # If too short for a question, provide a direct minimal answer
@@ -593,9 +945,62 @@ class AssistantController(QObject):
             return "Got it. Give me one specific thing you want to know, and I'll answer it directly."
         return short if short else cleaned
 
+    def _reply_limits(self, user_text: str):
+        # (canned reply or "", max sentences, max characters) for a reply to user_text
+        user_lower = (user_text or "").lower()
+        user_words = len(re.findall(r"\w+", user_text or ""))
+        greeting_like = any(k in user_lower for k in ["hi", "hello", "hey", "how are you", "what's up"])
+        question_like = ("?" in user_text) or any(k in user_lower for k in ["who", "what", "why", "how", "tell me", "about", "explain"])
+        # Short canned response for simple greetings
+        if greeting_like and not question_like and user_words <= 8:
+            return GREETING_REPLY, 1, 240
+        if greeting_like and not question_like:
+            max_sentences = 1
+        elif question_like:
+            max_sentences = 4
+        else:
+            max_sentences = 2
+        return "", max_sentences, 520 if question_like else 240
+
+    def _clean_sentence(self, sentence: str):
+        # _normalize_response for one streamed sentence; None once the model
+        # starts writing an example conversation
+        lower = sentence.lower()
+        if any(p in lower for p in ["here's an example", "example of a conversation", "conversation between", "example conversation"]):
+            return None
+        cleaned = re.sub(r"^(bemo|assistant|user|system|bemo chatbot)\s*:\s*", "", sentence.strip(), flags=re.I)
+        try:
+            cleaned = re.sub(r"[\U00010000-\U0010ffff]", "", cleaned)
+        except re.error:
+            pass
+        cleaned = cleaned.replace("Beemo", "Bemo")
+        m = re.match(r"^\s*([-*•]|\d+\.)\s*(.*)$", cleaned)
+        if m:
+            cleaned = m.group(2)
+        return re.sub(r"\s{2,}", " ", cleaned).strip()
+
     def ask_llm(self, text: str):
         self.update_ui_state(STATE_THINKING)
         self.ui.update_streaming_assistant("")
+        self._question_at = time.perf_counter()
+        self._pipeline = None
+        pipelined = self.settings.pipelined_speech
+        if pipelined:
+            canned, max_sentences, max_chars = self._reply_limits(text)
+            if canned:
+                # The reply doesn't depend on the model, so don't wait for it
+                self.on_llm_done(canned)
+                return
+            self._pipeline = {
+                "spoken": [],
+                "started": False,
+                "list_items": 0,
+                "max_sentences": max_sentences,
+                "max_chars": max_chars,
+                # _normalize_response replaces a too-short answer to a question,
+                # so hold speech until the reply is long enough to keep
+                "min_words": 4 if max_chars > 240 else 0,
+            }
 
         system_prompt = self.settings.system_prompt or DEFAULT_SYSTEM_PROMPT
         system_prompt += self.memory_blurb()
@@ -605,18 +1010,96 @@ class AssistantController(QObject):
         messages.append({"role": "user", "content": text})
 
         self.llm_worker = LLMWorker(
-            self.ollama, messages, self.settings.ollama_model, self.settings.ollama_temperature
+            self.ollama,
+            messages,
+            self.settings.ollama_model,
+            self.settings.ollama_temperature,
+            split_sentences=pipelined,
         )
         self.llm_worker.partial.connect(self.ui.update_streaming_assistant)
-        self.llm_worker.done.connect(self.on_llm_done)
+        self.llm_worker.sentence.connect(self.on_llm_sentence)
+        self.llm_worker.done.connect(self._on_llm_worker_done)
         self.llm_worker.error.connect(self.on_llm_error)
         self.llm_worker.start()
 
+    def _on_llm_worker_done(self, response: str):
+        # A reply that was stopped, or that already ended while streaming, is finished
+        if self.llm_worker is None or self.llm_worker.stopped:
+            return
+        self.on_llm_done(response)
+
+    def on_llm_sentence(self, sentence: str):
+        # Pipelined mode: speak each sentence as soon as the LLM has finished it
+        pipeline = self._pipeline
+        if pipeline is None or self.llm_worker is None or self.llm_worker.stopped:
+            return
+        cleaned = self._clean_sentence(sentence)
+        if cleaned is None:
+            self._end_pipelined_reply()
+            return
+        if not cleaned:
+            return
+        if re.match(r"^\s*([-*•]|\d+\.)\s", sentence):
+            # Lists are cut to 3 items, as in _normalize_response
+            pipeline["list_items"] += 1
+            if pipeline["list_items"] > 3:
+                return
+        spoken = pipeline["spoken"]
+        if len(spoken) >= pipeline["max_sentences"]:
+            self._end_pipelined_reply()
+            return
+        said = " ".join(spoken)
+        last = len(f"{said} {cleaned}".strip()) > pipeline["max_chars"]
+        if last:
+            # Same cut as _normalize_response: at a word, marked with "..."
+            short = f"{said} {cleaned}".strip()[: pipeline["max_chars"]].rsplit(" ", 1)[0] + "..."
+            cleaned = short[len(said) :].strip()
+        if last and not re.search(r"\w", cleaned) and spoken:
+            # The cut fell between sentences; only the history shows the "..."
+            spoken[-1] += cleaned
+        elif re.search(r"\w", cleaned):
+            spoken.append(cleaned)
+            if pipeline["started"]:
+                self.speech_worker.add(cleaned)
+            elif len(re.findall(r"\w+", " ".join(spoken))) >= pipeline["min_words"]:
+                if not self._start_speech(None):
+                    self._pipeline = None
+                    self.llm_worker.stop()
+                    return
+                pipeline["started"] = True
+                for held in spoken:
+                    self.speech_worker.add(held)
+        if last:
+            self._end_pipelined_reply()
+
+    def _end_pipelined_reply(self):
+        pipeline, self._pipeline = self._pipeline, None
+        # Everything that will be said is known; the rest of the generation isn't needed
+        self.llm_worker.stop()
+        response = " ".join(pipeline["spoken"])
+        if not pipeline["started"]:
+            # Nothing spoken yet (nothing speakable, or too short to keep);
+            # clean up the whole text the way a non-pipelined reply is
+            self.on_llm_done(self.llm_worker.text.strip())
+            return
+        self.history.append({"role": "user", "content": self.ui.last_user_text()})
+        self.history.append({"role": "assistant", "content": response})
+        self.ui.update_streaming_assistant(response)
+        self.speech_worker.finish()
+
     def on_llm_error(self, message: str):
         self.ui.set_warning(f"LLM error: {message}")
+        if self._pipeline is not None and self._pipeline["spoken"]:
+            # Finish saying what already came through
+            self._end_pipelined_reply()
+            return
+        self._pipeline = None
         self.update_ui_state(STATE_IDLE)
 
     def on_llm_done(self, response: str):
+        if self._pipeline is not None:
+            self._end_pipelined_reply()
+            return
         response = self._normalize_response(response, self.ui.last_user_text())
         self.history.append({"role": "user", "content": self.ui.last_user_text()})
         self.history.append({"role": "assistant", "content": response})
@@ -627,6 +1110,10 @@ class AssistantController(QObject):
         if not response:
             self.update_ui_state(STATE_IDLE)
             return
+        self._start_speech(response)
+
+    def _start_speech(self, response):
+        # response None: sentences are added to self.speech_worker as they arrive
         tts_ok, tts_msg = self.tts.status()
         if not tts_ok:
             if self._voice_download_in_progress:
@@ -634,15 +1121,49 @@ class AssistantController(QObject):
             else:
                 self.ui.set_warning(f"TTS unavailable. {tts_msg} Set Piper exe + voice in Settings.")
             self.update_ui_state(STATE_IDLE)
-            return
+            return False
         self.update_ui_state(STATE_SPEAKING)
-        self.speech_worker = SpeechWorker(response, self.settings, self.tts, self.player)
+        since, self._question_at = self._question_at, None
+        self.speech_worker = SpeechWorker(
+            response,
+            self.settings,
+            self.tts,
+            self.player,
+            latency=self.tts_latency,
+            since=since,
+            keep=self._stock_sentences,
+        )
         self.speech_worker.amplitude.connect(self.ui.set_mouth_level)
         self.speech_worker.done.connect(self.on_speech_done)
         self.speech_worker.error.connect(self.on_speech_error)
         self.speech_worker.start()
-        self.stop_listener = StopListener(self.settings, self.stt, self.stop_all)
+        if self.stop_listener and self.stop_listener is not threading.current_thread():
+            # The barge-in spotter is shared; only one listener may drive it
+            self.stop_listener.stop()
+            self.stop_listener.join(timeout=2)
+        self.stop_listener = StopListener(
+            self.settings,
+            self.stt_scheduler.client(PRIORITY_BARGE_IN),
+            self.audio_bus,
+            self.stop_all,
+            echo_reference=self.echo_reference,
+            spotter=self._bargein_spotter(),
+            latency=self.bargein_latency,
+        )
         self.stop_listener.start()
+        return True
+
+    def _bargein_spotter(self):
+        # Enrolled "stop"/"quiet"/... templates are loaded once and reused per reply
+        if self._bargein_spotter_loaded is None:
+            self._bargein_spotter_loaded = (
+                load_spotter(
+                    self.settings.bargein_templates_dir or self.settings_manager.data_dir / "bargein_templates",
+                    sample_rate=self.settings.sample_rate,
+                )
+                or False
+            )
+        return self._bargein_spotter_loaded or None
 
     def on_speech_error(self, message: str):
         self.ui.set_warning(f"TTS error: {message}")
@@ -651,6 +1172,9 @@ class AssistantController(QObject):
     def on_speech_done(self):
         if self.stop_listener:
             self.stop_listener.stop()
+        if self.tts.cache is not None:
+            LOG.info("TTS cache: %s", self.tts.cache.stats())
+        LOG.info("Playback: %s", self.player.stats())
         self.update_ui_state(STATE_IDLE)
 
     def start_game_from_ui(self, key: str):
@@ -721,7 +1245,7 @@ class AssistantController(QObject):
 
     def open_settings(self):
         models = self.ollama.list_models()
-        self.ui.open_settings(self.settings, models, self.verify_ollama, self.run_stt_test)
+        self.ui.open_settings(self.settings, models, self.verify_ollama, self.run_stt_test, self.run_tts_test)
         if self.ui.settings_result is None:
             return
         previous_mode = self.settings.wakeword_mode
@@ -734,8 +1258,20 @@ class AssistantController(QObject):
             device=self.settings.whisper_device,
             whisper_cpp_path=self.settings.whisper_cpp_path,
             whisper_cpp_model=self.settings.whisper_cpp_model,
+            whisper_cpp_server_path=self.settings.whisper_cpp_server_path,
+            cascade_model=self.settings.stt_cascade_model,
+            vocabulary_model=self.settings.game_stt_model or self.settings.wakeword_model,
         )
+        self.stt.pool.budget_mb = self.settings.stt_model_budget_mb
+        self.preload_stt_models()
         self.tts.update_voice(self.settings.tts_voice, self.settings.tts_speaker, self.settings.piper_path)
+        self.tts.preload()
+        try:
+            self.audio_bus.configure(self.settings.sample_rate, self.settings.mic_device)
+        except Exception as exc:
+            LOG.exception("Microphone unavailable")
+            self.ui.set_warning(f"Microphone unavailable: {exc}")
+        self.endpointer.aggressiveness = self.settings.endpoint_aggressiveness
         self.wakeword.update_settings(self.settings)
         if previous_mode != self.settings.wakeword_mode:
             self.wakeword.stop()
@@ -757,9 +1293,24 @@ class AssistantController(QObject):
             message = "Ollama not reachable. Start 'ollama serve'."
         return ok, models, message
 
+    def run_tts_test(self, settings: AppSettings):
+        # The dialog's voice through the app's player, so the configured
+        # backend and speaker are used and the device isn't opened twice
+        tts = PiperTTS(
+            settings.tts_voice,
+            speaker_id=settings.tts_speaker,
+            piper_path=settings.piper_path,
+            in_process=settings.tts_in_process,
+        )
+        sample_rate, chunks = tts.stream_pcm("Hello. This is a Bemo voice test.")
+        self.player.play_stream(chunks, sample_rate, device=settings.speaker_device)
+        return tts.last_engine
+
     def run_stt_test(self, settings: AppSettings):
         try:
             audio = self._record_seconds(settings, seconds=3)
+            # Same pool as the assistant: the current model is reused hot, a
+            # different one is loaded alongside and unloaded afterwards
             stt = STTManager(
                 engine=settings.stt_engine,
                 model_name=settings.whisper_model,
@@ -767,25 +1318,57 @@ class AssistantController(QObject):
                 device=settings.whisper_device,
                 whisper_cpp_path=settings.whisper_cpp_path,
                 whisper_cpp_model=settings.whisper_cpp_model,
+                transient=True,
+                whisper_cpp_server_path=settings.whisper_cpp_server_path,
+                out_of_process=settings.stt_out_of_process,
             )
-            text = stt.transcribe(audio, settings.sample_rate, language=settings.language)
+            try:
+                hot = settings.stt_engine != "whisper.cpp" and stt.is_loaded()
+                start = time.perf_counter()
+                text = stt.transcribe(audio, settings.sample_rate, language=settings.language)
+                elapsed = time.perf_counter() - start
+            finally:
+                stt.close()
+                if stt.server_key() != self.stt.server_key():
+                    # A whisper.cpp server started just for this test
+                    close_servers(keep=self.stt.server_key())
+            LOG.info("STT test: %.2f s (%s model)", elapsed, "loaded" if hot else "cold")
             text = text.strip() if text else "(no speech detected)"
-            return True, text
+            return True, f"{text} ({elapsed:.1f} s{', model already loaded' if hot else ''})"
         except Exception as exc:
             return False, str(exc)
 
     def _record_seconds(self, settings: AppSettings, seconds=3):
         frames = int(settings.sample_rate * seconds)
-        data = sd.rec(
+        if self.audio_bus.running and self.audio_bus.matches(settings.sample_rate, settings.mic_device):
+            return self._record_from_bus(frames)
+        data = self.audio_backend.record(
             frames,
             samplerate=settings.sample_rate,
             channels=1,
             dtype="int16",
             device=settings.mic_device if settings.mic_device else None,
         )
-        sd.wait()
         return data.reshape(-1)
 
+    def _record_from_bus(self, frames):
+        reader = self.audio_bus.subscribe()
+        chunks = []
+        collected = 0
+        try:
+            while collected < frames:
+                frame = reader.read(timeout=1.0)
+                if frame is None:
+                    break
+                # Bus frames are views into its ring
+                chunks.append(frame.copy())
+                collected += len(frame)
+        finally:
+            reader.close()
+        if not chunks:
+            return np.array([], dtype=np.int16)
+        return np.concatenate(chunks)[:frames]
+
     def open_games_hub(self):
         games = [
             {"key": "guess", "label": "Guess Number", "score": self.scoreboard.summary("guess_number")},
@@ -811,6 +1394,12 @@ class AssistantController(QObject):
         if self.stop_listener:
             self.stop_listener.stop()
             self.stop_listener.join(timeout=2)
+        self.audio_bus.stop()
+        self.player.close()
+        self.audio_backend.close()
+        self.stt_scheduler.close()
+        close_servers()
+        close_worker()
 
 
 def setup_logging(data_dir: Path):
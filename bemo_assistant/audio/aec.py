@@ -0,0 +1,279 @@
+﻿import threading
+
+import numpy as np
+
+
+class EchoCanceller:
+    # Partitioned-block frequency-domain NLMS. The far-end signal (what the
+    # speaker is playing) is filtered by an adaptive estimate of the
+    # speaker-to-mic path and subtracted from the mic signal. Each bin's step
+    # is normalized by the far-end power in that bin. A residual echo
+    # suppressor cleans up what the linear filter leaves behind.
+    def __init__(
+        self,
+        block=160,
+        partitions=8,
+        mu=0.5,
+        smoothing=0.9,
+        warmup_blocks=100,
+        suppression_floor=0.01,
+        oversubtraction=16.0,
+    ):
+        self.block = block
+        self.partitions = partitions
+        self.mu = mu
+        self.smoothing = smoothing
+        self.warmup_blocks = warmup_blocks
+        self.suppression_floor = suppression_floor
+        self.oversubtraction = oversubtraction
+        bins = block + 1
+        self._weights = np.zeros((partitions, bins), dtype=np.complex128)
+        self._spectra = np.zeros((partitions, bins), dtype=np.complex128)
+        self._far_prev = np.zeros(block, dtype=np.float64)
+        self._power = np.zeros(bins, dtype=np.float64)
+        self._echo_power = 0.0
+        self._leak = 1.0
+        self._bin_leak = None
+        self._noise = None
+        self.blocks = 0
+        self.adapted_blocks = 0
+
+    def reset(self):
+        self._weights[:] = 0
+        self._power[:] = 0
+        self._echo_power = 0.0
+        self._leak = 1.0
+        self._bin_leak = None
+        self.flush()
+
+    def flush(self):
+        # Forget the far-end history but keep the learned echo path
+        self._spectra[:] = 0
+        self._far_prev[:] = 0
+
+    def process(self, near, far):
+        # near and far are float arrays of equal length, a multiple of block
+        near = np.asarray(near, dtype=np.float64)
+        far = np.asarray(far, dtype=np.float64)
+        out = np.empty_like(near)
+        for start in range(0, len(near), self.block):
+            stop = start + self.block
+            out[start:stop] = self._process_block(near[start:stop], far[start:stop])
+        return out
+
+    def _process_block(self, near, far):
+        b = self.block
+        self.blocks += 1
+        self._spectra = np.roll(self._spectra, 1, axis=0)
+        self._spectra[0] = np.fft.rfft(np.concatenate([self._far_prev, far]))
+        self._far_prev = far.copy()
+        echo = np.fft.irfft((self._weights * self._spectra).sum(axis=0), n=2 * b)[b:]
+        error = near - echo
+
+        far_power = float(np.dot(far, far)) / b
+        if far_power < 1e-10:
+            # Nothing new to learn from, but the room may still be ringing
+            return self._suppress(error, echo)
+        echo_power = float(np.dot(echo, echo)) / b
+        error_power = float(np.dot(error, error)) / b
+        self._echo_power = 0.9 * self._echo_power + 0.1 * echo_power
+        # Crude double-talk detector: once the filter has had a second to
+        # converge, a residual as loud as the estimated echo means the user is
+        # talking too, so adaptation is frozen rather than letting their voice
+        # corrupt the filter.
+        if self.adapted_blocks >= self.warmup_blocks and error_power > self._echo_power:
+            # Suppressing now would take the user's voice with it
+            return error
+
+        self.adapted_blocks += 1
+        if echo_power > 1e-10:
+            # Fraction of the echo the filter typically fails to remove
+            self._leak = 0.95 * self._leak + 0.05 * min(1.0, error_power / echo_power)
+            # The same ratio per bin, so bins the filter cancels well are left alone
+            ratio = np.minimum(1.0, np.abs(np.fft.rfft(error)) ** 2 / (np.abs(np.fft.rfft(echo)) ** 2 + 1e-12))
+            self._bin_leak = ratio if self._bin_leak is None else 0.95 * self._bin_leak + 0.05 * ratio
+        spectrum_power = np.abs(self._spectra[0]) ** 2
+        if not self._power.any():
+            self._power[:] = spectrum_power
+        self._power = self.smoothing * self._power + (1 - self.smoothing) * spectrum_power
+        err_spec = np.fft.rfft(np.concatenate([np.zeros(b), error]))
+        step = self.mu / self.partitions / (self._power + self._power.mean() * 0.01 + 1e-10)
+        gradient = np.conj(self._spectra) * (err_spec * step)
+        # Gradient constraint keeps each partition a linear (not circular) filter
+        g = np.fft.irfft(gradient, n=2 * b, axis=1)
+        g[:, b:] = 0
+        self._weights += np.fft.rfft(g, axis=1)
+        return self._suppress(error, echo)
+
+    def _suppress(self, error, echo):
+        # The linear filter never removes all of the echo. Bins whose residual
+        # is no louder than the echo that typically leaks through are pulled
+        # down, but not below the room's noise floor (so an adaptive VAD
+        # downstream keeps a sensible floor); the user's voice on top passes.
+        power = float(np.dot(error, error)) / self.block
+        echo_power = float(np.dot(echo, echo)) / self.block
+        if self._noise is None or power < self._noise:
+            self._noise = power if self._noise is None else 0.8 * self._noise + 0.2 * power
+        elif echo_power < 0.1 * power:
+            # Only learn the floor upwards where the speaker isn't audible
+            self._noise = 0.999 * self._noise + 0.001 * power
+        if self.suppression_floor >= 1.0 or power <= self._noise:
+            return error
+        floor = max(self.suppression_floor, float(np.sqrt(self._noise / power)))
+        err_spec = np.fft.rfft(error)
+        leak = self.oversubtraction * (self._leak if self._bin_leak is None else self._bin_leak)
+        gain = 1.0 - leak * np.abs(np.fft.rfft(echo)) ** 2 / (np.abs(err_spec) ** 2 + 1e-12)
+        gain = np.clip(gain, floor, 1.0)
+        return np.fft.irfft(err_spec * gain, n=self.block)
+
+
+class EchoReference:
+    # What the speaker is playing, resampled to the mic rate and laid out on
+    # the audio bus's sample positions so it can be matched against captured
+    # frames. The player feeds it from its output callback. It also owns the
+    # canceller, since the speaker-to-mic path outlives any one reply.
+    def __init__(self, bus, extra_delay_ms=0, tail_ms=300):
+        self.bus = bus
+        self.canceller = EchoCanceller(block=bus.sample_rate // 100)
+        self.extra_delay_ms = extra_delay_ms
+        self.tail_ms = tail_ms
+        self._lock = threading.Lock()
+        self._ring = None
+        self._start_pos = None
+        self._write_pos = None
+        self._delay = 0
+        self._phase = 0.0
+        self._last = 0.0
+        self.fed_samples = 0
+
+    def begin(self, output_latency=0.0):
+        # A block handed to the output callback now is heard output_latency
+        # later and reaches the bus another input latency after that. Aim ~10 ms
+        # early so the echo never precedes its reference.
+        with self._lock:
+            rate = self.bus.sample_rate
+            if self._ring is None or len(self._ring) != self.bus.capacity:
+                self._ring = np.zeros(self.bus.capacity, dtype=np.float32)
+            if self.canceller.block != rate // 100:
+                self.canceller = EchoCanceller(block=rate // 100)
+            self.canceller.flush()
+            delay_ms = (output_latency + self.bus.latency) * 1000 + self.extra_delay_ms - 10
+            self._delay = max(0, int(delay_ms * rate / 1000))
+            self._start_pos = None
+            self._write_pos = None
+            self._phase = 0.0
+            self._last = 0.0
+
+    def feed(self, block, samplerate):
+        block = np.asarray(block, dtype=np.float32)
+        if block.ndim > 1:
+            block = block.mean(axis=1)
+        rate = self.bus.sample_rate
+        with self._lock:
+            if self._ring is None or len(block) == 0:
+                return
+            if samplerate != rate:
+                # Linear interpolation; the fractional read position and the
+                # previous block's last sample carry over between callbacks
+                step = samplerate / rate
+                positions = np.arange(self._phase, len(block) - 1 + 1e-9, step)
+                source = np.concatenate([[self._last], block])
+                resampled = np.interp(positions + 1, np.arange(len(source)), source).astype(np.float32)
+                self._phase = (positions[-1] + step if len(positions) else self._phase) - len(block)
+                self._last = block[-1]
+                block = resampled
+            live = self.bus.position + self._delay
+            if self._write_pos is None or self._write_pos < live:
+                self._write_pos = live
+            if self._start_pos is None:
+                self._start_pos = self._write_pos
+            self._write(self._write_pos, block)
+            self._write_pos += len(block)
+            self.fed_samples += len(block)
+
+    def _write(self, position, samples):
+        capacity = len(self._ring)
+        n = min(len(samples), capacity)
+        samples = samples[len(samples) - n :]
+        start = position % capacity
+        first = min(n, capacity - start)
+        self._ring[start : start + first] = samples[:first]
+        self._ring[: n - first] = samples[first:]
+
+    def active(self, start, count):
+        # True while [start, start + count) overlaps playback plus the room's tail
+        with self._lock:
+            if self._write_pos is None:
+                return False
+            tail = int(self.tail_ms * self.bus.sample_rate / 1000)
+            return start < self._write_pos + tail and start + count > self._start_pos
+
+    def segment(self, start, count):
+        out = np.zeros(count, dtype=np.float32)
+        with self._lock:
+            if self._write_pos is None:
+                return out
+            lo = max(start, self._start_pos, self._write_pos - len(self._ring))
+            hi = min(start + count, self._write_pos)
+            if hi <= lo:
+                return out
+            idx = np.arange(lo, hi) % len(self._ring)
+            out[lo - start : hi - start] = self._ring[idx]
+        return out
+
+
+class EchoCancellingReader:
+    # Wraps a BusReader so VAD/STT see the mic with the speaker's own voice
+    # removed. Outside playback frames pass through untouched.
+    def __init__(self, reader, reference, canceller=None):
+        self.reader = reader
+        self.reference = reference
+        self.canceller = canceller or reference.canceller
+        self.cancelled_frames = 0
+        self.near_energy = 0.0
+        self.residual_energy = 0.0
+        self._cache = None
+        self._cache_start = 0
+
+    def __getattr__(self, name):
+        return getattr(self.reader, name)
+
+    def read(self, timeout=None):
+        block = self.read_block(1, timeout)
+        return None if block is None else block[0]
+
+    def read_block(self, max_frames=8, timeout=None):
+        n = self.reader.frame_samples
+        if self._cache is not None:
+            # Frames handed back with unread() were already cancelled
+            offset = self.reader.position - self._cache_start
+            if 0 <= offset < len(self._cache) * n and offset % n == 0:
+                first = offset // n
+                block = self._cache[first : first + max_frames]
+                self.reader.position += len(block) * n
+                return block
+            self._cache = None
+        frames = self.reader.read_block(max_frames, timeout)
+        if frames is None:
+            return None
+        start = self.reader.position - frames.size
+        if not self.reference.active(start, frames.size):
+            return frames
+        near = frames.reshape(-1).astype(np.float64) / 32768.0
+        far = self.reference.segment(start, frames.size)
+        cleaned = self.canceller.process(near, far)
+        self.cancelled_frames += len(frames)
+        self.near_energy += float(np.dot(near, near))
+        self.residual_energy += float(np.dot(cleaned, cleaned))
+        out = np.clip(cleaned * 32768.0, -32768, 32767).astype(np.int16).reshape(frames.shape)
+        self._cache = out
+        self._cache_start = start
+        return out
+
+    def unread(self, frames):
+        self.reader.unread(frames)
+
+    def reduction_db(self):
+        if self.residual_energy <= 0 or self.near_energy <= 0:
+            return 0.0
+        return float(10 * np.log10(self.near_energy / self.residual_energy))
@@ -0,0 +1,313 @@
+﻿import abc
+import threading
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+
+class CallbackStop(Exception):
+    pass
+
+
+class _Status:
+    input_overflow = False
+    output_underflow = False
+
+    def __bool__(self):
+        return False
+
+
+class SoundDeviceBackend:
+    name = "sounddevice"
+    realtime = True
+
+    def __init__(self):
+        import sounddevice as sd
+
+        self._sd = sd
+        self.CallbackStop = sd.CallbackStop
+
+    def input_stream(self, samplerate, channels, dtype, blocksize, callback, device=None):
+        return self._sd.InputStream(
+            samplerate=samplerate,
+            channels=channels,
+            dtype=dtype,
+            blocksize=blocksize,
+            callback=callback,
+            device=device,
+        )
+
+    def output_stream(self, samplerate, channels, dtype, blocksize, callback, device=None, latency=None):
+        return self._sd.OutputStream(
+            samplerate=samplerate,
+            channels=channels,
+            dtype=dtype,
+            blocksize=blocksize,
+            latency=latency,
+            callback=callback,
+            device=device,
+        )
+
+    def default_output_rate(self, device=None):
+        try:
+            return int(self._sd.query_devices(device, "output")["default_samplerate"])
+        except Exception:
+            return None
+
+    def record(self, frames, samplerate, channels=1, dtype="int16", device=None):
+        data = self._sd.rec(frames, samplerate=samplerate, channels=channels, dtype=dtype, device=device)
+        self._sd.wait()
+        return data
+
+    def close(self):
+        pass
+
+
+class _ThreadStream(abc.ABC):
+    # Minimal stand-in for a sounddevice stream driven by a Python thread.
+    def __init__(self, samplerate, channels, dtype, blocksize, callback, realtime):
+        self.samplerate = samplerate
+        self.channels = channels
+        self.dtype = np.dtype(dtype)
+        self.blocksize = blocksize or max(1, samplerate // 50)
+        self.callback = callback
+        self.realtime = realtime
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def active(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.active:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, ignore_errors=True):
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+
+    abort = stop
+
+    def close(self, ignore_errors=True):
+        self.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        self.close()
+
+    def _pace(self, next_tick):
+        if not self.realtime:
+            return next_tick
+        next_tick += self.blocksize / self.samplerate
+        delay = next_tick - time.monotonic()
+        if delay > 0:
+            self._stop.wait(delay)
+        return next_tick
+
+    @abc.abstractmethod
+    def _run(self):
+        pass
+
+
+class _ReplayInputStream(_ThreadStream):
+    def __init__(self, source, loop, throttle, **kwargs):
+        super().__init__(**kwargs)
+        self.source = source
+        self.loop = loop
+        self.throttle = throttle
+        self.finished = threading.Event()
+
+    def _run(self):
+        data = self.source(self.samplerate, self.channels, self.dtype)
+        idx = 0
+        status = _Status()
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            if idx >= len(data):
+                if not self.loop or len(data) == 0:
+                    break
+                idx = 0
+            block = data[idx : idx + self.blocksize]
+            if len(block) < self.blocksize:
+                block = np.concatenate([block, np.zeros((self.blocksize - len(block), self.channels), self.dtype)])
+            idx += self.blocksize
+            if self.throttle is not None:
+                self.throttle(self.blocksize)
+            self.callback(block, self.blocksize, None, status)
+            next_tick = self._pace(next_tick)
+        self.finished.set()
+
+
+class _NullOutputStream(_ThreadStream):
+    # Output is discarded; the player hands what it plays to backend.capture()
+    def __init__(self, stop_exc, **kwargs):
+        super().__init__(**kwargs)
+        self.stop_exc = stop_exc
+
+    def _run(self):
+        out = np.zeros((self.blocksize, self.channels), dtype=self.dtype)
+        status = _Status()
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            out.fill(0)
+            try:
+                self.callback(out, self.blocksize, None, status)
+            except self.stop_exc:
+                break
+            next_tick = self._pace(next_tick)
+
+
+class NullBackend:
+    # No sound card: input is silence, output is discarded or appended to a WAV file.
+    name = "null"
+    CallbackStop = CallbackStop
+
+    def __init__(self, capture_path="", realtime=True):
+        self.capture_path = capture_path
+        self.realtime = realtime
+        self._capture = None
+        self._capture_lock = threading.Lock()
+
+    def _silence(self, samplerate, channels, dtype):
+        return np.zeros((samplerate, channels), dtype=dtype)
+
+    def input_stream(self, samplerate, channels, dtype, blocksize, callback, device=None, throttle=None):
+        return _ReplayInputStream(
+            self._silence,
+            True,
+            throttle,
+            samplerate=samplerate,
+            channels=channels,
+            dtype=dtype,
+            blocksize=blocksize,
+            callback=callback,
+            realtime=self.realtime,
+        )
+
+    def output_stream(self, samplerate, channels, dtype, blocksize, callback, device=None, latency=None):
+        return _NullOutputStream(
+            self.CallbackStop,
+            samplerate=samplerate,
+            channels=channels,
+            dtype=dtype,
+            blocksize=blocksize,
+            callback=callback,
+            realtime=self.realtime,
+        )
+
+    def record(self, frames, samplerate, channels=1, dtype="int16", device=None):
+        return np.zeros((frames, channels), dtype=dtype)
+
+    def capture(self, block, samplerate):
+        if not self.capture_path:
+            return
+        with self._capture_lock:
+            if self._capture is None:
+                self._capture = wave.open(str(self.capture_path), "wb")
+                self._capture.setnchannels(block.shape[1])
+                self._capture.setsampwidth(2)
+                self._capture.setframerate(samplerate)
+            if block.dtype == np.int16:
+                pcm = block
+            else:
+                pcm = (np.clip(block, -1.0, 1.0) * 32767).astype(np.int16)
+            self._capture.writeframes(pcm.tobytes())
+
+    def close(self):
+        with self._capture_lock:
+            if self._capture is not None:
+                self._capture.close()
+                self._capture = None
+
+
+class WavReplayBackend(NullBackend):
+    # Input replays WAV files (in order) instead of a microphone, either paced
+    # like a real device or as fast as the consumers allow. Output behaves
+    # like NullBackend.
+    name = "replay"
+
+    def __init__(self, paths, realtime=True, loop=False, capture_path=""):
+        super().__init__(capture_path=capture_path, realtime=realtime)
+        if isinstance(paths, (str, Path)):
+            paths = [paths]
+        self.paths = [Path(p) for p in paths]
+        self.loop = loop
+        self.streams = []
+
+    def _load(self, samplerate, channels, dtype):
+        chunks = [load_wav(p, samplerate) for p in self.paths]
+        data = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int16)
+        data = np.repeat(data.reshape(-1, 1), channels, axis=1)
+        if np.dtype(dtype) == np.float32:
+            return data.astype(np.float32) / 32768.0
+        return data.astype(dtype)
+
+    def input_stream(self, samplerate, channels, dtype, blocksize, callback, device=None, throttle=None):
+        stream = _ReplayInputStream(
+            self._load,
+            self.loop,
+            throttle,
+            samplerate=samplerate,
+            channels=channels,
+            dtype=dtype,
+            blocksize=blocksize,
+            callback=callback,
+            realtime=self.realtime,
+        )
+        self.streams.append(stream)
+        return stream
+
+    def record(self, frames, samplerate, channels=1, dtype="int16", device=None):
+        data = self._load(samplerate, channels, dtype)[:frames]
+        if len(data) < frames:
+            data = np.concatenate([data, np.zeros((frames - len(data), channels), dtype=data.dtype)])
+        return data
+
+
+def load_wav(path, sample_rate):
+    with wave.open(str(path), "rb") as wf:
+        channels = wf.getnchannels()
+        rate = wf.getframerate()
+        width = wf.getsampwidth()
+        raw = wf.readframes(wf.getnframes())
+    if width != 2:
+        raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+    data = np.frombuffer(raw, dtype=np.int16)
+    if channels > 1:
+        data = data.reshape(-1, channels).mean(axis=1)
+    if rate != sample_rate and len(data):
+        positions = np.arange(0, len(data), rate / sample_rate)
+        data = np.interp(positions, np.arange(len(data)), data)
+    return np.asarray(data, dtype=np.int16)
+
+
+def create_backend(settings):
+    name = getattr(settings, "audio_backend", "sounddevice") or "sounddevice"
+    if name == "replay":
+        return WavReplayBackend(
+            settings.replay_input_wav, realtime=True, loop=True, capture_path=settings.capture_output_wav
+        )
+    if name == "null":
+        return NullBackend(capture_path=settings.capture_output_wav)
+    return SoundDeviceBackend()
+
+
+_DEFAULT = None
+
+
+def default_backend():
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = SoundDeviceBackend()
+    return _DEFAULT
@@ -0,0 +1,144 @@
+﻿import re
+
+import numpy as np
+
+from audio.buffers import UtteranceBuffer
+from audio.kws import KeywordSpotter
+
+VOCABULARY = ("stop", "quiet", "wait", "cancel")
+# Other ways of saying a word; "stop it" or "wait wait" already contain it
+VARIANTS = {
+    "quiet": ("shh", "shush", "hush"),
+    "wait": ("hold on",),
+    "cancel": ("never mind", "nevermind"),
+}
+
+
+def load_spotter(path, sample_rate=16000, threshold=0.0):
+    # The user talks over Bemo's (cancelled) voice, so the residual echo sits
+    # well above the room noise; a 20 dB feature floor keeps it out of the
+    # spectral valleys of the word.
+    return KeywordSpotter.from_vocabulary(
+        path, VOCABULARY, sample_rate=sample_rate, threshold=threshold, hop_ms=60, floor_db=20
+    )
+
+
+def vocabulary_confidence(text, vocabulary=VOCABULARY):
+    # Snap a short transcript onto the vocabulary. Only the word itself or
+    # one of its listed phrasings counts, as whole tokens, so "stopped",
+    # "top", "what" or "quite" are not a "stop"/"wait"/"quiet".
+    tokens = re.findall(r"[a-z']+", (text or "").lower())
+    for word in vocabulary:
+        for phrase in (word,) + VARIANTS.get(word, ()):
+            needle = phrase.split()
+            if any(tokens[i : i + len(needle)] == needle for i in range(len(tokens) - len(needle) + 1)):
+                return word, 1.0
+    return None, 0.0
+
+
+class BargeInDetector:
+    # Streaming "stop" detection while Bemo speaks. Short overlapping windows
+    # of the most recent audio are scored continuously and the detector fires
+    # as soon as one of the words in the vocabulary is recognised with enough
+    # confidence, instead of waiting for the end of the utterance.
+    #
+    # With enrolled templates (a KeywordSpotter with one label per word) every
+    # window is scored by DTW. Without them each window is transcribed with
+    # the small Whisper model and snapped onto the vocabulary, once per burst
+    # of speech (when it pauses, or every window while it goes on) so a
+    # user talking over Bemo doesn't queue a decode every hop.
+    def __init__(
+        self,
+        sample_rate=16000,
+        spotter=None,
+        transcribe=None,
+        threshold=0.5,
+        window_ms=900,
+        hop_ms=150,
+        min_speech_ms=150,
+        vocabulary=VOCABULARY,
+    ):
+        self.sample_rate = sample_rate
+        self.spotter = spotter
+        self.transcribe = transcribe
+        self.threshold = threshold
+        self.vocabulary = vocabulary
+        self.window_samples = int(sample_rate * window_ms / 1000)
+        self.hop_samples = int(sample_rate * hop_ms / 1000)
+        self.min_speech_samples = int(sample_rate * min_speech_ms / 1000)
+        self._audio = UtteranceBuffer(2 * self.window_samples)
+        self._speech = 0
+        self._quiet = self.window_samples
+        self._checked_speech = 0
+        self.last_speech_position = None
+        self.word = None
+        self.confidence = 0.0
+        self.checks = 0
+        if spotter is not None:
+            spotter.reset()
+
+    def push(self, frames, speech_flags, end_position):
+        # frames: (k, n) block ending at bus position end_position. Returns the
+        # recognised word, or None.
+        n = frames.shape[1]
+        for idx, speech in enumerate(speech_flags):
+            if speech:
+                self._speech += n
+                self._quiet = 0
+                self.last_speech_position = end_position - (len(frames) - idx - 1) * n
+            else:
+                self._quiet += n
+                if self._quiet > self.window_samples:
+                    self._speech = 0
+                    self._checked_speech = 0
+        if self.spotter is not None:
+            return self._push_spotter(frames, bool(np.any(speech_flags)))
+        return self._push_transcribe(frames)
+
+    def _push_spotter(self, frames, speech):
+        checks = self.spotter.checks
+        self.spotter.push(frames, speech=speech)
+        if self.spotter.checks == checks:
+            return None
+        self.checks += 1
+        # 1.0 is a perfect template match, 0.5 sits at the spotter's own threshold
+        confidence = max(0.0, 1.0 - self.spotter.cost / (2.0 * self.spotter.threshold))
+        if confidence < self.threshold:
+            return None
+        self.word = self.spotter.label
+        self.confidence = confidence
+        return self.word
+
+    def _push_transcribe(self, frames):
+        for frame in frames:
+            self._audio.append(frame)
+        self._audio.keep_last(self.window_samples)
+        if self.transcribe is None:
+            return None
+        # Only speech that hasn't been transcribed yet
+        new_speech = self._speech - self._checked_speech
+        if new_speech < self.min_speech_samples:
+            return None
+        if self._quiet < self.hop_samples and new_speech < self.window_samples:
+            return None
+        self._checked_speech = self._speech
+        self.checks += 1
+        try:
+            # keep_last only trims now and then; decode exactly one window
+            text = self.transcribe(np.array(self._audio.view()[-self.window_samples :]))
+        except Exception:
+            return None
+        word, confidence = vocabulary_confidence(text, self.vocabulary)
+        if word is None or confidence < self.threshold:
+            return None
+        self.word = word
+        self.confidence = confidence
+        return word
+
+    def reset(self):
+        self._audio.clear()
+        self._speech = 0
+        self._quiet = self.window_samples
+        self._checked_speech = 0
+        if self.spotter is not None:
+            self.spotter.reset()
@@ -0,0 +1,80 @@
+﻿import numpy as np
+
+
+class UtteranceBuffer:
+    # Growable int16 buffer for one utterance. Frames are copied straight into
+    # preallocated storage; the float32 version Whisper wants is built once and
+    # cached until more audio is appended.
+    def __init__(self, capacity=16000 * 12):
+        self._data = np.empty(max(1, int(capacity)), dtype=np.int16)
+        self._length = 0
+        self._float = None
+
+    def __len__(self):
+        return self._length
+
+    def __array__(self, dtype=None, copy=None):
+        view = self.view()
+        if dtype is not None and np.dtype(dtype) != view.dtype:
+            return view.astype(dtype)
+        return view.copy() if copy else view
+
+    @property
+    def capacity(self):
+        return len(self._data)
+
+    def reserve(self, capacity):
+        if capacity <= len(self._data):
+            return
+        grown = np.empty(max(capacity, len(self._data) * 2), dtype=np.int16)
+        grown[: self._length] = self._data[: self._length]
+        self._data = grown
+
+    def append(self, samples):
+        n = len(samples)
+        if n == 0:
+            return
+        self.reserve(self._length + n)
+        self._data[self._length : self._length + n] = samples
+        self._length += n
+        self._float = None
+
+    def keep_last(self, samples, exact=False):
+        # Trim to the newest samples. Unless exact, memory only moves once the
+        # buffer holds twice that much so the cost stays amortized over frames.
+        if self._length <= (samples if exact else 2 * samples):
+            return
+        self._data[:samples] = self._data[self._length - samples : self._length]
+        self._length = samples
+        self._float = None
+
+    def clear(self):
+        self._length = 0
+        self._float = None
+
+    def view(self):
+        return self._data[: self._length]
+
+    def as_float32(self):
+        if self._float is None or len(self._float) != self._length:
+            audio = self.view().astype(np.float32)
+            audio *= 1.0 / 32768.0
+            self._float = audio
+        return self._float
+
+
+def to_float32(audio):
+    if isinstance(audio, UtteranceBuffer):
+        return audio.as_float32()
+    audio = np.asarray(audio)
+    if audio.dtype == np.float32:
+        return audio
+    out = audio.astype(np.float32)
+    out *= 1.0 / 32768.0
+    return out
+
+
+def to_int16(audio):
+    if isinstance(audio, UtteranceBuffer):
+        return audio.view()
+    return np.asarray(audio, dtype=np.int16)
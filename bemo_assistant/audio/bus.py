@@ -0,0 +1,250 @@
+﻿import bisect
+import collections
+import logging
+import threading
+import time
+import numpy as np
+
+from audio.backends import default_backend
+
+LOG = logging.getLogger("bemo.audio")
+
+
+class BusReader:
+    def __init__(self, bus, position):
+        self.bus = bus
+        self.position = position
+        self.overruns = 0
+        self.dropped_samples = 0
+        self.closed = False
+        self._scratch = None
+
+    @property
+    def frame_samples(self):
+        return self.bus.frame_samples
+
+    @property
+    def sample_rate(self):
+        return self.bus.sample_rate
+
+    def available(self):
+        return self.bus.position - self.position
+
+    def seek_live(self):
+        self.position = self.bus.position
+
+    def read(self, timeout=None):
+        # Frames are views into the bus ring (or a reused scratch array) and
+        # are only valid until the next read; copy them to keep them. A reader
+        # that was overrun, or sits close behind the writer, gets a copy.
+        return self.bus.read_frame(self, timeout)
+
+    def read_block(self, max_frames=8, timeout=None):
+        return self.bus.read_frames(self, max_frames, timeout)
+
+    def unread(self, frames):
+        self.position -= frames * self.frame_samples
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+# One long-lived microphone stream shared by every consumer. Audio lands in a
+# ring buffer addressed by absolute sample position; each reader keeps its own
+# cursor and may start from a position in the past (e.g. the end of the wake word).
+class AudioBus:
+    def __init__(self, sample_rate=16000, device="", frame_ms=30, buffer_seconds=10, backend=None):
+        self.backend = backend or default_backend()
+        self.frame_ms = frame_ms
+        self.buffer_seconds = buffer_seconds
+        self.sample_rate = sample_rate
+        self.device = device if device else None
+        self.frame_samples = int(self.sample_rate * self.frame_ms / 1000)
+        self.overflows = 0
+        self._lock = threading.Lock()
+        self._data_ready = threading.Condition(self._lock)
+        self._readers = set()
+        self._stream = None
+        self._position = 0
+        self._write_times = collections.deque(maxlen=1024)
+        self._allocate()
+
+    def _allocate(self):
+        frames = int(self.buffer_seconds * 1000 / self.frame_ms)
+        self.capacity = self.frame_samples * frames
+        self._ring = np.zeros(self.capacity, dtype=np.int16)
+
+    @property
+    def position(self):
+        return self._position
+
+    @property
+    def running(self):
+        return self._stream is not None
+
+    @property
+    def latency(self):
+        # Input latency reported by the device stream, in seconds
+        latency = getattr(self._stream, "latency", 0.0)
+        return latency if isinstance(latency, (int, float)) else 0.0
+
+    def start(self):
+        if self._stream is not None:
+            return
+        kwargs = {}
+        if not self.backend.realtime:
+            # Faster-than-realtime replay must not lap the slowest reader
+            kwargs["throttle"] = self._wait_for_room
+        stream = self.backend.input_stream(
+            samplerate=self.sample_rate,
+            channels=1,
+            dtype="int16",
+            blocksize=self.frame_samples,
+            callback=self._callback,
+            device=self.device,
+            **kwargs,
+        )
+        self._stream = stream
+        try:
+            stream.start()
+        except Exception:
+            self._stream = None
+            raise
+
+    def stop(self):
+        with self._lock:
+            stream = self._stream
+            self._stream = None
+            self._data_ready.notify_all()
+        if stream is None:
+            return
+        try:
+            stream.stop()
+            stream.close()
+        except Exception:
+            LOG.exception("Failed to close microphone stream")
+
+    def configure(self, sample_rate, device=""):
+        device = device if device else None
+        if sample_rate == self.sample_rate and device == self.device:
+            return
+        was_running = self.running
+        self.stop()
+        with self._lock:
+            self.sample_rate = sample_rate
+            self.device = device
+            self.frame_samples = int(self.sample_rate * self.frame_ms / 1000)
+            self._allocate()
+            for reader in self._readers:
+                reader.position = self._position
+            self._data_ready.notify_all()
+        if was_running:
+            self.start()
+
+    def write_time(self, position):
+        # Wall-clock time at which the sample at `position` was captured
+        with self._lock:
+            ends = [end for end, _t in self._write_times]
+            idx = bisect.bisect_left(ends, position)
+            if idx >= len(ends):
+                return None
+            return self._write_times[idx][1]
+
+    def _wait_for_room(self, samples):
+        # Keep a few frames of slack so blocks handed out as ring views stay intact
+        limit = self.capacity - 8 * self.frame_samples
+        with self._lock:
+            self._data_ready.wait_for(
+                lambda: self._stream is None
+                or all(self._position + samples - r.position <= limit for r in self._readers),
+                1.0,
+            )
+
+    def matches(self, sample_rate, device=""):
+        return self.sample_rate == sample_rate and self.device == (device if device else None)
+
+    def subscribe(self, start=None):
+        with self._lock:
+            position = self._position if start is None else start
+            position = max(position, self._position - self.capacity)
+            reader = BusReader(self, position)
+            self._readers.add(reader)
+        return reader
+
+    def unsubscribe(self, reader):
+        with self._lock:
+            reader.closed = True
+            self._readers.discard(reader)
+            self._data_ready.notify_all()
+
+    def _callback(self, indata, frames, time_info, status):
+        if status and status.input_overflow:
+            self.overflows += 1
+        self.write(indata[:, 0])
+
+    def write(self, samples):
+        n = len(samples)
+        if n == 0:
+            return
+        with self._lock:
+            if n > self.capacity:
+                samples = samples[-self.capacity :]
+                self._position += n - self.capacity
+                n = self.capacity
+            start = self._position % self.capacity
+            first = min(n, self.capacity - start)
+            self._ring[start : start + first] = samples[:first]
+            if first < n:
+                self._ring[: n - first] = samples[first:]
+            self._position += n
+            self._write_times.append((self._position, time.monotonic()))
+            self._data_ready.notify_all()
+
+    def recent(self, samples):
+        with self._lock:
+            samples = min(samples, self._position, self.capacity)
+            out = np.empty(samples, dtype=np.int16)
+            start = (self._position - samples) % self.capacity
+            first = min(samples, self.capacity - start)
+            out[:first] = self._ring[start : start + first]
+            out[first:] = self._ring[: samples - first]
+        return out
+
+    def read_frame(self, reader, timeout=None):
+        block = self.read_frames(reader, 1, timeout)
+        return None if block is None else block[0]
+
+    def read_frames(self, reader, max_frames, timeout=None):
+        with self._lock:
+            if not self._data_ready.wait_for(
+                lambda: reader.closed or self._position - reader.position >= self.frame_samples,
+                timeout,
+            ):
+                return None
+            if reader.closed:
+                return None
+            oldest = self._position - self.capacity
+            if reader.position < oldest:
+                reader.overruns += 1
+                reader.dropped_samples += oldest - reader.position
+                reader.position = oldest
+            n = self.frame_samples
+            # The writer's next blocks land right behind `oldest`; a view there
+            # would change under the caller
+            at_risk = reader.position < oldest + 8 * n
+            count = min(max_frames, (self._position - reader.position) // n)
+            total = count * n
+            start = reader.position % self.capacity
+            reader.position += total
+            if not self.backend.realtime:
+                self._data_ready.notify_all()
+            if start + total <= self.capacity:
+                block = self._ring[start : start + total].reshape(count, n)
+                return block.copy() if at_risk else block
+            if reader._scratch is None or len(reader._scratch) < total:
+                reader._scratch = np.empty(total, dtype=np.int16)
+            scratch = reader._scratch[:total]
+            first = self.capacity - start
+            scratch[:first] = self._ring[start:]
+            scratch[first:] = self._ring[: total - first]
+            return scratch.reshape(count, n)
@@ -0,0 +1,109 @@
+﻿import collections
+import re
+
+import numpy as np
+
+from audio.metrics import LatencyStats
+
+QUESTION_START = re.compile(
+    r"^(what|who|whom|whose|when|where|why|how|which|is|are|am|can|could|will|would|should|do|does|did|tell me)\b"
+)
+
+# (pause percentile, slope factor, transcript factor) per aggressiveness 1..3
+_PROFILES = {
+    1: (95, 0.85, 0.75),
+    2: (90, 0.75, 0.6),
+    3: (80, 0.65, 0.5),
+}
+
+
+class Endpointer:
+    # Decides when a user turn is over. Learns how long this speaker pauses
+    # mid-sentence, then waits a little longer than that instead of the fixed
+    # silence_ms. A falling energy slope into the pause (sentence-final
+    # declination) or a partial transcript that already reads as a complete
+    # sentence shortens the wait further. Aggressiveness 0 keeps silence_ms.
+    def __init__(self, aggressiveness=1, frame_ms=30, min_silence_ms=240, margin_ms=90, min_pauses=6):
+        self.aggressiveness = int(aggressiveness)
+        self.frame_ms = frame_ms
+        self.min_silence_ms = min_silence_ms
+        self.margin_ms = margin_ms
+        self.min_pauses = min_pauses
+        self.pauses = collections.deque(maxlen=200)
+        self.latency = LatencyStats()
+        self.endpoints = 0
+        self.early_endpoints = 0
+        self.silence_ms = 800
+        self._energies = collections.deque(maxlen=12)
+        self._pause_ms = 0
+        self._slope = 0.0
+        self._partial_text = ""
+
+    def begin(self, silence_ms):
+        self.silence_ms = silence_ms
+        self._energies.clear()
+        self._pause_ms = 0
+        self._slope = 0.0
+        self._partial_text = ""
+
+    def set_partial_text(self, text):
+        self._partial_text = (text or "").strip()
+
+    def learned_pause_ms(self):
+        if self.aggressiveness <= 0 or len(self.pauses) < self.min_pauses:
+            return None
+        pct = _PROFILES.get(self.aggressiveness, _PROFILES[3])[0]
+        return float(np.percentile(np.fromiter(self.pauses, dtype=np.float64), pct))
+
+    def threshold_ms(self):
+        if self.aggressiveness <= 0:
+            return self.silence_ms
+        _pct, slope_factor, text_factor = _PROFILES.get(self.aggressiveness, _PROFILES[3])
+        learned = self.learned_pause_ms()
+        threshold = self.silence_ms if learned is None else learned + self.margin_ms
+        if self._slope < -1.0:
+            threshold *= slope_factor
+        if self._sounds_complete():
+            threshold *= text_factor
+        return max(self.min_silence_ms, min(self.silence_ms, threshold))
+
+    def update(self, speech, energy_db, can_end=True):
+        if speech:
+            if self._pause_ms >= 2 * self.frame_ms:
+                # The speaker carried on, so this silence was a mid-turn pause
+                self.pauses.append(self._pause_ms)
+            self._pause_ms = 0
+            self._energies.append(energy_db)
+            return False
+        if self._pause_ms == 0:
+            self._slope = self._trailing_slope()
+        self._pause_ms += self.frame_ms
+        if not can_end or self._pause_ms < self.threshold_ms():
+            return False
+        self.endpoints += 1
+        if self._pause_ms < self.silence_ms:
+            self.early_endpoints += 1
+        self.latency.add(self._pause_ms)
+        return True
+
+    def _trailing_slope(self):
+        if len(self._energies) < 4:
+            return 0.0
+        y = np.fromiter(self._energies, dtype=np.float64)
+        return float(np.polyfit(np.arange(len(y)), y, 1)[0])
+
+    def _sounds_complete(self):
+        text = self._partial_text.lower()
+        if len(text.split()) < 3:
+            return False
+        if text.endswith("?"):
+            return True
+        return text.endswith((".", "!")) and QUESTION_START.match(text) is not None
+
+    def metrics(self):
+        summary = self.latency.summary()
+        summary["endpoints"] = self.endpoints
+        summary["early_endpoints"] = self.early_endpoints
+        learned = self.learned_pause_ms()
+        summary["learned_pause_ms"] = None if learned is None else round(learned, 1)
+        return summary
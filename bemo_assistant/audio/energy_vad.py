@@ -0,0 +1,82 @@
+﻿import numpy as np
+
+# (SNR margin in dB, max spectral flatness) per webrtcvad-style aggressiveness 0..3
+_PROFILES = {
+    0: (5.0, 0.60),
+    1: (7.0, 0.55),
+    2: (9.0, 0.50),
+    3: (12.0, 0.45),
+}
+
+
+class EnergyVAD:
+    # Fallback VAD for machines without webrtcvad. Frames are scored in blocks
+    # with numpy: speech-band energy against a running noise floor, spectral
+    # flatness (noise is flat, voiced speech is peaky) and zero-crossing rate
+    # (hiss crosses zero far more often than speech).
+    def __init__(self, sample_rate=16000, frame_samples=480, aggressiveness=2, calibration_ms=500):
+        self.sample_rate = sample_rate
+        self.frame_samples = frame_samples
+        self.margin_db, self.max_flatness = _PROFILES.get(int(aggressiveness), _PROFILES[2])
+        self.max_zcr = 0.35
+        self.noise_floor = None
+        self.calibration_frames = max(1, int(calibration_ms / (1000 * frame_samples / sample_rate)))
+        self._calibration = []
+        self._window = np.hanning(frame_samples).astype(np.float32)
+        freqs = np.fft.rfftfreq(frame_samples, 1.0 / sample_rate)
+        self._band = (freqs >= 250) & (freqs <= 3800)
+
+    @property
+    def calibrated(self):
+        return self.noise_floor is not None
+
+    def features(self, frames):
+        x = frames.astype(np.float32)
+        x *= 1.0 / 32768.0
+        power = np.abs(np.fft.rfft(x * self._window, axis=1)) ** 2
+        band = power[:, self._band] + 1e-12
+        band_db = 10.0 * np.log10(np.mean(band, axis=1))
+        flatness = np.exp(np.mean(np.log(band), axis=1)) / np.mean(band, axis=1)
+        signs = np.signbit(x)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (x.shape[1] - 1)
+        return band_db, flatness, zcr
+
+    def calibrate(self, samples):
+        n = len(samples) // self.frame_samples
+        if n == 0:
+            return
+        frames = np.asarray(samples[: n * self.frame_samples]).reshape(n, self.frame_samples)
+        band_db, _flatness, _zcr = self.features(frames)
+        # A low percentile stays on the noise even if some speech is in the window
+        self.noise_floor = float(np.percentile(band_db, 20))
+        self._calibration = []
+
+    def classify(self, frames):
+        frames = np.asarray(frames).reshape(-1, self.frame_samples)
+        band_db, flatness, zcr = self.features(frames)
+
+        if self.noise_floor is None:
+            self._calibration.extend(band_db.tolist())
+            if len(self._calibration) < self.calibration_frames:
+                return np.zeros(len(frames), dtype=bool)
+            self.noise_floor = float(np.percentile(self._calibration, 20))
+            self._calibration = []
+
+        snr = band_db - self.noise_floor
+        loud = snr > 2 * self.margin_db
+        speech = (snr > self.margin_db) & ((flatness < self.max_flatness) | loud) & ((zcr < self.max_zcr) | loud)
+        self._track_floor(band_db, speech)
+        return speech
+
+    def _track_floor(self, band_db, speech):
+        # Fall quickly when it gets quieter, rise slowly on non-speech, and creep
+        # up even during "speech" so a fan switching on cannot latch the VAD open.
+        floor = self.noise_floor
+        for db, is_speech in zip(band_db.tolist(), speech.tolist()):
+            if db < floor:
+                floor += 0.2 * (db - floor)
+            elif is_speech:
+                floor += 0.002 * (db - floor)
+            else:
+                floor += 0.03 * (db - floor)
+        self.noise_floor = floor
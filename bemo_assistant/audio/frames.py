@@ -0,0 +1,52 @@
+﻿import collections
+import threading
+
+
+class FrameQueue:
+    # Bounded hand-off between a PortAudio callback and a consumer thread.
+    # put() never blocks (it runs on the audio thread); when the consumer falls
+    # behind the oldest frame is dropped and counted.
+    def __init__(self, maxlen=100):
+        self.maxlen = maxlen
+        self.dropped = 0
+        self.delivered = 0
+        self._frames = collections.deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def put(self, frame):
+        with self._cond:
+            if len(self._frames) >= self.maxlen:
+                self._frames.popleft()
+                self.dropped += 1
+            self._frames.append(frame)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        with self._cond:
+            if not self._frames and not self._closed:
+                self._cond.wait_for(lambda: self._frames or self._closed, timeout)
+            if not self._frames:
+                return None
+            self.delivered += 1
+            return self._frames.popleft()
+
+    def drain(self):
+        with self._cond:
+            frames = list(self._frames)
+            self._frames.clear()
+            self.delivered += len(frames)
+        return frames
+
+    def clear(self):
+        with self._cond:
+            self._frames.clear()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._frames)
+
@@ -0,0 +1,225 @@
+﻿import logging
+import time
+from pathlib import Path
+
+import numpy as np
+
+from audio.backends import load_wav
+from audio.buffers import UtteranceBuffer
+
+LOG = logging.getLogger("bemo.audio")
+
+_MEL_CACHE = {}
+
+
+def _mel_filterbank(sample_rate, n_fft, n_mels):
+    key = (sample_rate, n_fft, n_mels)
+    if key in _MEL_CACHE:
+        return _MEL_CACHE[key]
+
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10 ** (mel / 2595.0) - 1.0)
+
+    mels = np.linspace(hz_to_mel(80.0), hz_to_mel(min(7600.0, sample_rate / 2)), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mels) / sample_rate).astype(int)
+    fb = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        if center > left:
+            fb[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            fb[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+    n = np.arange(n_mels)
+    dct = np.cos(np.pi / n_mels * (n[None, :] + 0.5) * np.arange(n_mels)[:, None]).astype(np.float32)
+    _MEL_CACHE[key] = (fb, dct)
+    return fb, dct
+
+
+def mfcc(audio, sample_rate=16000, n_mfcc=13, n_mels=26, win_ms=25, hop_ms=10, trim_db=None, floor_db=30):
+    x = np.asarray(audio, dtype=np.float32) / 32768.0
+    win = int(sample_rate * win_ms / 1000)
+    hop = int(sample_rate * hop_ms / 1000)
+    if len(x) < win:
+        return np.zeros((0, n_mfcc - 1), dtype=np.float32)
+    x = np.append(x[0], x[1:] - 0.97 * x[:-1])
+    count = 1 + (len(x) - win) // hop
+    frames = np.lib.stride_tricks.as_strided(x, shape=(count, win), strides=(x.strides[0] * hop, x.strides[0]))
+    n_fft = 1 << (win - 1).bit_length()
+    power = np.abs(np.fft.rfft(frames * np.hamming(win).astype(np.float32), n=n_fft, axis=1)) ** 2
+    fb, dct = _mel_filterbank(sample_rate, n_fft, n_mels)
+    mel = power @ fb.T
+    # Clamp to floor_db below the loudest band so digital silence and faint
+    # background noise map to the same features
+    logmel = np.log(np.maximum(mel, mel.max() * 10 ** (-floor_db / 10) + 1e-12))
+    if trim_db is not None:
+        energy = logmel.sum(axis=1) / n_mels
+        loud = np.flatnonzero(energy > energy.max() - trim_db / 10 * np.log(10))
+        logmel = logmel[loud[0] : loud[-1] + 1]
+    # c0 only tracks loudness, so it is dropped to make matching level independent
+    return logmel @ dct[1:n_mfcc].T
+
+
+def subsequence_dtw(template, window):
+    # Best match of the whole template anywhere inside the window. Steps are
+    # (1,0), (1,1) and (1,2) so every template row depends only on the row
+    # before it and the recursion vectorizes over the window.
+    if len(window) == 0 or len(template) == 0:
+        return np.inf
+    cost = np.sqrt(((template[:, None, :] - window[None, :, :]) ** 2).sum(axis=2)) / np.sqrt(template.shape[1])
+    acc = cost[0].copy()
+    for i in range(1, len(template)):
+        prev = acc
+        best = prev.copy()
+        best[1:] = np.minimum(best[1:], prev[:-1])
+        best[2:] = np.minimum(best[2:], prev[:-2])
+        acc = cost[i] + best
+    return float(acc.min() / len(template))
+
+
+class KeywordSpotter:
+    # Cheap "Hey Bemo" front end: MFCC features of the last couple of seconds
+    # are matched against a few enrolled recordings with DTW. Only windows
+    # that look like the wake phrase are handed on to Whisper. Templates may
+    # carry labels to spot a small vocabulary instead of one phrase.
+    def __init__(
+        self, templates, sample_rate=16000, threshold=0.0, hop_ms=90, feature_hop_ms=20, labels=None, floor_db=30
+    ):
+        self.sample_rate = sample_rate
+        self.feature_hop_ms = feature_hop_ms
+        self.floor_db = floor_db
+        labels = list(labels) if labels is not None else [None] * len(templates)
+        features = [(self._features(t, trim_db=30), label) for t, label in zip(templates, labels) if len(t)]
+        features = [(f, label) for f, label in features if len(f)]
+        self.templates = [f for f, _label in features]
+        self.labels = [label for _f, label in features]
+        self.label = None
+        self.cost = None
+        longest = max((len(t) for t in self.templates), default=50) * feature_hop_ms
+        self.window_samples = int(longest * 1.4 * sample_rate / 1000)
+        self.hop_samples = int(sample_rate * hop_ms / 1000)
+        self.threshold = threshold or self._auto_threshold()
+        self._audio = UtteranceBuffer(2 * self.window_samples)
+        self._since_check = 0
+        self._refractory = 0
+        self._quiet = self.window_samples
+        self.frames = 0
+        self.checks = 0
+        self.candidates = 0
+        self.cpu_seconds = 0.0
+
+    @classmethod
+    def from_directory(cls, path, sample_rate=16000, threshold=0.0):
+        files = sorted(Path(path).glob("*.wav")) if path and Path(path).is_dir() else []
+        if not files:
+            return None
+        templates = [load_wav(f, sample_rate) for f in files]
+        spotter = cls(templates, sample_rate=sample_rate, threshold=threshold)
+        if not spotter.templates:
+            return None
+        LOG.info("Keyword spotter: %d templates, threshold %.3f", len(spotter.templates), spotter.threshold)
+        return spotter
+
+    @classmethod
+    def from_vocabulary(cls, path, words, sample_rate=16000, threshold=0.0, hop_ms=90, floor_db=30):
+        # One sub-directory of WAVs per word, e.g. <path>/stop/*.wav
+        root = Path(path) if path else None
+        templates = []
+        labels = []
+        for word in words:
+            folder = root / word if root else None
+            if folder is None or not folder.is_dir():
+                continue
+            for f in sorted(folder.glob("*.wav")):
+                templates.append(load_wav(f, sample_rate))
+                labels.append(word)
+        if not templates:
+            return None
+        spotter = cls(
+            templates, sample_rate=sample_rate, threshold=threshold, hop_ms=hop_ms, labels=labels, floor_db=floor_db
+        )
+        if not spotter.templates:
+            return None
+        LOG.info(
+            "Keyword spotter: %s, threshold %.3f", ", ".join(sorted(set(spotter.labels))), spotter.threshold
+        )
+        return spotter
+
+    def _auto_threshold(self):
+        # Enrolled samples of the same phrase should match each other; allow a
+        # margin above their worst mutual distance.
+        costs = [
+            subsequence_dtw(a, b)
+            for i, a in enumerate(self.templates)
+            for j, b in enumerate(self.templates)
+            if i != j and self.labels[i] == self.labels[j] and len(b) >= len(a) // 2
+        ]
+        return float(max(costs) * 1.25) if costs else 0.9
+
+    @property
+    def ready(self):
+        return len(self._audio) >= self.window_samples // 2
+
+    def reset(self):
+        self._audio.clear()
+        self._since_check = 0
+        self._refractory = 0
+        self._quiet = self.window_samples
+
+    def _features(self, audio, trim_db=None):
+        return mfcc(audio, self.sample_rate, hop_ms=self.feature_hop_ms, trim_db=trim_db, floor_db=self.floor_db)
+
+    def match(self, audio):
+        # Best (label, cost) over all templates
+        feats = self._features(audio)
+        costs = [subsequence_dtw(t, feats) for t in self.templates]
+        best = int(np.argmin(costs))
+        return self.labels[best], costs[best]
+
+    def score(self, audio):
+        return self.match(audio)[1]
+
+    def push(self, frames, speech=True):
+        # Returns the candidate window (int16 copy) when the recent audio
+        # looks like the wake phrase, otherwise None. Frames may be views into
+        # the bus ring; they are copied into the spotter's own buffer.
+        count = 0
+        for frame in frames:
+            self._audio.append(frame)
+            count += len(frame)
+        self.frames += len(frames)
+        self._since_check += count
+        self._quiet = 0 if speech else self._quiet + count
+        self._audio.keep_last(self.window_samples)
+        if self._refractory > 0:
+            self._refractory -= count
+            return None
+        # Keep matching for a moment after speech stops so the window can
+        # contain the whole phrase, but skip the DTW in steady silence.
+        if self._quiet > self.window_samples // 4:
+            return None
+        if self._since_check < self.hop_samples or not self.ready:
+            return None
+        self._since_check = 0
+        start = time.thread_time()
+        window = np.array(self._audio.view()[-self.window_samples :])
+        label, cost = self.match(window)
+        self.cpu_seconds += time.thread_time() - start
+        self.checks += 1
+        self.cost = cost
+        self.label = label
+        if cost > self.threshold:
+            return None
+        self.candidates += 1
+        self._refractory = self.window_samples
+        return window
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "checks": self.checks,
+            "candidates": self.candidates,
+            "cpu_ms": round(self.cpu_seconds * 1000, 1),
+        }
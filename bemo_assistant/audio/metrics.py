@@ -0,0 +1,44 @@
+﻿import collections
+import threading
+
+import numpy as np
+
+
+class LatencyStats:
+    # Rolling window of latency samples (milliseconds) with cheap summaries.
+    def __init__(self, maxlen=500):
+        self._values = collections.deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def add(self, value_ms):
+        with self._lock:
+            self._values.append(float(value_ms))
+            self.total += 1
+
+    def __len__(self):
+        return len(self._values)
+
+    def values(self):
+        with self._lock:
+            return list(self._values)
+
+    def percentile(self, pct):
+        with self._lock:
+            if not self._values:
+                return 0.0
+            return float(np.percentile(np.fromiter(self._values, dtype=np.float64), pct))
+
+    def mean(self):
+        with self._lock:
+            if not self._values:
+                return 0.0
+            return float(sum(self._values) / len(self._values))
+
+    def summary(self):
+        return {
+            "count": self.total,
+            "mean_ms": round(self.mean(), 1),
+            "p50_ms": round(self.percentile(50), 1),
+            "p95_ms": round(self.percentile(95), 1),
+        }
@@ -0,0 +1,183 @@
+﻿import collections
+import contextlib
+import logging
+import threading
+import time
+
+LOG = logging.getLogger("bemo.audio")
+
+# Parameter counts (millions) of the Whisper checkpoints faster-whisper ships
+_PARAMS_M = {
+    "tiny": 39,
+    "base": 74,
+    "small": 244,
+    "medium": 769,
+    "large": 1550,
+    "turbo": 809,
+    "distil-small": 166,
+    "distil-medium": 394,
+    "distil-large": 756,
+}
+_BYTES_PER_PARAM = {"int8": 1.0, "int8_float16": 1.0, "int8_float32": 1.0, "float16": 2.0, "bfloat16": 2.0}
+
+
+def estimate_mb(name, compute_type="int8"):
+    # Rough resident size: weights plus ~30% for runtime buffers. Unknown
+    # names (local paths, custom conversions) are assumed to be "small".
+    base = name.rsplit("/", 1)[-1].lower().replace("faster-whisper-", "")
+    params = _PARAMS_M["small"]
+    for key in sorted(_PARAMS_M, key=len, reverse=True):
+        if base.startswith(key):
+            params = _PARAMS_M[key]
+            break
+    return params * _BYTES_PER_PARAM.get(compute_type, 4.0) * 1.3
+
+
+class ModelPool:
+    # Loaded models keyed by (name, device, compute_type). The least recently
+    # used entries are dropped once the estimated total passes budget_mb; the
+    # model just loaded is always kept, so a single oversized model still works.
+    # Keys with references (pin() or an open lease()) are never evicted.
+    def __init__(self, loader, budget_mb=1024, estimate=estimate_mb):
+        self.loader = loader
+        self.budget_mb = budget_mb
+        self.estimate = estimate
+        self._models = collections.OrderedDict()
+        self._loading = {}
+        self._refs = collections.Counter()
+        self._lock = threading.Lock()
+        self.load_seconds = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._models
+
+    def keys(self):
+        with self._lock:
+            return list(self._models)
+
+    def get(self, name, device="cpu", compute_type="int8"):
+        key = (name, device, compute_type)
+        while True:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    self.hits += 1
+                    return self._models[key]
+                pending = self._loading.get(key)
+                if pending is None:
+                    pending = self._loading[key] = threading.Event()
+                    self.misses += 1
+                    break
+            # Someone else (usually the warm-up thread) is loading it already.
+            # If their load failed the next pass tries again and raises here.
+            pending.wait()
+        try:
+            start = time.perf_counter()
+            model = self.loader(name, device, compute_type)
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._models[key] = model
+                self.load_seconds[key] = elapsed
+                self._evict(keep=key)
+            LOG.info("Loaded STT model %s (%s, %s) in %.2f s", name, device, compute_type, elapsed)
+            return model
+        finally:
+            with self._lock:
+                self._loading.pop(key).set()
+
+    def pin(self, key):
+        with self._lock:
+            self._refs[key] += 1
+
+    def unpin(self, key, drop=False):
+        # With drop, the model is unloaded as soon as nobody references it
+        with self._lock:
+            self._refs[key] -= 1
+            if self._refs[key] <= 0:
+                del self._refs[key]
+                if drop and key in self._models:
+                    del self._models[key]
+                    LOG.info("Released STT model %s (%s, %s)", *key)
+
+    def refs(self, key):
+        with self._lock:
+            return self._refs[key]
+
+    @contextlib.contextmanager
+    def lease(self, name, device="cpu", compute_type="int8", drop=False):
+        key = (name, device, compute_type)
+        self.pin(key)
+        try:
+            yield self.get(name, device, compute_type)
+        finally:
+            self.unpin(key, drop=drop)
+
+    def _evict(self, keep):
+        while self._total_mb() > self.budget_mb:
+            key = next((k for k in self._models if k != keep and not self._refs[k]), None)
+            if key is None:
+                return
+            del self._models[key]
+            self.evictions += 1
+            LOG.info("Evicted STT model %s (%s, %s) to stay under %d MB", *key, self.budget_mb)
+
+    def _total_mb(self):
+        return sum(self.estimate(name, compute_type) for name, _device, compute_type in self._models)
+
+    def retain(self, predicate):
+        # Drop every unreferenced entry whose key fails predicate(key)
+        with self._lock:
+            for key in [k for k in self._models if not predicate(k) and not self._refs[k]]:
+                del self._models[key]
+
+    def preload(self, keys):
+        # Load in the background so the first wake word / question doesn't pay for it
+        def worker():
+            for key in keys:
+                try:
+                    self.get(*key)
+                except Exception:
+                    LOG.exception("Preloading STT model %s failed", key[0])
+
+        thread = threading.Thread(target=worker, name="stt-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        with self._lock:
+            return {
+                "models": [
+                    {
+                        "name": name,
+                        "device": device,
+                        "compute_type": compute_type,
+                        "load_s": round(self.load_seconds.get((name, device, compute_type), 0.0), 2),
+                        "estimated_mb": round(self.estimate(name, compute_type)),
+                        "refs": self._refs[(name, device, compute_type)],
+                    }
+                    for name, device, compute_type in self._models
+                ],
+                "estimated_mb": round(self._total_mb()),
+                "budget_mb": self.budget_mb,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_SHARED = None
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_pool(loader):
+    # One pool per process, so the assistant, wake word and the Settings STT
+    # test all draw on the same loaded models
+    global _SHARED
+    with _SHARED_LOCK:
+        if _SHARED is None:
+            _SHARED = ModelPool(loader)
+        return _SHARED
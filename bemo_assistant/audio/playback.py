@@ -1,19 +1,94 @@
-﻿import time
+﻿import collections
+import threading
+import time
 import wave
 import numpy as np
-import sounddevice as sd
+
+from audio.backends import default_backend
+
+
+class _Resampler:
+    # Linear interpolation to the output rate; the fractional read position
+    # and the previous chunk's last frame carry over, so a clip that arrives
+    # in chunks resamples without clicks at the chunk boundaries
+    def __init__(self, src_rate, dst_rate, channels):
+        self.step = src_rate / dst_rate
+        self._phase = 0.0
+        self._last = np.zeros((1, channels), dtype=np.float32)
+
+    def process(self, block):
+        positions = np.arange(self._phase, len(block) - 1 + 1e-9, self.step)
+        source = np.concatenate([self._last, block])
+        index = np.arange(len(source))
+        out = np.empty((len(positions), block.shape[1]), dtype=np.float32)
+        for ch in range(block.shape[1]):
+            out[:, ch] = np.interp(positions + 1, index, source[:, ch])
+        self._phase = (positions[-1] + self.step if len(positions) else self._phase) - len(block)
+        self._last = block[-1:]
+        return out
 
 
 class AudioPlayer:
-    def __init__(self):
+    # One output stream stays open once the first clip plays, so a reply
+    # doesn't wait for the device to open and clips queued back to back play
+    # without gaps. Between clips the stream plays silence.
+    def __init__(self, backend=None, echo_reference=None):
+        self.backend = backend
+        self.echo_reference = echo_reference
         self._stream = None
+        self._stream_key = None  # (device, rate, channels)
+        self._latency = 0.0
+        self._handed_at = 0.0
+        self._lock = threading.Lock()
+        # Notified by the output callback as frames are handed over, and by flush()
+        self._played_cond = threading.Condition(self._lock)
+        self._pending = collections.deque()  # (float32 frames, on_amplitude)
+        self._offset = 0
+        self._queued = 0  # frames ever queued
+        self._played = 0  # frames ever handed to the device (flushed ones count as played)
+        self._producers = 0
+        self._generation = 0
+        self._starved = False
+        self.first_sample_at = None
+        self.underruns = 0
+        self.device_underflows = 0
+
+    @property
+    def sample_rate(self):
+        return self._stream_key[1] if self._stream_key else None
 
     def stop(self):
-        if self._stream:
+        self.flush()
+
+    def flush(self):
+        # Drops everything queued; the next block is silence
+        with self._lock:
+            self._pending.clear()
+            self._offset = 0
+            self._played = self._queued
+            self._generation += 1
+            self._starved = False
+            self._played_cond.notify_all()
+
+    def close(self):
+        self.flush()
+        if self._stream is not None:
             try:
-                self._stream.abort(ignore_errors=True)
+                self._stream.__exit__(None, None, None)
             except Exception:
                 pass
+            self._stream = None
+            self._stream_key = None
+
+    def stats(self):
+        with self._lock:
+            queued = self._queued - self._played
+        rate = self.sample_rate or 1
+        return {
+            "underruns": self.underruns,
+            "device_underflows": self.device_underflows,
+            "queued_ms": round(queued * 1000 / rate),
+        }
 
     def play_wav(self, path, device=None, on_amplitude=None, stop_event=None):
         with wave.open(path, "rb") as wf:
@@ -22,47 +97,175 @@ class AudioPlayer:
             frames = wf.getnframes()
             audio = wf.readframes(frames)
         data = np.frombuffer(audio, dtype=np.int16)
-        if channels > 1:
-            data = data.reshape(-1, channels)
-        else:
-            data = data.reshape(-1, 1)
-        # Convert to float32 for smoother playback and better device compatibility
-        data = data.astype(np.float32) / 32768.0
+        self.play_pcm(data, samplerate, channels, device=device, on_amplitude=on_amplitude, stop_event=stop_event)
 
-        # Use a slightly larger blocksize and higher latency to reduce glitches
-        blocksize = int(samplerate * 0.02)
-        blocksize = max(256, min(4096, blocksize))
+    def play_pcm(self, data, samplerate, channels=1, device=None, on_amplitude=None, stop_event=None, wait=True):
+        # data: int16 samples (interleaved if channels > 1)
+        self.play_stream(
+            [data], samplerate, channels, device=device, on_amplitude=on_amplitude, stop_event=stop_event, wait=wait
+        )
+
+    def play_stream(
+        self, chunks, samplerate, channels=1, device=None, on_amplitude=None, stop_event=None, wait=True
+    ):
+        # Queues int16 chunks as they arrive (e.g. from a synthesizer). With
+        # wait=False it returns once the last chunk is queued, so the next
+        # clip can be queued behind it; drain() then waits for the speaker.
+        # A chunk that is late plays as a short silence and counts as an
+        # underrun.
+        resampler = None
+        registered = counted = False
+        generation = None
+        try:
+            for data in chunks:
+                if stop_event and stop_event.is_set():
+                    break
+                if not len(data):
+                    continue
+                # Convert to float32 for smoother playback and better device compatibility
+                data = np.asarray(data, dtype=np.int16).reshape(-1, channels).astype(np.float32) / 32768.0
+                if not registered:
+                    rate, out_channels = self._ensure_stream(device, samplerate, channels)
+                    if rate != samplerate:
+                        resampler = _Resampler(samplerate, rate, channels)
+                    generation = self._begin_clip()
+                    registered = True
+                if resampler is not None:
+                    data = resampler.process(data)
+                if channels != out_channels:
+                    data = np.repeat(data.mean(axis=1, keepdims=True), out_channels, axis=1)
+                with self._lock:
+                    if self._generation != generation:
+                        # Flushed by stop()
+                        break
+                    if not counted:
+                        # Until now an empty queue was a wait for the first chunk, not an underrun
+                        self._producers += 1
+                        counted = True
+                    self._pending.append((data, on_amplitude))
+                    self._queued += len(data)
+        finally:
+            if counted:
+                with self._lock:
+                    self._producers -= 1
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                # Stops a synthesizer that is still producing
+                close()
+        if stop_event and stop_event.is_set():
+            self.flush()
+        elif wait:
+            self.drain(stop_event)
 
-        idx = 0
+    def drain(self, stop_event=None):
+        # Waits until everything queued so far has been heard: handed to the
+        # device, then the device's output latency on top
+        with self._played_cond:
+            target = self._queued
+            generation = self._generation
 
-        def callback(outdata, frame_count, time_info, status):
-            nonlocal idx
-            if stop_event and stop_event.is_set():
-                raise sd.CallbackStop()
-            chunk = data[idx : idx + frame_count]
-            if len(chunk) < frame_count:
-                outdata[: len(chunk)] = chunk
-                outdata[len(chunk) :] = 0
-                raise sd.CallbackStop()
-            outdata[:] = chunk
-            idx += frame_count
-            if on_amplitude:
-                rms = float(np.sqrt(np.mean(chunk * chunk)))
-                on_amplitude(float(rms))
+            def handed():
+                return self._played >= target or self._generation != generation or self._stream is None
 
-        self._stream = sd.OutputStream(
-            samplerate=samplerate,
+            # The timeout only bounds how late a stop_event nobody flushed for is noticed
+            while not self._played_cond.wait_for(handed, timeout=0.1):
+                if stop_event and stop_event.is_set():
+                    break
+            else:
+                # The last block handed over is still in the device's buffer
+                remaining = self._handed_at + self._latency - time.perf_counter()
+                if self._generation == generation and remaining > 0:
+                    self._played_cond.wait_for(lambda: self._generation != generation, timeout=remaining)
+                return
+        self.flush()
+
+    def _begin_clip(self):
+        with self._lock:
+            idle = not self._pending and self._producers == 0
+            if idle:
+                # A new utterance rather than the next clip of the current one
+                self.first_sample_at = None
+                self._starved = False
+            generation = self._generation
+        if idle and self.echo_reference is not None:
+            self.echo_reference.begin(self._latency)
+        return generation
+
+    def _ensure_stream(self, device, samplerate, channels):
+        device = device if device else None
+        if self._stream is not None and self._stream_key[0] == device:
+            return self._stream_key[1], self._stream_key[2]
+        self.close()
+        backend = self.backend or default_backend()
+        rate = samplerate
+        default_rate = getattr(backend, "default_output_rate", None)
+        if default_rate is not None:
+            # The device's own rate; anything else is resampled here
+            rate = default_rate(device) or samplerate
+
+        # Use a slightly larger blocksize and higher latency to reduce glitches
+        blocksize = int(rate * 0.02)
+        blocksize = max(256, min(4096, blocksize))
+
+        stream = backend.output_stream(
+            samplerate=rate,
             channels=channels,
             dtype="float32",
             blocksize=blocksize,
             latency="high",
-            callback=callback,
-            device=device if device else None,
+            callback=self._make_callback(rate, backend),
+            device=device,
         )
+        latency = getattr(stream, "latency", 0.0)
+        self._latency = latency if isinstance(latency, (int, float)) else 0.0
+        stream.__enter__()
+        self._stream = stream
+        self._stream_key = (device, rate, channels)
+        return rate, channels
 
-        with self._stream:
-            while self._stream.active:
-                if stop_event and stop_event.is_set():
-                    break
-                time.sleep(0.01)
-        self._stream = None
+    def _make_callback(self, samplerate, backend):
+        echo = self.echo_reference
+        capture = getattr(backend, "capture", None)
+
+        def callback(outdata, frame_count, time_info, status):
+            if getattr(status, "output_underflow", False):
+                self.device_underflows += 1
+            filled = 0
+            on_amplitude = None
+            with self._lock:
+                while filled < frame_count and self._pending:
+                    chunk, on_amplitude = self._pending[0]
+                    take = min(len(chunk) - self._offset, frame_count - filled)
+                    outdata[filled : filled + take] = chunk[self._offset : self._offset + take]
+                    filled += take
+                    self._offset += take
+                    if self._offset == len(chunk):
+                        self._pending.popleft()
+                        self._offset = 0
+                self._played += filled
+                playing = filled > 0 or self._producers > 0
+                if filled < frame_count and self._producers > 0:
+                    if not self._starved:
+                        self.underruns += 1
+                        self._starved = True
+                elif filled:
+                    self._starved = False
+                if filled and self.first_sample_at is None:
+                    self.first_sample_at = time.perf_counter()
+                if filled:
+                    self._handed_at = time.perf_counter()
+                    self._played_cond.notify_all()
+            outdata[filled:] = 0
+            if not playing:
+                return
+            if capture is not None:
+                # Headless backends record what is played, but not the idle stream
+                capture(outdata, samplerate)
+            if echo is not None:
+                # The echo canceller needs exactly what the speaker plays
+                echo.feed(outdata, samplerate)
+            if on_amplitude:
+                rms = float(np.sqrt(np.mean(outdata * outdata)))
+                on_amplitude(float(rms))
+
+        return callback
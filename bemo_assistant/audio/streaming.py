@@ -0,0 +1,137 @@
+﻿import logging
+import re
+import threading
+import time
+
+import numpy as np
+
+from audio.buffers import UtteranceBuffer
+
+LOG = logging.getLogger("bemo.audio")
+
+
+def _norm(word):
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+class StreamingTranscriber:
+    # Decodes the utterance while it is still being recorded. Every step the
+    # not-yet-committed tail is transcribed again; words that two consecutive
+    # passes agree on are committed (LocalAgreement) and the audio before them
+    # is dropped, so at the endpoint only the last second or so is left to
+    # decode. Committed text is passed as the prompt for the tail.
+    def __init__(self, stt, sample_rate=16000, language="en", model=None, step_ms=1000, on_partial=None):
+        self.stt = stt
+        self.sample_rate = sample_rate
+        self.language = language
+        self.model = model
+        self.step_samples = int(sample_rate * step_ms / 1000)
+        self.on_partial = on_partial
+        self._audio = UtteranceBuffer(sample_rate * 4)
+        self._offset = 0  # utterance sample index of _audio[0]
+        self._fed = 0
+        self._decoded = 0
+        self._committed = []
+        self._hypothesis = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closing = False
+        self._thread = None
+        self.failed = False
+        self.passes = 0
+        self.decode_seconds = 0.0
+        self.tail_seconds = 0.0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stt-stream", daemon=True)
+        self._thread.start()
+        return self
+
+    def feed(self, samples):
+        with self._lock:
+            self._audio.append(samples)
+            self._fed += len(samples)
+            if self._fed - self._decoded >= self.step_samples:
+                self._wake.set()
+
+    def committed_text(self):
+        return "".join(w for _s, _e, w in self._committed).strip()
+
+    def partial_text(self):
+        return "".join(w for _s, _e, w in self._committed + self._hypothesis).strip()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self._closing:
+                return
+            try:
+                self._step()
+            except Exception:
+                LOG.exception("Streaming transcription failed")
+                self.failed = True
+                return
+            if self.on_partial is not None:
+                self.on_partial(self.partial_text())
+
+    def _snapshot(self):
+        with self._lock:
+            self._decoded = self._fed
+            return np.array(self._audio.view()), self._offset
+
+    def _decode(self, audio, offset):
+        start = time.perf_counter()
+        words = self.stt.transcribe_words(
+            audio,
+            self.sample_rate,
+            model_override=self.model,
+            language=self.language,
+            prompt=self.committed_text()[-200:],
+        )
+        self.decode_seconds += time.perf_counter() - start
+        self.passes += 1
+        base = offset / self.sample_rate
+        committed_end = self._committed[-1][1] if self._committed else 0.0
+        # Skip anything the previous cut left a sliver of
+        words = [(base + s, base + e, w) for s, e, w in words]
+        return [w for w in words if (w[0] + w[1]) / 2 > committed_end]
+
+    def _step(self):
+        audio, offset = self._snapshot()
+        words = self._decode(audio, offset)
+        agreed = 0
+        for new, old in zip(words, self._hypothesis):
+            if _norm(new[2]) != _norm(old[2]):
+                break
+            agreed += 1
+        self._committed.extend(words[:agreed])
+        self._hypothesis = words[agreed:]
+        if agreed:
+            # Audio up to the last committed word is never decoded again
+            cut = int(self._committed[-1][1] * self.sample_rate)
+            with self._lock:
+                drop = cut - self._offset
+                if 0 < drop < len(self._audio):
+                    self._audio.keep_last(len(self._audio) - drop, exact=True)
+                    self._offset = cut
+
+    def finish(self):
+        # Call at the endpoint: waits for a pass in flight, then decodes what is
+        # left after the committed words. None if streaming failed.
+        self._stop()
+        if self.failed:
+            return None
+        audio, offset = self._snapshot()
+        self.tail_seconds = len(audio) / self.sample_rate
+        words = self._decode(audio, offset) if len(audio) else []
+        return "".join(w for _s, _e, w in self._committed + words).strip()
+
+    def cancel(self):
+        self._stop()
+
+    def _stop(self):
+        self._closing = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -1,10 +1,49 @@
-﻿import os
+﻿import logging
+import os
 import tempfile
 import subprocess
+import threading
+import time
+from dataclasses import dataclass
+
 import numpy as np
 
+from audio.buffers import to_float32, to_int16
+from audio.metrics import LatencyStats
+from audio.model_pool import shared_pool
+from audio.stt_process import shared_worker
+from audio.vocabulary import prompt_for, snap
+from audio.whisper_server import close_servers, find_server, shared_server
+
+LOG = logging.getLogger("bemo.audio")
+
+
+@dataclass
+class TranscriptionResult:
+    text: str
+    duration: float = 0.0  # seconds of audio
+    avg_logprob: float | None = None  # lowest segment average; None if the engine doesn't report it
+    no_speech_prob: float | None = None  # highest segment value
+    model: str = ""
+    snapped: bool = False  # text was matched to an expected answer
+
+
+def load_faster_whisper(model_name, device, compute_type):
+    from faster_whisper import WhisperModel
+
+    return WhisperModel(model_name, device=device, compute_type=compute_type)
+
 
 class STTManager:
+    # Models come from the process-wide pool. A transient manager (e.g. the
+    # Settings STT test) unloads what it alone was using once it is done;
+    # models that another manager also uses stay loaded. With out_of_process
+    # faster-whisper runs in the shared STT worker process instead, which
+    # keeps the same pool on its side. With a cascade_model, turns are
+    # decoded by that (small, fast) model first and only re-decoded with
+    # model_name when it wasn't confident. When the caller knows the few
+    # valid answers (a game move), vocabulary_model decodes with them as
+    # prompt and the text is snapped to the closest one.
     def __init__(
         self,
         engine="faster-whisper",
@@ -13,6 +52,15 @@ class STTManager:
         device="cpu",
         whisper_cpp_path="",
         whisper_cpp_model="",
+        model_budget_mb=None,
+        pool=None,
+        transient=False,
+        whisper_cpp_server_path="",
+        out_of_process=False,
+        cascade_model="",
+        cascade_logprob=-0.6,
+        cascade_no_speech=0.5,
+        vocabulary_model="",
     ):
         self.engine = engine
         self.model_name = model_name
@@ -20,7 +68,22 @@ class STTManager:
         self.device = device
         self.whisper_cpp_path = whisper_cpp_path
         self.whisper_cpp_model = whisper_cpp_model
-        self._fw_models = {}
+        self.whisper_cpp_server_path = whisper_cpp_server_path
+        self.pool = pool or shared_pool(load_faster_whisper)
+        if model_budget_mb is not None:
+            self.pool.budget_mb = model_budget_mb
+        self.transient = transient
+        self.worker = shared_worker() if out_of_process else None
+        self._pinned = set()
+        self.cascade_model = cascade_model
+        self.cascade_logprob = cascade_logprob
+        self.cascade_no_speech = cascade_no_speech
+        self.cascade_turns = 0
+        self.cascade_escalations = 0
+        self.cascade_latency = {"fast": LatencyStats(), "escalated": LatencyStats()}
+        self.vocabulary_model = vocabulary_model
+        self.vocabulary_turns = 0
+        self.vocabulary_misses = 0
 
     def update_engine(
         self,
@@ -30,6 +93,9 @@ class STTManager:
         device,
         whisper_cpp_path,
         whisper_cpp_model,
+        whisper_cpp_server_path=None,
+        cascade_model=None,
+        vocabulary_model=None,
     ):
         self.engine = engine
         self.model_name = model_name
@@ -37,38 +103,194 @@ class STTManager:
         self.device = device
         self.whisper_cpp_path = whisper_cpp_path
         self.whisper_cpp_model = whisper_cpp_model
+        if whisper_cpp_server_path is not None:
+            self.whisper_cpp_server_path = whisper_cpp_server_path
+        if cascade_model is not None:
+            self.cascade_model = cascade_model
+        if vocabulary_model is not None:
+            self.vocabulary_model = vocabulary_model
+        close_servers(keep=self.server_key())
+        # Models loaded for another device/compute type would never be used again
+        self._hold({key for key in self._pinned if key[1] == device and key[2] == compute_type})
+        self.pool.retain(lambda key: key[1] == device and key[2] == compute_type)
+
+    def preload(self, model_names):
+        # Keep the given models loaded for this manager and warm them in the
+        # background (faster-whisper only)
+        if self.engine == "whisper.cpp":
+            self._hold(set())
+            key = self.server_key()
+            if key is None:
+                return None
+            thread = threading.Thread(target=self._start_server, args=(key,), name="stt-preload", daemon=True)
+            thread.start()
+            return thread
+        if self.worker is not None:
+            thread = threading.Thread(
+                target=self._remote, args=("preload",), kwargs={"model_names": list(model_names)}, daemon=True
+            )
+            thread.start()
+            return thread
+        keys = [(name, self.device, self.compute_type) for name in dict.fromkeys(model_names) if name]
+        self._hold(set(keys))
+        return self.pool.preload(keys)
 
-    def _get_faster_whisper(self, model_name):
-        if model_name in self._fw_models:
-            return self._fw_models[model_name]
-        from faster_whisper import WhisperModel
+    def _remote(self, kind, audio=None, sample_rate=16000, **kwargs):
+        config = {
+            "model_name": self.model_name,
+            "compute_type": self.compute_type,
+            "device": self.device,
+            "model_budget_mb": self.pool.budget_mb,
+            "transient": self.transient,
+        }
+        try:
+            return self.worker.call(kind, config, audio, sample_rate, **kwargs)
+        except Exception:
+            if kind != "preload":
+                raise
+            LOG.exception("Preloading STT models in the worker process failed")
+
+    def _start_server(self, key):
+        try:
+            shared_server(*key).ensure_started()
+        except Exception:
+            LOG.exception("Starting the whisper.cpp server failed")
 
-        model = WhisperModel(model_name, device=self.device, compute_type=self.compute_type)
-        self._fw_models[model_name] = model
-        return model
+    def _hold(self, keys):
+        for key in self._pinned - keys:
+            self.pool.unpin(key, drop=True)
+        for key in keys - self._pinned:
+            self.pool.pin(key)
+        self._pinned = set(keys)
+
+    def close(self):
+        self._hold(set())
+
+    def is_loaded(self, model_name=None):
+        if self.worker is not None:
+            return self._remote("loaded", model_name=model_name)
+        return (model_name or self.model_name, self.device, self.compute_type) in self.pool
 
     def transcribe(self, audio: np.ndarray, sample_rate: int, model_override=None, language="en"):
+        return self.transcribe_result(audio, sample_rate, model_override, language).text
+
+    def transcribe_result(self, audio, sample_rate, model_override=None, language="en", vocabulary=None):
         if audio is None or len(audio) == 0:
-            return ""
+            return TranscriptionResult("")
+        if vocabulary:
+            return self._transcribe_vocabulary(audio, sample_rate, list(vocabulary), language)
         if self.engine == "whisper.cpp":
-            return self._transcribe_whisper_cpp(audio, sample_rate, language)
+            text = self._transcribe_whisper_cpp(audio, sample_rate, language)
+            return TranscriptionResult(text, duration=len(audio) / sample_rate, model=self.whisper_cpp_model)
         return self._transcribe_faster_whisper(audio, sample_rate, model_override, language)
 
+    def _transcribe_vocabulary(self, audio, sample_rate, vocabulary, language):
+        self.vocabulary_turns += 1
+        result = None
+        if self.engine != "whisper.cpp":
+            model_name = self.vocabulary_model or self.model_name
+            result = self.decode(audio, sample_rate, model_name, language, prompt=prompt_for(vocabulary))
+        if result is None or (snap(result.text, vocabulary) is None and result.model != self.model_name):
+            # Not one of the expected answers: decode it as ordinary speech
+            result = self.transcribe_result(audio, sample_rate, language=language)
+        choice = snap(result.text, vocabulary)
+        if choice is None:
+            self.vocabulary_misses += 1
+        else:
+            result.text, result.snapped = choice, True
+        return result
+
     def _transcribe_faster_whisper(self, audio, sample_rate, model_override, language):
-        audio = audio.astype(np.float32) / 32768.0
+        if model_override or not self.cascade_model or self.cascade_model == self.model_name:
+            return self.decode(audio, sample_rate, model_override or self.model_name, language)
+        start = time.perf_counter()
+        result = self.decode(audio, sample_rate, self.cascade_model, language)
+        escalate = (
+            not result.text
+            or result.avg_logprob < self.cascade_logprob
+            or result.no_speech_prob > self.cascade_no_speech
+        )
+        if escalate:
+            result = self.decode(audio, sample_rate, self.model_name, language)
+            self.cascade_escalations += 1
+        self.cascade_turns += 1
+        self.cascade_latency["escalated" if escalate else "fast"].add((time.perf_counter() - start) * 1000)
+        return result
+
+    def decode(self, audio, sample_rate, model_name, language="en", prompt=""):
+        if self.worker is not None:
+            return self._remote("decode", audio, sample_rate, model_name=model_name, language=language, prompt=prompt)
+        audio = to_float32(audio)
+        with self.pool.lease(model_name, self.device, self.compute_type, drop=self.transient) as model:
+            segments, _info = model.transcribe(audio, language=language, beam_size=1, initial_prompt=prompt or None)
+            # segments is lazy; decoding happens here, so it stays inside the lease
+            segments = list(segments)
+        return TranscriptionResult(
+            " ".join(seg.text.strip() for seg in segments if seg.text).strip(),
+            duration=len(audio) / sample_rate,
+            avg_logprob=min((seg.avg_logprob for seg in segments), default=None),
+            no_speech_prob=max((seg.no_speech_prob for seg in segments), default=None),
+            model=model_name,
+        )
+
+    def cascade_stats(self):
+        turns = self.cascade_turns
+        return {
+            "turns": turns,
+            "escalation_rate": round(self.cascade_escalations / turns, 3) if turns else 0.0,
+            "fast": self.cascade_latency["fast"].summary(),
+            "escalated": self.cascade_latency["escalated"].summary(),
+        }
+
+    @property
+    def supports_words(self):
+        return self.engine != "whisper.cpp"
+
+    def transcribe_words(self, audio, sample_rate, model_override=None, language="en", prompt=""):
+        # [(start_s, end_s, word), ...] for streaming; faster-whisper only
+        if audio is None or len(audio) == 0:
+            return []
+        if self.worker is not None:
+            return self._remote(
+                "transcribe_words", audio, sample_rate, model_override=model_override, language=language, prompt=prompt
+            )
+        audio = to_float32(audio)
         model_name = model_override or self.model_name
-        model = self._get_faster_whisper(model_name)
-        segments, _info = model.transcribe(audio, language=language, beam_size=1)
-        text = " ".join(seg.text.strip() for seg in segments if seg.text)
-        return text.strip()
+        with self.pool.lease(model_name, self.device, self.compute_type, drop=self.transient) as model:
+            segments, _info = model.transcribe(
+                audio,
+                language=language,
+                beam_size=1,
+                word_timestamps=True,
+                initial_prompt=prompt or None,
+                condition_on_previous_text=False,
+            )
+            return [(w.start, w.end, w.word) for seg in segments for w in (seg.words or [])]
+
+    def server_key(self):
+        # (server binary, model) of the resident whisper.cpp server, if one is used
+        if self.engine != "whisper.cpp" or not self.whisper_cpp_model:
+            return None
+        exe = self.whisper_cpp_server_path or find_server(self._whisper_cpp_exe())
+        return (exe, self.whisper_cpp_model) if exe else None
+
+    def _whisper_cpp_exe(self):
+        return self.whisper_cpp_path or os.environ.get("WHISPER_CPP_PATH", "")
 
     def _transcribe_whisper_cpp(self, audio, sample_rate, language):
-        exe = self.whisper_cpp_path or os.environ.get("WHISPER_CPP_PATH", "")
+        key = self.server_key()
+        if key is not None:
+            return shared_server(*key).transcribe(to_int16(audio), sample_rate, language)
+        return self._transcribe_whisper_cpp_cli(audio, sample_rate, language)
+
+    def _transcribe_whisper_cpp_cli(self, audio, sample_rate, language):
+        # Fallback for builds without the server: one process (and model load) per call
+        exe = self._whisper_cpp_exe()
         model_path = self.whisper_cpp_model
         if not exe or not model_path:
             raise RuntimeError("whisper.cpp path/model not configured")
 
-        audio = audio.astype(np.int16)
+        audio = to_int16(audio)
         with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
             wav_path = f.name
 
@@ -0,0 +1,207 @@
+﻿import itertools
+import logging
+import multiprocessing
+import queue
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from audio.buffers import to_int16
+
+LOG = logging.getLogger("bemo.audio")
+
+
+def _serve(conn, shm_name, slot_samples):
+    # Child process: one thread per request so wake word, stop listener and
+    # the main turn still overlap like they did in-process
+    from audio.stt import STTManager
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    slots = np.ndarray((len(shm.buf) // 2,), dtype=np.int16, buffer=shm.buf)
+    held = STTManager()
+    managers = {}  # request config -> STTManager, built once per config
+    managers_lock = threading.Lock()
+    send_lock = threading.Lock()
+    handlers = []
+
+    def manager(config):
+        key = tuple(sorted(config.items()))
+        with managers_lock:
+            if key not in managers:
+                managers[key] = STTManager(**config)
+            return managers[key]
+
+    def handle(job, kind, config, slot, count, sample_rate, kwargs):
+        try:
+            if kind == "preload":
+                # Models the assistant keeps loaded, as STTManager.preload() in-process
+                held.update_engine(
+                    engine="faster-whisper",
+                    model_name=config["model_name"],
+                    compute_type=config["compute_type"],
+                    device=config["device"],
+                    whisper_cpp_path="",
+                    whisper_cpp_model="",
+                )
+                held.preload(kwargs["model_names"])
+                result = None
+            elif kind == "stats":
+                result = held.pool.stats()
+            else:
+                stt = manager(config)
+                if kind == "loaded":
+                    result = stt.is_loaded(kwargs.get("model_name"))
+                else:
+                    if isinstance(slot, bytes):
+                        audio = np.frombuffer(slot, dtype=np.int16)
+                    else:
+                        start = slot * slot_samples
+                        audio = slots[start : start + count]
+                    result = getattr(stt, kind)(audio, sample_rate, **kwargs)
+            reply = (job, True, result)
+        except Exception as exc:
+            reply = (job, False, f"{type(exc).__name__}: {exc}")
+        with send_lock:
+            conn.send(reply)
+
+    try:
+        while True:
+            try:
+                msg = conn.recv()
+            except EOFError:
+                break
+            if msg is None:
+                break
+            handlers[:] = [t for t in handlers if t.is_alive()]
+            thread = threading.Thread(target=handle, args=msg, daemon=True)
+            thread.start()
+            handlers.append(thread)
+    finally:
+        # Requests still in flight read from the shared block; let them finish
+        # before the view is released and the block closed
+        for thread in handlers:
+            thread.join()
+        slots = None
+        shm.close()
+
+
+class STTProcess:
+    # Runs Whisper in a separate process so decoding never competes with the
+    # GUI and audio callbacks for the GIL. Audio goes through a shared-memory
+    # block with one slot per request in flight (no pickled copy); only the
+    # small request and the text answer cross the pipe.
+    def __init__(self, slots=4, slot_seconds=30, max_sample_rate=16000):
+        self.slot_samples = int(slot_seconds * max_sample_rate)
+        self._shm = shared_memory.SharedMemory(create=True, size=slots * self.slot_samples * 2)
+        self._slots = np.ndarray((slots * self.slot_samples,), dtype=np.int16, buffer=self._shm.buf)
+        self._free = queue.Queue()
+        for i in range(slots):
+            self._free.put(i)
+        self._ids = itertools.count()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._process = None
+        self._conn = None
+        self.requests = 0
+        self.restarts = 0
+
+    def _ensure_running(self):
+        with self._lock:
+            if self._process is not None and self._process.is_alive():
+                return
+            if self._process is not None:
+                self.restarts += 1
+                LOG.warning("STT worker process died, restarting")
+            ctx = multiprocessing.get_context("spawn")
+            parent, child = ctx.Pipe()
+            self._process = ctx.Process(
+                target=_serve, args=(child, self._shm.name, self.slot_samples), name="stt-worker", daemon=True
+            )
+            self._process.start()
+            child.close()
+            self._conn = parent
+            self._pending = {}
+            threading.Thread(
+                target=self._receive, args=(parent, self._pending), name="stt-replies", daemon=True
+            ).start()
+
+    def _receive(self, conn, pending):
+        while True:
+            try:
+                job, ok, result = conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                waiter = pending.pop(job, None)
+            if waiter is not None:
+                waiter[1:] = [ok, result]
+                waiter[0].set()
+        # The worker is gone; fail whatever was still waiting on it
+        with self._lock:
+            waiters = list(pending.values())
+            pending.clear()
+        for waiter in waiters:
+            waiter[1:] = [False, "STT worker process exited"]
+            waiter[0].set()
+
+    def call(self, kind, config, audio=None, sample_rate=16000, **kwargs):
+        self._ensure_running()
+        slot, count = None, 0
+        if audio is not None:
+            audio = to_int16(audio)
+            count = len(audio)
+            if count <= self.slot_samples:
+                slot = self._free.get()
+                self._slots[slot * self.slot_samples : slot * self.slot_samples + count] = audio
+            else:
+                slot = audio.tobytes()
+        job = next(self._ids)
+        waiter = [threading.Event(), False, None]
+        try:
+            with self._lock:
+                self._pending[job] = waiter
+                self._conn.send((job, kind, config, slot, count, sample_rate, kwargs))
+            waiter[0].wait()
+        finally:
+            if isinstance(slot, int):
+                self._free.put(slot)
+        self.requests += 1
+        if not waiter[1]:
+            raise RuntimeError(waiter[2])
+        return waiter[2]
+
+    def close(self):
+        with self._lock:
+            if self._process is not None and self._process.is_alive():
+                try:
+                    self._conn.send(None)
+                except OSError:
+                    pass
+                self._process.join(timeout=2)
+                if self._process.is_alive():
+                    self._process.terminate()
+            self._process = None
+        del self._slots
+        self._shm.close()
+        self._shm.unlink()
+
+
+_WORKER = None
+_WORKER_LOCK = threading.Lock()
+
+
+def shared_worker():
+    global _WORKER
+    with _WORKER_LOCK:
+        if _WORKER is None:
+            _WORKER = STTProcess()
+        return _WORKER
+
+
+def close_worker():
+    global _WORKER
+    with _WORKER_LOCK:
+        if _WORKER is not None:
+            _WORKER.close()
+            _WORKER = None
@@ -0,0 +1,166 @@
+﻿import heapq
+import itertools
+import threading
+import time
+
+from audio.metrics import LatencyStats
+
+PRIORITY_BARGE_IN = 0
+PRIORITY_TURN = 1
+PRIORITY_WAKE = 2
+
+_NAMES = {PRIORITY_BARGE_IN: "barge_in", PRIORITY_TURN: "turn", PRIORITY_WAKE: "wake"}
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class _Job:
+    def __init__(self, priority, fn, args, kwargs):
+        self.priority = priority
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.submitted = time.perf_counter()
+        self.cancelled = False
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def wait(self):
+        self.done.wait()
+        if self.cancelled:
+            raise JobCancelled()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class STTScheduler:
+    # Runs transcription requests one at a time per worker, most urgent class
+    # first: barge-in, then the user's turn, then wake word checks. One extra
+    # lane only ever takes barge-in jobs, so a "stop" never waits behind a
+    # wake word decode that is already running. A decode in flight cannot be
+    # interrupted; cancel() drops queued jobs and discards the result of
+    # running ones.
+    def __init__(self, stt, workers=1, reserved=1):
+        self.stt = stt
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._running = set()
+        self._closed = False
+        self.wait_ms = {p: LatencyStats() for p in _NAMES}
+        self.completed = {p: 0 for p in _NAMES}
+        self.cancelled = {p: 0 for p in _NAMES}
+        self.max_depth = 0
+        self._threads = [
+            threading.Thread(target=self._work, args=(PRIORITY_WAKE,), name="stt-sched", daemon=True)
+            for _ in range(workers)
+        ] + [
+            threading.Thread(target=self._work, args=(PRIORITY_BARGE_IN,), name="stt-sched-urgent", daemon=True)
+            for _ in range(reserved)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def client(self, priority):
+        return STTClient(self, priority)
+
+    def submit(self, priority, fn, *args, **kwargs):
+        job = _Job(priority, fn, args, kwargs)
+        with self._cond:
+            heapq.heappush(self._heap, (priority, next(self._seq), job))
+            self.max_depth = max(self.max_depth, len(self._heap))
+            self._cond.notify_all()
+        return job
+
+    def run(self, priority, fn, *args, **kwargs):
+        return self.submit(priority, fn, *args, **kwargs).wait()
+
+    def cancel(self, priority):
+        # Drop every queued or running job of this class
+        with self._cond:
+            kept = []
+            for entry in self._heap:
+                if entry[2].priority == priority:
+                    self._finish_cancelled(entry[2])
+                else:
+                    kept.append(entry)
+            heapq.heapify(kept)
+            self._heap = kept
+            for job in self._running:
+                if job.priority == priority and not job.cancelled:
+                    job.cancelled = True
+                    self.cancelled[priority] += 1
+
+    def _finish_cancelled(self, job):
+        job.cancelled = True
+        self.cancelled[job.priority] += 1
+        job.done.set()
+
+    def depth(self):
+        with self._cond:
+            return len(self._heap)
+
+    def _work(self, lowest):
+        # lowest: the least urgent class this worker will take
+        while True:
+            with self._cond:
+                while not self._closed and not (self._heap and self._heap[0][0] <= lowest):
+                    self._cond.wait()
+                if self._closed:
+                    return
+                _priority, _seq, job = heapq.heappop(self._heap)
+                self._running.add(job)
+            self.wait_ms[job.priority].add((time.perf_counter() - job.submitted) * 1000)
+            try:
+                job.result = job.fn(*job.args, **job.kwargs)
+            except Exception as exc:
+                job.error = exc
+            with self._cond:
+                self._running.discard(job)
+                if not job.cancelled:
+                    self.completed[job.priority] += 1
+            job.done.set()
+
+    def stats(self):
+        out = {"queue_depth": self.depth(), "max_queue_depth": self.max_depth}
+        for priority, name in _NAMES.items():
+            summary = self.wait_ms[priority].summary()
+            out[name] = {
+                "completed": self.completed[priority],
+                "cancelled": self.cancelled[priority],
+                "wait_p50_ms": summary["p50_ms"],
+                "wait_p95_ms": summary["p95_ms"],
+            }
+        return out
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            for _priority, _seq, job in self._heap:
+                self._finish_cancelled(job)
+            self._heap = []
+            self._cond.notify_all()
+
+
+class STTClient:
+    # Looks like an STTManager, but every decode goes through the scheduler
+    # at a fixed priority
+    def __init__(self, scheduler, priority):
+        self.scheduler = scheduler
+        self.priority = priority
+
+    def __getattr__(self, name):
+        return getattr(self.scheduler.stt, name)
+
+    def transcribe(self, *args, **kwargs):
+        return self.scheduler.run(self.priority, self.scheduler.stt.transcribe, *args, **kwargs)
+
+    def transcribe_result(self, *args, **kwargs):
+        return self.scheduler.run(self.priority, self.scheduler.stt.transcribe_result, *args, **kwargs)
+
+    def transcribe_words(self, *args, **kwargs):
+        return self.scheduler.run(self.priority, self.scheduler.stt.transcribe_words, *args, **kwargs)
@@ -0,0 +1,86 @@
+﻿import re
+
+# What Whisper tends to write for silence, breathing and room noise
+HALLUCINATIONS = {
+    "you",
+    "thank you",
+    "thank you so much",
+    "thanks for watching",
+    "thank you for watching",
+    "thank you very much",
+    "oh",
+    "um",
+    "uh",
+    "hmm",
+    "the",
+    "i",
+    "please subscribe",
+    "subtitles by the amara org community",
+}
+
+PASS = "pass"
+DROP = "drop"
+REPEAT = "repeat"
+
+
+def normalize(text):
+    text = re.sub(r"[^a-z' ]", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class TranscriptGate:
+    # Decides whether a transcript is worth an LLM turn. Known noise
+    # phrases and decodes Whisper itself thinks are silence are dropped;
+    # low-confidence speech gets a "say that again" instead of a guess.
+    # Engines that report no probabilities (whisper.cpp, streamed
+    # transcripts) are only checked for repetition loops.
+    def __init__(self, min_logprob=-1.0, max_no_speech=0.6):
+        self.min_logprob = min_logprob
+        self.max_no_speech = max_no_speech
+        self.passed = 0
+        self.dropped = 0
+        self.repeats = 0
+        self.reason = ""
+
+    @property
+    def llm_turns_saved(self):
+        return self.dropped + self.repeats
+
+    def check(self, result):
+        verdict, self.reason = self._classify(result)
+        if verdict == DROP:
+            self.dropped += 1
+        elif verdict == REPEAT:
+            self.repeats += 1
+        else:
+            self.passed += 1
+        return verdict
+
+    def _classify(self, result):
+        words = normalize(result.text).split()
+        logprob, no_speech = result.avg_logprob, result.no_speech_prob
+        # Someone may really have said "thank you"; only drop it when the
+        # decoder reported how sure it was and wasn't
+        doubtful = (logprob is not None and logprob <= -0.3) or (no_speech is not None and no_speech >= 0.1)
+        if " ".join(words) in HALLUCINATIONS and doubtful:
+            return DROP, "known hallucination"
+        unsure = (logprob is not None and logprob < self.min_logprob) or (
+            no_speech is not None and no_speech > self.max_no_speech
+        )
+        # "no no no" or "stop stop stop" is someone being emphatic; a long
+        # run of one word, or a short one Whisper itself doubts, is a loop
+        if len(set(words)) == 1 and (len(words) >= 6 or (len(words) >= 3 and unsure)):
+            return DROP, "repetition"
+        if no_speech is not None and no_speech > self.max_no_speech and (logprob is None or logprob < self.min_logprob):
+            return DROP, "no speech"
+        if logprob is not None and logprob < self.min_logprob:
+            return REPEAT, "low confidence"
+        return PASS, ""
+
+    def stats(self):
+        return {
+            "passed": self.passed,
+            "dropped": self.dropped,
+            "repeats": self.repeats,
+            "llm_turns_saved": self.llm_turns_saved,
+        }
@@ -1,25 +1,54 @@
-﻿import os
+﻿import json
+import logging
+import os
 import shutil
 import subprocess
 import tempfile
+import threading
+import time
 from pathlib import Path
 import sys
 
+import numpy as np
+
+try:
+    from piper import PiperVoice, SynthesisConfig
+    _HAS_PIPER = True
+except Exception:
+    PiperVoice = None
+    SynthesisConfig = None
+    _HAS_PIPER = False
+
+LOG = logging.getLogger("bemo.audio")
+
 
 class PiperTTS:
-    def __init__(self, voice: str, speaker_id: str = "", piper_path: str = ""):
+    # With the piper-tts package the voice is loaded once and replies are
+    # synthesized straight into memory; the piper executable (one process
+    # and model load per reply, via a temp WAV) is the fallback. With a
+    # cache, phrases said before are played from disk without synthesis.
+    def __init__(
+        self, voice: str, speaker_id: str = "", piper_path: str = "", in_process: bool = True, cache=None
+    ):
         self.voice = voice
         self.speaker_id = speaker_id
         self.piper_path = piper_path
+        self.in_process = in_process
+        self.cache = cache
+        self.last_engine = ""
+        self._voice = None
+        self._voice_path = ""
+        self._voice_failed = False
+        self._voice_lock = threading.Lock()
 
     @property
     def is_available(self) -> bool:
-        return bool(self._resolve_piper()) and bool(self._resolve_voice_path())
+        return bool(self._resolve_voice_path()) and (self._use_in_process() or bool(self._resolve_piper()))
 
     def status(self):
         exe = self._resolve_piper()
         voice = self._resolve_voice_path()
-        if not exe:
+        if not exe and not self._use_in_process():
             return False, "Piper executable not found."
         if not voice:
             return False, f"Piper voice model not found at {self._expected_voice_path()}."
@@ -38,6 +67,155 @@ class PiperTTS:
         self.voice = voice
         self.speaker_id = speaker_id
         self.piper_path = piper_path
+        # A changed voice is loaded on the next reply (or preload)
+        self._voice_failed = False
+
+    def _use_in_process(self):
+        return self.in_process and _HAS_PIPER and not self._voice_failed
+
+    def _load_voice(self):
+        path = self._resolve_voice_path()
+        with self._voice_lock:
+            if self._voice is None or self._voice_path != path:
+                start = time.perf_counter()
+                self._voice = PiperVoice.load(path)
+                self._voice_path = path
+                LOG.info("Piper voice loaded in %.2f s", time.perf_counter() - start)
+            return self._voice
+
+    def preload(self):
+        # Load the voice in the background so the first reply doesn't wait for it
+        if not self._use_in_process() or not self._resolve_voice_path():
+            return None
+        thread = threading.Thread(target=self._preload, name="tts-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def _preload(self):
+        try:
+            self._load_voice()
+        except Exception:
+            LOG.exception("Loading the Piper voice failed, using the piper executable")
+            self._voice_failed = True
+
+    def synthesize_pcm(self, text: str):
+        # (int16 samples, sample rate)
+        rate, chunks = self.stream_pcm(text)
+        parts = list(chunks)
+        return (np.concatenate(parts) if parts else np.zeros(0, dtype=np.int16)), rate
+
+    def stream_pcm(self, text: str):
+        # (sample rate, iterator of int16 chunks): playback can start on the
+        # first chunk. Closing the iterator early stops synthesis.
+        voice = self._resolve_voice_path()
+        if self.cache is not None:
+            cached = self.cache.get(voice, self.speaker_id, text)
+            if cached is not None:
+                self.last_engine = "cache"
+                return cached[1], (audio for audio in [cached[0]])
+        rate, chunks = self._stream_pcm(text)
+        if self.cache is None:
+            return rate, chunks
+        return rate, self._caching(voice, text, rate, chunks)
+
+    def _caching(self, voice, text, rate, chunks):
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        # Only complete utterances are cached, not ones cut off by "stop"
+        if parts:
+            self.cache.put(voice, self.speaker_id, text, np.concatenate(parts), rate)
+
+    def warm(self, phrases):
+        # Synthesize phrases that aren't cached yet, in the background
+        if self.cache is None or not self.is_available:
+            return None
+        thread = threading.Thread(target=self._warm, args=(list(phrases),), name="tts-warm", daemon=True)
+        thread.start()
+        return thread
+
+    def _warm(self, phrases):
+        voice = self._resolve_voice_path()
+        added = 0
+        try:
+            for text in dict.fromkeys(phrases):
+                if (voice, self.speaker_id, text) not in self.cache:
+                    rate, chunks = self._stream_pcm(text)
+                    self.cache.put(voice, self.speaker_id, text, np.concatenate(list(chunks)), rate)
+                    added += 1
+        except Exception:
+            LOG.exception("Warming the TTS cache failed")
+        LOG.info("TTS cache warmed: %d new phrases, %s", added, self.cache.stats())
+
+    def _stream_pcm(self, text):
+        if self._use_in_process() and self._resolve_voice_path():
+            try:
+                voice = self._load_voice()
+                config = SynthesisConfig(speaker_id=int(self.speaker_id)) if self.speaker_id else None
+                chunks = (chunk.audio_int16_array for chunk in voice.synthesize(text, syn_config=config))
+                # Synthesis runs as the chunks are pulled; take the first one
+                # here so a voice that fails still falls back
+                first = next(chunks, None)
+                self.last_engine = "in-process"
+                return voice.config.sample_rate, self._prepend(first, chunks)
+            except Exception:
+                LOG.exception("In-process Piper failed, using the piper executable")
+                self._voice_failed = True
+        self.last_engine = "piper executable"
+        return self._stream_process(text)
+
+    @staticmethod
+    def _prepend(first, chunks):
+        if first is not None:
+            yield first
+        yield from chunks
+
+    def _stream_process(self, text):
+        # Raw 16-bit mono on piper's stdout, read as it is produced
+        exe = self._resolve_piper()
+        if not exe:
+            raise RuntimeError("Piper not found in PATH or configured path")
+        voice_path = self._resolve_voice_path()
+        if not voice_path:
+            raise RuntimeError(f"Piper voice model not found. Expected {self._expected_voice_path()} or download a voice.")
+        cmd = [exe, "--model", voice_path, "--output_raw"]
+        if self.speaker_id:
+            cmd += ["--speaker", str(self.speaker_id)]
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        proc.stdin.write(text.encode("utf-8"))
+        proc.stdin.close()
+        return self._voice_sample_rate(voice_path), self._read_raw(proc)
+
+    @staticmethod
+    def _read_raw(proc, chunk_bytes=4096):
+        rest = b""
+        try:
+            while True:
+                data = proc.stdout.read1(chunk_bytes)
+                if not data:
+                    break
+                data = rest + data
+                usable = len(data) - len(data) % 2
+                rest = data[usable:]
+                if usable:
+                    yield np.frombuffer(data[:usable], dtype=np.int16)
+            if proc.wait() != 0:
+                raise RuntimeError(f"piper exited with code {proc.returncode}")
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            proc.stdout.close()
+
+    @staticmethod
+    def _voice_sample_rate(voice_path):
+        # Piper voices ship a <voice>.onnx.json with the output rate
+        try:
+            with open(voice_path + ".json", "r", encoding="utf-8") as f:
+                return int(json.load(f)["audio"]["sample_rate"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return 22050
 
     def _resolve_piper(self):
         base_dir = Path(__file__).resolve().parents[1]
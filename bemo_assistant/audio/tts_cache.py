@@ -0,0 +1,109 @@
+﻿import hashlib
+import os
+import re
+import tempfile
+import threading
+import wave
+from pathlib import Path
+
+import numpy as np
+
+
+def normalize(text):
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class TTSCache:
+    # Synthesized phrases on disk as WAV files named by a hash of
+    # (voice, speaker, text). A file's mtime is its last use, so the least
+    # recently used phrases are dropped first once max_mb is exceeded, and
+    # that order survives restarts.
+    def __init__(self, folder, max_mb=64):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = {}  # file name -> (last used, size)
+        for path in self.folder.glob("*.wav"):
+            stat = path.stat()
+            self._entries[path.name] = (stat.st_mtime, stat.st_size)
+
+    @staticmethod
+    def key(voice, speaker, text):
+        raw = f"{voice}\n{speaker}\n{normalize(text)}".encode("utf-8")
+        return hashlib.sha1(raw).hexdigest() + ".wav"
+
+    @property
+    def bytes(self):
+        with self._lock:
+            return sum(size for _used, size in self._entries.values())
+
+    def __contains__(self, item):
+        with self._lock:
+            return self.key(*item) in self._entries
+
+    def get(self, voice, speaker, text):
+        # (int16 samples, sample rate) or None
+        name = self.key(voice, speaker, text)
+        path = self.folder / name
+        with self._lock:
+            if name not in self._entries:
+                self.misses += 1
+                return None
+            try:
+                with wave.open(str(path), "rb") as wf:
+                    rate = wf.getframerate()
+                    audio = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+                os.utime(path)
+            except (OSError, EOFError, wave.Error):
+                self._entries.pop(name, None)
+                self.misses += 1
+                return None
+            self._entries[name] = (path.stat().st_mtime, self._entries[name][1])
+            self.hits += 1
+            return audio, rate
+
+    def put(self, voice, speaker, text, audio, sample_rate):
+        name = self.key(voice, speaker, text)
+        path = self.folder / name
+        # A temp name of its own: the warm thread and a live reply may put the same text
+        with tempfile.NamedTemporaryFile(dir=self.folder, suffix=".tmp", delete=False) as f:
+            tmp = f.name
+        with wave.open(tmp, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(sample_rate)
+            wf.writeframes(np.asarray(audio, dtype=np.int16).tobytes())
+        os.replace(tmp, path)
+        stat = path.stat()
+        with self._lock:
+            self._entries[name] = (stat.st_mtime, stat.st_size)
+            self._evict(keep=name)
+
+    def _evict(self, keep):
+        total = sum(size for _used, size in self._entries.values())
+        for name in sorted(self._entries, key=lambda n: self._entries[n][0]):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            total -= self._entries.pop(name)[1]
+            self.evictions += 1
+            try:
+                (self.folder / name).unlink()
+            except OSError:
+                pass
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "evictions": self.evictions,
+        }
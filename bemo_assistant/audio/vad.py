@@ -1,7 +1,9 @@
-﻿import time
-import collections
+﻿import collections
 import numpy as np
-import sounddevice as sd
+
+from audio.backends import default_backend
+from audio.energy_vad import EnergyVAD
+from audio.frames import FrameQueue
 
 try:
     import webrtcvad
@@ -11,20 +13,36 @@ except Exception:
     _HAS_WEBRTCVAD = False
 
 
+def frame_energy_db(frames):
+    x = frames.astype(np.float32)
+    return 10.0 * np.log10(np.mean(x * x, axis=1) + 1.0)
+
+
 class VADRecorder:
-    def __init__(self, sample_rate=16000, aggressiveness=2, device=""):
+    def __init__(self, sample_rate=16000, aggressiveness=2, device="", source=None, backend=None):
         self.sample_rate = sample_rate
         self.frame_ms = 30
         self.frame_samples = int(self.sample_rate * self.frame_ms / 1000)
         self.device = device if device else None
+        self.source = source
+        self.backend = backend
+        self.dropped_frames = 0
         self.vad = webrtcvad.Vad(aggressiveness) if _HAS_WEBRTCVAD else None
-        self.energy_threshold = 500
+        self.fallback_vad = None
+        if self.vad is None:
+            self.fallback_vad = EnergyVAD(self.sample_rate, self.frame_samples, aggressiveness)
+            if source is not None and source.position > 0:
+                self.fallback_vad.calibrate(source.recent(self.sample_rate))
 
     def is_speech(self, frame: np.ndarray) -> bool:
+        return bool(self.classify(frame.reshape(1, -1))[0])
+
+    def classify(self, frames: np.ndarray) -> np.ndarray:
         if self.vad:
-            return self.vad.is_speech(frame.tobytes(), self.sample_rate)
-        rms = np.sqrt(np.mean(frame.astype(np.float32) ** 2))
-        return rms > self.energy_threshold
+            return np.array(
+                [self.vad.is_speech(frame.tobytes(), self.sample_rate) for frame in frames], dtype=bool
+            )
+        return self.fallback_vad.classify(frames)
 
     def record(
         self,
@@ -32,18 +50,30 @@ class VADRecorder:
         max_record_ms=12000,
         min_record_ms=300,
         silence_ms=800,
+        reader=None,
+        start=None,
+        endpointer=None,
+        on_audio=None,
     ):
-        ring_buffer = collections.deque(maxlen=int(300 / self.frame_ms))
-        voiced_frames = []
-        triggered = False
-        silence_duration = 0
+        limits = (max_record_ms, min_record_ms, silence_ms)
+        if reader is not None:
+            return self._record_frames(reader.read_block, stop_event, limits, endpointer, reader.unread, on_audio)
+        if self.source is not None:
+            reader = self.source.subscribe(start=start)
+            try:
+                return self._record_frames(
+                    reader.read_block, stop_event, limits, endpointer, reader.unread, on_audio
+                )
+            finally:
+                reader.close()
 
-        q = collections.deque()
+        q = FrameQueue(maxlen=int(max_record_ms / self.frame_ms) + 1)
 
         def callback(indata, frames, time_info, status):
-            q.append(indata.copy())
+            q.put(indata[:, 0].copy())
 
-        stream = sd.InputStream(
+        backend = self.backend or default_backend()
+        stream = backend.input_stream(
             samplerate=self.sample_rate,
             channels=1,
             dtype="int16",
@@ -52,36 +82,73 @@ class VADRecorder:
             device=self.device,
         )
 
-        start_time = time.time()
+        def read_block(timeout=None):
+            frame = q.get(timeout=timeout)
+            if frame is None:
+                return None
+            return np.stack([frame] + q.drain())
+
         with stream:
-            while True:
-                if stop_event and stop_event.is_set():
-                    return np.array([], dtype=np.int16)
-                if q:
-                    frame = q.popleft().reshape(-1)
-                else:
-                    time.sleep(0.01)
-                    continue
+            audio = self._record_frames(read_block, stop_event, limits, endpointer, on_audio=on_audio)
+        self.dropped_frames = q.dropped
+        return audio
 
-                speech = self.is_speech(frame)
+    def _record_frames(self, read_block, stop_event, limits, endpointer=None, unread=None, on_audio=None):
+        max_record_ms, min_record_ms, silence_ms = limits
+        if endpointer is not None:
+            endpointer.begin(silence_ms)
+        ring_buffer = collections.deque(maxlen=int(300 / self.frame_ms))
+        voiced_frames = []
+        triggered = False
+        silence_duration = 0
+        elapsed_ms = 0
+        done = False
+
+        while not done:
+            if stop_event and stop_event.is_set():
+                return np.array([], dtype=np.int16)
+            frames = read_block(timeout=0.1)
+            if frames is None:
+                continue
+            speech_flags = self.classify(frames)
+            energies = frame_energy_db(frames) if endpointer is not None else None
+
+            for idx, frame in enumerate(frames):
+                elapsed_ms += self.frame_ms
+                speech = speech_flags[idx]
+                # Bus frames are views into its ring
+                frame = frame.copy()
                 if not triggered:
                     ring_buffer.append(frame)
                     if speech:
                         triggered = True
                         voiced_frames.extend(ring_buffer)
                         ring_buffer.clear()
+                        if on_audio is not None:
+                            on_audio(np.concatenate(voiced_frames))
                 else:
                     voiced_frames.append(frame)
-                    if not speech:
-                        silence_duration += self.frame_ms
+                    if on_audio is not None:
+                        on_audio(frame)
+                    total_ms = len(voiced_frames) * self.frame_ms
+                    if endpointer is not None:
+                        done = endpointer.update(speech, energies[idx], can_end=total_ms >= min_record_ms)
                     else:
-                        silence_duration = 0
+                        if not speech:
+                            silence_duration += self.frame_ms
+                        else:
+                            silence_duration = 0
 
-                    total_ms = len(voiced_frames) * self.frame_ms
-                    if total_ms >= min_record_ms and silence_duration >= silence_ms:
-                        break
+                        if total_ms >= min_record_ms and silence_duration >= silence_ms:
+                            done = True
 
-                if (time.time() - start_time) * 1000 > max_record_ms:
+                if elapsed_ms > max_record_ms:
+                    done = True
+                if done:
+                    # Hand frames past the end of the utterance back to the reader
+                    leftover = len(frames) - idx - 1
+                    if leftover and unread:
+                        unread(leftover)
                     break
 
         if not voiced_frames:
@@ -0,0 +1,110 @@
+﻿import difflib
+import re
+
+# Spoken forms Whisper writes for letters
+ALIASES = {
+    "ay": "a",
+    "bee": "b",
+    "dee": "d",
+}
+
+# Ordinary words that sound like a letter or digit; they only count as one
+# when said on their own or after a carrier word ("answer see")
+HOMOPHONES = {
+    "eh": "a",
+    "be": "b",
+    "see": "c",
+    "sea": "c",
+    "won": "1",
+    "to": "2",
+    "too": "2",
+    "for": "4",
+}
+
+NUMBERS = {
+    "zero": 0,
+    "one": 1,
+    "two": 2,
+    "three": 3,
+    "four": 4,
+    "five": 5,
+    "six": 6,
+    "seven": 7,
+    "eight": 8,
+    "nine": 9,
+    "ten": 10,
+    "eleven": 11,
+    "twelve": 12,
+    "thirteen": 13,
+    "fourteen": 14,
+    "fifteen": 15,
+    "sixteen": 16,
+    "seventeen": 17,
+    "eighteen": 18,
+    "nineteen": 19,
+}
+TENS = {"twenty": 20, "thirty": 30, "forty": 40, "fifty": 50, "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90}
+
+# Words that introduce a one-letter or one-digit answer: "answer B", "number 7"
+CARRIERS = {"answer", "option", "letter", "choice", "number", "is", "pick", "say", "guess", "square", "spot"}
+
+# Acted on as soon as they match, so a near miss ("quiet") must not count
+COMMANDS = {"quit"}
+
+
+def normalize(text):
+    words = re.sub(r"[^a-z0-9 ]", " ", text.lower()).split()
+    out = []
+    for i, word in enumerate(words):
+        if word in TENS:
+            out.append(str(TENS[word]))
+        elif word in NUMBERS:
+            value = NUMBERS[word]
+            if 0 < value < 10 and i and words[i - 1] in TENS:
+                # "twenty one" is 21, not 20 and 1
+                out[-1] = str(int(out[-1]) + value)
+            else:
+                out.append(str(value))
+        else:
+            out.append(ALIASES.get(word, word))
+    return " ".join(out)
+
+
+def prompt_for(vocabulary):
+    # Whisper's initial prompt biases decoding toward these words
+    return "Answers: " + ", ".join(vocabulary) + "."
+
+
+def snap(text, vocabulary, cutoff=0.8):
+    # The vocabulary entry the text most likely meant, or None
+    tokens = normalize(text).split()
+    if not tokens:
+        return None
+    tokens = [
+        HOMOPHONES.get(token, token) if len(tokens) == 1 or (i and tokens[i - 1] in CARRIERS) else token
+        for i, token in enumerate(tokens)
+    ]
+    heard = " ".join(tokens)
+    choices = {normalize(v): v for v in vocabulary}
+    if heard in choices:
+        return choices[heard]
+    # "I'll go with paper" -> paper; single letters/digits only match on their own
+    padded = f" {heard} "
+    contained = [c for c in choices if len(c) > 2 and f" {c} " in padded]
+    if contained:
+        return choices[max(contained, key=len)]
+    # "I think it's 7" -> 7, but "one two" is not a guess and 21 is out of range
+    numbers = {token for token in tokens if token.isdigit()}
+    if numbers and any(c.isdigit() for c in choices):
+        return choices.get(numbers.pop()) if len(numbers) == 1 else None
+    # "Answer B" -> B: a letter counts after a carrier word or as the last word
+    short = {
+        token
+        for i, token in enumerate(tokens)
+        if token in choices and len(token) <= 2 and (i == len(tokens) - 1 or (i and tokens[i - 1] in CARRIERS))
+    }
+    if len(short) == 1:
+        return choices[short.pop()]
+    fuzzy = [c for c in choices if choices[c] not in COMMANDS]
+    match = difflib.get_close_matches(heard, fuzzy, n=1, cutoff=cutoff)
+    return choices[match[0]] if match else None
@@ -1,7 +1,10 @@
-﻿import threading
+﻿import logging
+import threading
 import time
-import sounddevice as sd
 
+from audio.buffers import UtteranceBuffer
+from audio.kws import KeywordSpotter
+from audio.metrics import LatencyStats
 from audio.vad import VADRecorder
 
 try:
@@ -13,13 +16,27 @@ except Exception:
 
 WAKE_PHRASE = "hey bemo"
 
+LOG = logging.getLogger("bemo.audio")
+
 
 class WakeWordService:
-    def __init__(self, mode, stt, settings, on_wake):
+    def __init__(self, mode, stt, settings, on_wake, bus, templates_dir=None):
         self.mode = mode
         self.stt = stt
         self.settings = settings
         self.on_wake = on_wake
+        self.bus = bus
+        self.templates_dir = templates_dir
+        self.wake_position = None
+        self.spotter = None
+        self.whisper_calls = 0
+        self.whisper_seconds = 0.0
+        self.predictions = 0
+        self.predicted_chunks = 0
+        self.detection_latency = LatencyStats()
+        self._reader = None
+        self._reader_overruns = 0
+        self._reader_dropped = 0
         self._stop_event = threading.Event()
         self._pause_event = threading.Event()
         self._thread = None
@@ -45,88 +62,155 @@ class WakeWordService:
         self._pause_event.clear()
 
     def _run(self):
-        if self.mode == "openwakeword" and _HAS_OWW:
-            self._run_openwakeword()
-        else:
-            self._run_simple()
-
-    def _run_simple(self):
+        reader = self.bus.subscribe()
+        self._reader = reader
+        try:
+            if self.mode == "openwakeword" and _HAS_OWW:
+                self._run_openwakeword(reader)
+            else:
+                self._run_simple(reader)
+        finally:
+            reader.close()
+            self._reader = None
+            self._reader_overruns += reader.overruns
+            self._reader_dropped += reader.dropped_samples
+            LOG.info("Wake word stopped: %s", self.stats())
+
+    def _wait_while_paused(self, reader):
+        if not self._pause_event.is_set():
+            return False
+        time.sleep(0.1)
+        # Audio captured while paused belongs to the listener, not the wake word
+        reader.seek_live()
+        return True
+
+    def _run_simple(self, reader):
         recorder = VADRecorder(
             sample_rate=self.settings.sample_rate,
             aggressiveness=self.settings.vad_aggressiveness,
-            device=self.settings.mic_device,
+            source=self.bus,
         )
+        self.spotter = KeywordSpotter.from_directory(
+            self.templates_dir,
+            sample_rate=self.settings.sample_rate,
+            threshold=self.settings.kws_threshold,
+        )
+        if self.spotter is not None:
+            self._run_spotter(reader, recorder)
+            return
         while not self._stop_event.is_set():
-            if self._pause_event.is_set():
-                time.sleep(0.1)
+            if self._wait_while_paused(reader):
                 continue
             audio = recorder.record(
                 stop_event=self._stop_event,
                 max_record_ms=2000,
                 min_record_ms=200,
                 silence_ms=300,
+                reader=reader,
             )
             if self._stop_event.is_set():
                 return
             if audio is None or len(audio) == 0:
                 continue
-            try:
-                text = self.stt.transcribe(
-                    audio,
-                    self.settings.sample_rate,
-                    model_override=self.settings.wakeword_model,
-                    language=self.settings.language,
-                )
-            except Exception:
+            if self._confirm(audio):
+                self.wake_position = reader.position
+                self.on_wake()
+                time.sleep(1.0)
+
+    def _run_spotter(self, reader, recorder):
+        # The spotter sees every frame; Whisper only hears its candidates
+        while not self._stop_event.is_set():
+            if self._wait_while_paused(reader):
+                self.spotter.reset()
+                continue
+            frames = reader.read_block(timeout=0.1)
+            if frames is None:
+                continue
+            window = self.spotter.push(frames, speech=bool(recorder.classify(frames).any()))
+            if window is None:
                 continue
-            if WAKE_PHRASE in text.lower():
+            if self._confirm(window):
+                self.wake_position = reader.position
                 self.on_wake()
+                self.spotter.reset()
                 time.sleep(1.0)
 
-    def _run_openwakeword(self):
+    def _confirm(self, audio):
+        self.whisper_calls += 1
+        start = time.perf_counter()
+        try:
+            text = self.stt.transcribe(
+                audio,
+                self.settings.sample_rate,
+                model_override=self.settings.wakeword_model,
+                language=self.settings.language,
+            )
+        except Exception:
+            return False
+        finally:
+            self.whisper_seconds += time.perf_counter() - start
+        return WAKE_PHRASE in text.lower()
+
+    def _run_openwakeword(self, reader):
         model_path = self.settings.openwakeword_model_path
         if model_path:
             model = Model(wakeword_models=[model_path])
         else:
             model = Model()
 
+        # openWakeWord works on 80 ms chunks. When the detector falls behind
+        # (e.g. while STT is busy) everything already buffered goes into one
+        # predict() call instead of many small ones.
+        chunk_samples = 1280
+        max_batch = 8 * chunk_samples
+        cooldown_samples = 2 * self.settings.sample_rate
+        pending = UtteranceBuffer(max_batch + 32 * reader.frame_samples)
         cooldown = 0
 
         while not self._stop_event.is_set():
-            if self._pause_event.is_set():
-                time.sleep(0.1)
+            if self._wait_while_paused(reader):
+                pending.clear()
                 continue
-
-            q = []
-
-            def callback(indata, frames, time_info, status):
-                q.append(indata.copy())
-
-            stream = sd.InputStream(
-                samplerate=self.settings.sample_rate,
-                channels=1,
-                dtype="float32",
-                blocksize=1600,
-                callback=callback,
-                device=self.settings.mic_device if self.settings.mic_device else None,
-            )
-
-            with stream:
-                while not self._stop_event.is_set() and not self._pause_event.is_set():
-                    if not q:
-                        time.sleep(0.01)
-                        continue
-                    frame = q.pop(0).reshape(-1)
-                    if len(frame) == 0:
-                        continue
-                    prediction = model.predict(frame)
-                    score = 0
-                    if isinstance(prediction, dict):
-                        score = max(prediction.values())
-                    if score > self.settings.wakeword_threshold and cooldown <= 0:
-                        self.on_wake()
-                        cooldown = 20
-                    cooldown -= 1
-                    time.sleep(0.01)
-
-
+            frames = reader.read_block(max_frames=32, timeout=0.1)
+            if frames is None:
+                continue
+            for frame in frames:
+                pending.append(frame)
+            usable = min(len(pending) // chunk_samples * chunk_samples, max_batch)
+            if usable == 0:
+                continue
+            # openWakeWord expects 16-bit PCM, which is what the bus delivers
+            prediction = model.predict(pending.view()[:usable])
+            pending.keep_last(len(pending) - usable, exact=True)
+            self.predictions += 1
+            self.predicted_chunks += usable // chunk_samples
+            cooldown -= usable
+            score = 0
+            if isinstance(prediction, dict) and prediction:
+                score = max(prediction.values())
+            if score > self.settings.wakeword_threshold and cooldown <= 0:
+                self.wake_position = reader.position - len(pending)
+                captured = self.bus.write_time(self.wake_position - 1)
+                if captured is not None:
+                    self.detection_latency.add((time.monotonic() - captured) * 1000)
+                self.on_wake()
+                cooldown = cooldown_samples
+
+    def stats(self):
+        overruns, dropped = self._reader_overruns, self._reader_dropped
+        reader = self._reader
+        if reader is not None:
+            overruns += reader.overruns
+            dropped += reader.dropped_samples
+        stats = {
+            "whisper_calls": self.whisper_calls,
+            "whisper_seconds": round(self.whisper_seconds, 2),
+            "predictions": self.predictions,
+            "predicted_chunks": self.predicted_chunks,
+            "overruns": overruns,
+            "dropped_frames": dropped // max(1, self.bus.frame_samples),
+            "detection_latency": self.detection_latency.summary(),
+        }
+        if self.spotter is not None:
+            stats["spotter"] = self.spotter.stats()
+        return stats
@@ -0,0 +1,171 @@
+﻿import io
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import wave
+from pathlib import Path
+
+import requests
+
+LOG = logging.getLogger("bemo.audio")
+
+_SERVER_NAMES = ("whisper-server", "server")
+
+
+def find_server(cli_path):
+    # whisper.cpp builds the server next to the CLI (whisper-server, or
+    # "server" in older releases)
+    if not cli_path:
+        return ""
+    folder = Path(cli_path).parent
+    suffix = ".exe" if os.name == "nt" else ""
+    for name in _SERVER_NAMES:
+        candidate = folder / f"{name}{suffix}"
+        if candidate.is_file():
+            return str(candidate)
+    return ""
+
+
+def wav_bytes(audio, sample_rate):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(audio.tobytes())
+    return buf.getvalue()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class WhisperCppServer:
+    # Long-lived whisper.cpp server with the model resident. Audio is posted
+    # as an in-memory WAV; a server that died or stopped answering is
+    # restarted and the request retried once.
+    def __init__(self, exe, model, startup_timeout=60.0, request_timeout=60.0):
+        self.exe = exe
+        self.model = model
+        self.startup_timeout = startup_timeout
+        self.request_timeout = request_timeout
+        self.port = None
+        self.restarts = 0
+        self.requests = 0
+        self.load_seconds = 0.0
+        self._process = None
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def _command(self):
+        # A .py stand-in (scripts/fake_whisper_server.py) runs under this interpreter
+        cmd = [sys.executable, self.exe] if self.exe.endswith(".py") else [self.exe]
+        return cmd + ["-m", self.model, "--host", "127.0.0.1", "--port", str(self.port)]
+
+    def start(self):
+        self.close()
+        self.port = _free_port()
+        start = time.perf_counter()
+        self._process = subprocess.Popen(
+            self._command(), stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        deadline = start + self.startup_timeout
+        while time.perf_counter() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"whisper.cpp server exited with code {self._process.returncode}")
+            if self.healthy():
+                self.load_seconds = time.perf_counter() - start
+                LOG.info("whisper.cpp server ready on port %d in %.2f s", self.port, self.load_seconds)
+                return
+            time.sleep(0.1)
+        self.close()
+        raise RuntimeError("whisper.cpp server did not become ready")
+
+    def ensure_started(self):
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                self.start()
+
+    def healthy(self):
+        if self._process is None or self._process.poll() is not None:
+            return False
+        try:
+            resp = self._session.get(f"{self.url}/health", timeout=1)
+            if resp.status_code == 404:
+                # Builds without /health still serve the index page
+                resp = self._session.get(self.url, timeout=1)
+            return resp.status_code == 200
+        except requests.RequestException:
+            return False
+
+    def transcribe(self, audio, sample_rate, language="en"):
+        data = wav_bytes(audio, sample_rate)
+        with self._lock:
+            for attempt in range(2):
+                if self._process is None or self._process.poll() is not None:
+                    if self._process is not None:
+                        self.restarts += 1
+                        LOG.warning("whisper.cpp server is gone, restarting")
+                    self.start()
+                try:
+                    resp = self._session.post(
+                        f"{self.url}/inference",
+                        files={"file": ("audio.wav", data, "audio/wav")},
+                        data={"response_format": "json", "language": language, "temperature": "0.0"},
+                        timeout=self.request_timeout,
+                    )
+                except (requests.ConnectionError, requests.Timeout):
+                    if attempt:
+                        raise
+                    LOG.warning("whisper.cpp server request failed, restarting")
+                    self.restarts += 1
+                    # It may be wedged; don't wait for a clean exit
+                    self.close(timeout=0.0)
+                    self.start()
+                    continue
+                # An HTTP error (e.g. audio it can't read) fails this request
+                # only; the server answered, so it stays up
+                resp.raise_for_status()
+                self.requests += 1
+                return resp.json().get("text", "").strip()
+        return ""
+
+    def close(self, timeout=5.0):
+        if self._process is None:
+            return
+        if self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+        self._process = None
+
+
+_SERVERS = {}
+_SERVERS_LOCK = threading.Lock()
+
+
+def shared_server(exe, model):
+    # One server per (binary, model) for the whole process
+    with _SERVERS_LOCK:
+        key = (exe, model)
+        if key not in _SERVERS:
+            _SERVERS[key] = WhisperCppServer(exe, model)
+        return _SERVERS[key]
+
+
+def close_servers(keep=None):
+    with _SERVERS_LOCK:
+        for key in [k for k in _SERVERS if k != keep]:
+            _SERVERS.pop(key).close()
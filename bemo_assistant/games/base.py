@@ -19,3 +19,11 @@ class GameBase:
 
     def handle_input(self, text: str) -> GameUpdate:
         raise NotImplementedError
+
+    def phrases(self) -> list:
+        # Fixed things the game says, synthesized ahead of time
+        return []
+
+    def vocabulary(self) -> list:
+        # What the player is expected to say next; speech is matched against it
+        return []
@@ -34,6 +34,18 @@ class GuessNumberGame(GameBase):
             return GameUpdate(self.name, "Higher.", self._status(), self._quick())
         return GameUpdate(self.name, "Lower.", self._status(), self._quick())
 
+    def phrases(self):
+        return [
+            "I picked a number between 1 and 20. Try to guess!",
+            "Higher.",
+            "Lower.",
+            "Please say a number between 1 and 20.",
+            "Exiting Guess the Number.",
+        ]
+
+    def vocabulary(self):
+        return [str(i) for i in range(1, 21)] + ["quit"]
+
     def _status(self):
         return f"Attempts: {self.attempts}/{self.max_attempts}"
 
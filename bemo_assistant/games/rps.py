@@ -26,6 +26,13 @@ class RPSGame(GameBase):
             msg = f"I picked {ai}. It's a tie."
         return GameUpdate(self.name, msg, "Play again?", self._quick(), score_event=result)
 
+    def phrases(self):
+        picks = [f"I picked {ai}." for ai in ("rock", "paper", "scissors")]
+        return picks + ["You win!", "I win!", "It's a tie.", "Rock, paper, or scissors?", "Say rock, paper, or scissors."]
+
+    def vocabulary(self):
+        return ["rock", "paper", "scissors", "quit"]
+
     def _parse_choice(self, text: str):
         t = text.lower()
         for c in ("rock", "paper", "scissors"):
@@ -1,6 +1,12 @@
 ﻿import random
 from games.base import GameBase, GameUpdate
 
+POSITIONS = {
+    "top left": 0, "top center": 1, "top right": 2,
+    "middle left": 3, "center": 4, "middle right": 5,
+    "bottom left": 6, "bottom center": 7, "bottom right": 8,
+}
+
 
 class TicTacToeGame(GameBase):
     name = "tictactoe"
@@ -82,18 +88,26 @@ class TicTacToeGame(GameBase):
     def _quick(self):
         return [(str(i + 1), str(i + 1)) for i in range(9)]
 
+    def phrases(self):
+        return [
+            "Tic Tac Toe! You are X. Pick a spot 1-9.",
+            "Pick a square 1-9 or say top left, center, etc.",
+            "That spot is taken. Try another.",
+            "Exiting Tic Tac Toe.",
+        ]
+
+    def vocabulary(self):
+        free = self._available()
+        positions = [name for name, idx in POSITIONS.items() if idx in free]
+        return [str(i + 1) for i in free] + positions + ["quit"]
+
     def _parse_move(self, text: str):
         t = text.lower().strip()
         if t.isdigit():
             val = int(t)
             if 1 <= val <= 9:
                 return val - 1
-        mapping = {
-            "top left": 0, "top center": 1, "top right": 2,
-            "middle left": 3, "center": 4, "middle right": 5,
-            "bottom left": 6, "bottom center": 7, "bottom right": 8,
-        }
-        for key, idx in mapping.items():
+        for key, idx in POSITIONS.items():
             if key in t:
                 return idx
         return None
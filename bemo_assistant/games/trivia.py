@@ -69,15 +69,28 @@ class TriviaGame(GameBase):
                 return idx
         return None
 
+    def phrases(self):
+        out = ["Let's do trivia!", "Correct!", "Please answer A, B, C, or D.", "Exiting Trivia."]
+        for q in self.questions:
+            out.append(self._question_text(q))
+            if q.get("explanation"):
+                out.append(q["explanation"])
+        return out
+
+    def vocabulary(self):
+        choices = self.current.get("choices", []) if self.current else []
+        return ["A", "B", "C", "D"] + list(choices) + ["quit"]
+
     def _question_update(self, prefix: str):
         if not self.current:
             return GameUpdate(self.name, "No trivia questions available.", "", [], done=True)
-        q = self.current
-        choices = q.get("choices", [])
-        question_text = f"{q.get('question', '')}\nA) {choices[0]}  B) {choices[1]}  C) {choices[2]}  D) {choices[3]}"
-        text = f"{prefix} {question_text}"
+        text = f"{prefix} {self._question_text(self.current)}"
         return GameUpdate(self.name, text, self._status(), self._quick())
 
+    def _question_text(self, q):
+        choices = q.get("choices", [])
+        return f"{q.get('question', '')}\nA) {choices[0]}  B) {choices[1]}  C) {choices[2]}  D) {choices[3]}"
+
     def _status(self):
         return "Answer A, B, C, or D. Say 'quit' to stop."
 
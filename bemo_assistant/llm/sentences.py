@@ -0,0 +1,46 @@
+﻿import re
+
+# Periods that don't end a sentence
+_ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "st", "vs", "etc", "e.g", "i.e", "approx"}
+
+_END = re.compile(r"[.!?]+[\"')\]]*\s+|\n\s*")
+
+
+class SentenceSplitter:
+    # Cuts streamed LLM text into sentences as soon as each one is complete.
+    # A sentence ends at . ! ? (or a line break) followed by whitespace, so
+    # "3.5" and a trailing "Dr." still waiting for its name aren't cut.
+    def __init__(self, min_chars=12, keep=()):
+        self.min_chars = min_chars
+        # Short sentences that stay on their own, e.g. stock phrases in the TTS cache
+        self.keep = set(keep)
+        self._buffer = ""
+
+    def feed(self, chunk):
+        self._buffer += chunk
+        sentences = []
+        start = 0
+        for match in _END.finditer(self._buffer):
+            candidate = self._buffer[start : match.end()].strip()
+            if not candidate:
+                start = match.end()
+                continue
+            last_word = candidate.split()[-1].rstrip(".").lower()
+            if match.group().startswith(".") and last_word in _ABBREVIATIONS:
+                continue
+            if match.group().startswith(".") and last_word == "no":
+                # "No. 5" is a number; "I said no. Then" ends a sentence
+                following = self._buffer[match.end() : match.end() + 1]
+                if not following or following.isdigit():
+                    continue
+            if len(candidate) < self.min_chars and "\n" not in match.group() and candidate not in self.keep:
+                # "Sure!" alone is too short to be worth a synthesis round trip
+                continue
+            sentences.append(candidate)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self):
+        rest, self._buffer = self._buffer.strip(), ""
+        return rest or None
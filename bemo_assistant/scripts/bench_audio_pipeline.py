@@ -0,0 +1,115 @@
+﻿import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio.backends import WavReplayBackend  # noqa: E402
+from audio.bus import AudioBus  # noqa: E402
+from audio.metrics import LatencyStats  # noqa: E402
+from audio.vad import VADRecorder  # noqa: E402
+from storage.settings import AppSettings  # noqa: E402
+
+
+def collect(paths):
+    files = []
+    for p in paths:
+        path = Path(p)
+        files.extend(sorted(path.rglob("*.wav")) if path.is_dir() else [path])
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Push recorded audio through the bus, VAD and wake word without a sound card."
+    )
+    parser.add_argument("paths", nargs="+", help="WAV files or directories (searched recursively)")
+    parser.add_argument("--realtime", action="store_true", help="pace input like a microphone")
+    parser.add_argument("--wake", choices=["none", "simple", "openwakeword"], default="none")
+    parser.add_argument("--wake-model", default="tiny.en", help="Whisper model for simple wake word mode")
+    parser.add_argument("--openwakeword-model", default="")
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--vad-aggressiveness", type=int, default=2)
+    args = parser.parse_args()
+
+    files = collect(args.paths)
+    if not files:
+        parser.error("no WAV files found")
+
+    settings = AppSettings(
+        sample_rate=args.sample_rate,
+        vad_aggressiveness=args.vad_aggressiveness,
+        wakeword_mode=args.wake,
+        wakeword_model=args.wake_model,
+        openwakeword_model_path=args.openwakeword_model,
+    )
+    backend = WavReplayBackend(files, realtime=args.realtime)
+    bus = AudioBus(sample_rate=args.sample_rate, backend=backend)
+    done = threading.Event()
+    segments = 0
+    triggers = LatencyStats(maxlen=100000)
+
+    wake = None
+    if args.wake != "none":
+        from audio.stt import STTManager
+        from audio.wakeword import WakeWordService
+
+        def on_wake():
+            captured = bus.write_time(wake.wake_position)
+            if captured is not None:
+                triggers.add((time.monotonic() - captured) * 1000)
+
+        wake = WakeWordService(args.wake, STTManager(model_name=args.wake_model), settings, on_wake, bus)
+
+    recorder = VADRecorder(sample_rate=args.sample_rate, aggressiveness=args.vad_aggressiveness, source=bus)
+    reader = bus.subscribe()
+
+    def watch():
+        # Replay is over once the input stream has finished and the VAD has caught up
+        while not (backend.streams and backend.streams[0].finished.is_set()):
+            time.sleep(0.05)
+        while reader.available() >= reader.frame_samples:
+            time.sleep(0.05)
+        done.set()
+
+    start = time.perf_counter()
+    if wake is not None:
+        wake.start()
+        time.sleep(0.2)  # let the wake thread subscribe before audio starts flowing
+    bus.start()
+    threading.Thread(target=watch, daemon=True).start()
+    while not done.is_set():
+        audio = recorder.record(
+            stop_event=done, reader=reader, max_record_ms=12000, min_record_ms=300, silence_ms=800
+        )
+        if len(audio):
+            segments += 1
+    elapsed = time.perf_counter() - start
+    frames = reader.position // reader.frame_samples
+    if wake is not None:
+        wake.stop()
+    bus.stop()
+
+    audio_seconds = frames * bus.frame_ms / 1000.0
+    speed = audio_seconds / max(elapsed, 1e-9)
+    print(f"files {len(files)}  audio {audio_seconds / 3600:.2f} h  wall {elapsed:.1f} s  ({speed:.1f}x realtime)")
+    print(f"VAD: {frames / max(elapsed, 1e-9):.0f} frames/s  {segments} speech segments  reader overruns {reader.overruns}")
+    if wake is not None:
+        summary = triggers.summary()
+        line = f"wake word ({args.wake}): {summary['count']} triggers"
+        if args.realtime:
+            # Capture-to-trigger latency only means something when input is paced like a device
+            line += f"  latency mean {summary['mean_ms']} ms  p50 {summary['p50_ms']} ms  p95 {summary['p95_ms']} ms"
+        print(line)
+        stats = wake.stats()
+        if stats["predictions"]:
+            print(
+                f"openWakeWord: {stats['predictions']} predict calls for {stats['predicted_chunks']} chunks  "
+                f"overruns {stats['overruns']}  dropped frames {stats['dropped_frames']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
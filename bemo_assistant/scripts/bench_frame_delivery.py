@@ -0,0 +1,116 @@
+﻿import argparse
+import collections
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio.frames import FrameQueue  # noqa: E402
+
+
+class PollingSource:
+    # The pre-FrameQueue pattern: callback appends to a deque, consumer sleeps 10 ms.
+    def __init__(self):
+        self.q = collections.deque()
+        self.wakeups = 0
+
+    def put(self, frame):
+        self.q.append(frame)
+
+    def get(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            self.wakeups += 1
+            if self.q:
+                return self.q.popleft()
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.01)
+
+
+class QueueSource:
+    def __init__(self):
+        self.q = FrameQueue(maxlen=200)
+        self.wakeups = 0
+
+    def put(self, frame):
+        self.q.put(frame)
+
+    def get(self, timeout):
+        self.wakeups += 1
+        return self.q.get(timeout=timeout)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def run(source, frames, frame_ms, idle_s):
+    latencies = []
+    done = threading.Event()
+    cpu = {}
+
+    def consumer():
+        start_cpu = time.thread_time()
+        received = 0
+        while received < frames:
+            item = source.get(timeout=0.1)
+            if item is None:
+                continue
+            latencies.append(time.perf_counter() - item)
+            received += 1
+        busy_wakeups = source.wakeups
+        idle_start_cpu = time.thread_time()
+        idle_end = time.monotonic() + idle_s
+        while time.monotonic() < idle_end:
+            source.get(timeout=0.1)
+        cpu["busy"] = idle_start_cpu - start_cpu
+        cpu["idle"] = time.thread_time() - idle_start_cpu
+        cpu["idle_wakeups"] = source.wakeups - busy_wakeups
+        done.set()
+
+    thread = threading.Thread(target=consumer, daemon=True)
+    thread.start()
+    period = frame_ms / 1000.0
+    next_tick = time.perf_counter()
+    for _ in range(frames):
+        next_tick += period
+        while time.perf_counter() < next_tick:
+            time.sleep(max(0.0, next_tick - time.perf_counter()))
+        source.put(time.perf_counter())
+    done.wait()
+    return {
+        "mean_ms": 1000.0 * sum(latencies) / len(latencies),
+        "p95_ms": 1000.0 * percentile(latencies, 95),
+        "max_ms": 1000.0 * max(latencies),
+        "idle_wakeups_per_s": cpu["idle_wakeups"] / idle_s,
+        "idle_cpu_ms_per_s": 1000.0 * cpu["idle"] / idle_s,
+        "busy_cpu_ms": 1000.0 * cpu["busy"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sleep-polling and FrameQueue frame delivery.")
+    parser.add_argument("--seconds", type=float, default=5.0, help="audio to simulate")
+    parser.add_argument("--idle", type=float, default=3.0, help="idle period to sample wakeups over")
+    parser.add_argument("--frame-ms", type=int, default=30)
+    args = parser.parse_args()
+
+    frames = int(args.seconds * 1000 / args.frame_ms)
+    for name, source in (("polling (sleep 10 ms)", PollingSource()), ("FrameQueue", QueueSource())):
+        stats = run(source, frames, args.frame_ms, args.idle)
+        print(
+            f"{name:24s} latency mean {stats['mean_ms']:.2f} ms  p95 {stats['p95_ms']:.2f} ms  "
+            f"max {stats['max_ms']:.2f} ms | idle wakeups {stats['idle_wakeups_per_s']:.1f}/s  "
+            f"idle cpu {stats['idle_cpu_ms_per_s']:.2f} ms/s | busy cpu {stats['busy_cpu_ms']:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+﻿import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio.backends import load_wav  # noqa: E402
+from audio.kws import KeywordSpotter  # noqa: E402
+from audio.vad import VADRecorder  # noqa: E402
+from audio.wakeword import WAKE_PHRASE  # noqa: E402
+
+
+class ArrayReader:
+    # Just enough of BusReader to drive VADRecorder over a recording
+    def __init__(self, audio, frame_samples, done):
+        n = len(audio) // frame_samples
+        self.frames = audio[: n * frame_samples].reshape(n, frame_samples)
+        self.frame_samples = frame_samples
+        self.index = 0
+        self.done = done
+
+    def read_block(self, max_frames=8, timeout=None):
+        if self.index >= len(self.frames):
+            self.done.set()
+            return None
+        block = self.frames[self.index : self.index + max_frames]
+        self.index += len(block)
+        return block
+
+    def unread(self, frames):
+        self.index -= frames
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare Whisper calls for the simple wake word with and without the keyword spotter."
+    )
+    parser.add_argument("paths", nargs="+", help="WAV sessions or directories (searched recursively)")
+    parser.add_argument("--templates", required=True, help="directory of enrolled Hey Bemo WAVs")
+    parser.add_argument("--threshold", type=float, default=0.0)
+    parser.add_argument("--model", default="", help="Whisper model to time real confirmations (e.g. tiny.en)")
+    parser.add_argument("--whisper-ms", type=float, default=350.0, help="assumed CPU per call without --model")
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--vad-aggressiveness", type=int, default=2)
+    args = parser.parse_args()
+
+    files = []
+    for p in args.paths:
+        path = Path(p)
+        files.extend(sorted(path.rglob("*.wav")) if path.is_dir() else [path])
+    if not files:
+        parser.error("no WAV files found")
+    spotter = KeywordSpotter.from_directory(args.templates, args.sample_rate, args.threshold)
+    if spotter is None:
+        parser.error("no templates found")
+
+    stt = None
+    if args.model:
+        from audio.stt import STTManager
+
+        stt = STTManager(model_name=args.model)
+
+    def whisper(audio, stats):
+        stats["calls"] += 1
+        if stt is None:
+            stats["cpu"] += args.whisper_ms / 1000
+            return
+        start = time.thread_time()
+        text = stt.transcribe(audio, args.sample_rate)
+        stats["cpu"] += time.thread_time() - start
+        stats["wakes"] += WAKE_PHRASE in text.lower()
+
+    baseline = {"calls": 0, "cpu": 0.0, "wakes": 0}
+    gated = {"calls": 0, "cpu": 0.0, "wakes": 0}
+    audio_seconds = 0.0
+    vad_cpu = 0.0
+    for f in files:
+        audio = load_wav(f, args.sample_rate)
+        audio_seconds += len(audio) / args.sample_rate
+        recorder = VADRecorder(sample_rate=args.sample_rate, aggressiveness=args.vad_aggressiveness)
+
+        # Current behaviour: every VAD segment up to 2 s goes to Whisper
+        done = threading.Event()
+        reader = ArrayReader(audio, recorder.frame_samples, done)
+        while not done.is_set():
+            segment = recorder.record(
+                stop_event=done, reader=reader, max_record_ms=2000, min_record_ms=200, silence_ms=300
+            )
+            if len(segment):
+                whisper(np.array(segment), baseline)
+
+        # Spotter front end: Whisper only confirms candidate windows
+        spotter.reset()
+        done.clear()
+        reader = ArrayReader(audio, recorder.frame_samples, done)
+        while True:
+            frames = reader.read_block()
+            if frames is None:
+                break
+            start = time.thread_time()
+            speech = bool(recorder.classify(frames).any())
+            vad_cpu += time.thread_time() - start
+            window = spotter.push(frames, speech=speech)
+            if window is not None:
+                whisper(window, gated)
+
+    hours = audio_seconds / 3600
+    kws_cpu = spotter.cpu_seconds + vad_cpu
+    print(f"files {len(files)}  audio {audio_seconds / 60:.1f} min  templates {len(spotter.templates)}  "
+          f"threshold {spotter.threshold:.3f}")
+    for name, stats, extra in (("VAD -> Whisper", baseline, 0.0), ("spotter -> Whisper", gated, kws_cpu)):
+        line = (
+            f"{name:>18}: {stats['calls']} Whisper calls ({stats['calls'] / max(hours, 1e-9):.0f}/h)  "
+            f"CPU {stats['cpu'] + extra:.1f} s"
+        )
+        if stt is not None:
+            line += f"  wakes {stats['wakes']}"
+        print(line)
+    saved = baseline["cpu"] - (gated["cpu"] + kws_cpu)
+    print(f"spotter CPU {kws_cpu:.2f} s ({spotter.checks} DTW checks)  CPU saved {saved:.1f} s "
+          f"({saved / max(baseline['cpu'], 1e-9):.0%})")
+
+
+if __name__ == "__main__":
+    main()
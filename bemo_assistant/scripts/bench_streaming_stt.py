@@ -0,0 +1,64 @@
+﻿import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio.backends import load_wav  # noqa: E402
+from audio.metrics import LatencyStats  # noqa: E402
+from audio.stt import STTManager  # noqa: E402
+from audio.streaming import StreamingTranscriber  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="End-of-speech to final text latency: batch transcription vs streaming."
+    )
+    parser.add_argument("paths", nargs="+", help="one utterance per WAV, or directories of them")
+    parser.add_argument("--model", default="small.en")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--step-ms", type=int, default=1000, help="streaming decode interval")
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    args = parser.parse_args()
+
+    files = []
+    for p in args.paths:
+        path = Path(p)
+        files.extend(sorted(path.rglob("*.wav")) if path.is_dir() else [path])
+    if not files:
+        parser.error("no WAV files found")
+
+    stt = STTManager(model_name=args.model, device=args.device, compute_type=args.compute_type)
+    stt.preload([args.model]).join()
+    batch = LatencyStats()
+    streaming = LatencyStats()
+    frame = args.sample_rate * 30 // 1000
+    for path in files:
+        audio = load_wav(path, args.sample_rate)
+
+        start = time.perf_counter()
+        expected = stt.transcribe(audio, args.sample_rate)
+        batch.add((time.perf_counter() - start) * 1000)
+
+        # Feed at microphone pace so the background passes see what they would live
+        streamer = StreamingTranscriber(stt, args.sample_rate, step_ms=args.step_ms).start()
+        began = time.perf_counter()
+        for i in range(0, len(audio), frame):
+            streamer.feed(audio[i : i + frame])
+            time.sleep(max(0.0, began + (i + frame) / args.sample_rate - time.perf_counter()))
+        start = time.perf_counter()
+        text = streamer.finish()
+        streaming.add((time.perf_counter() - start) * 1000)
+        print(f"{path.name}: {streamer.passes} passes, {streamer.tail_seconds:.1f} s tail")
+        if text != expected:
+            print(f"  batch:     {expected}\n  streaming: {text}")
+
+    for label, stats in (("batch", batch), ("streaming", streaming)):
+        s = stats.summary()
+        print(f"{label:>9}: mean {s['mean_ms']} ms  p50 {s['p50_ms']} ms  p95 {s['p95_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
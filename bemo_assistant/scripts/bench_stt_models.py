@@ -0,0 +1,178 @@
+﻿import argparse
+import csv
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio.backends import load_wav  # noqa: E402
+from audio.stt import STTManager  # noqa: E402
+from audio.tts import PiperTTS  # noqa: E402
+from audio.whisper_server import close_servers  # noqa: E402
+from storage.settings import AppSettings  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "stt"
+FIELDS = ["engine", "model", "compute_type", "threads", "load_s", "rtf", "wer", "peak_rss_mb", "clips", "error"]
+
+
+def read_labels(folder):
+    labels = []
+    with (folder / "transcripts.tsv").open("r", encoding="utf-8-sig") as f:
+        for line in f:
+            if line.strip():
+                name, text = line.rstrip("\n").split("\t", 1)
+                labels.append((folder / name, text))
+    return labels
+
+
+def make_fixtures(folder, voice, piper_path):
+    # The clips are synthesized with the assistant's own Piper voice, so no
+    # recordings need to be shipped or downloaded
+    tts = PiperTTS(voice=voice, piper_path=piper_path)
+    ok, message = tts.status()
+    if not ok:
+        raise SystemExit(message)
+    for path, text in read_labels(folder):
+        if not path.exists():
+            shutil.move(tts.synthesize(text), path)
+            print(f"wrote {path.name}: {text!r}")
+
+
+def words(text):
+    return re.sub(r"[^a-z0-9' ]", " ", text.lower()).split()
+
+
+def edit_distance(ref, hyp):
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (r != h))
+    return row[-1]
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return float("nan")
+    # Includes a whisper.cpp server once it has been closed and reaped
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024
+
+
+def run_one(config, folder, sample_rate):
+    # One configuration per process, so load time and peak RSS are its own
+    stt = STTManager(
+        engine=config["engine"],
+        model_name=config["model"],
+        compute_type=config["compute_type"] or "int8",
+        whisper_cpp_path=config.get("whisper_cpp_path", ""),
+        whisper_cpp_model=config["model"] if config["engine"] == "whisper.cpp" else "",
+    )
+    clips = [(load_wav(path, sample_rate), text) for path, text in read_labels(folder) if path.exists()]
+    if not clips:
+        raise SystemExit(f"No fixture WAVs in {folder}; run with --make-fixtures first")
+    start = time.perf_counter()
+    loading = stt.preload([config["model"]])
+    if loading is not None:
+        loading.join()
+    if config["engine"] == "whisper.cpp" and stt.server_key() is None:
+        # CLI fallback: every call loads the model, so time one short call instead
+        stt.transcribe(clips[0][0][: sample_rate // 2], sample_rate)
+    load_s = time.perf_counter() - start
+    decode_s = audio_s = 0.0
+    errors = ref_words = 0
+    for audio, text in clips:
+        start = time.perf_counter()
+        hyp = stt.transcribe(audio, sample_rate)
+        decode_s += time.perf_counter() - start
+        audio_s += len(audio) / sample_rate
+        errors += edit_distance(words(text), words(hyp))
+        ref_words += len(words(text))
+    close_servers()
+    return {
+        "load_s": round(load_s, 2),
+        "rtf": round(decode_s / audio_s, 3),
+        "wer": round(errors / max(ref_words, 1), 3),
+        "peak_rss_mb": round(peak_rss_mb(), 0),
+        "clips": len(clips),
+    }
+
+
+def configurations(args):
+    for model in args.models:
+        for compute_type in args.compute_types:
+            for threads in args.threads:
+                yield {"engine": "faster-whisper", "model": model, "compute_type": compute_type, "threads": threads}
+    for model in args.whisper_cpp_models:
+        yield {
+            "engine": "whisper.cpp",
+            "model": model,
+            "compute_type": "",
+            "threads": "",
+            "whisper_cpp_path": args.whisper_cpp_path,
+        }
+
+
+def main():
+    defaults = AppSettings()
+    parser = argparse.ArgumentParser(
+        description="Real-time factor, first-load time, peak RSS and WER for each STT engine/model/compute type."
+    )
+    parser.add_argument("--fixtures", default=str(FIXTURES), help="folder with transcripts.tsv and its WAVs")
+    parser.add_argument("--models", nargs="*", default=["tiny.en", "base.en", "small.en"])
+    parser.add_argument("--compute-types", nargs="*", default=["int8", "int8_float32", "float32"])
+    parser.add_argument("--threads", nargs="*", type=int, default=[1, 2, 4], help="CPU threads (OMP_NUM_THREADS)")
+    parser.add_argument("--whisper-cpp-models", nargs="*", default=[], help="ggml model files to add to the run")
+    parser.add_argument("--whisper-cpp-path", default="", help="whisper.cpp CLI (the server next to it is used)")
+    parser.add_argument("--json", default="stt_benchmark.json")
+    parser.add_argument("--csv", default="stt_benchmark.csv")
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--make-fixtures", action="store_true", help="synthesize missing fixture WAVs with Piper")
+    parser.add_argument("--voice", default=defaults.tts_voice)
+    parser.add_argument("--piper-path", default=defaults.piper_path)
+    parser.add_argument("--run-one", default="", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    folder = Path(args.fixtures)
+
+    if args.run_one:
+        print(json.dumps(run_one(json.loads(args.run_one), folder, args.sample_rate)))
+        return
+    if args.make_fixtures:
+        make_fixtures(folder, args.voice, args.piper_path)
+
+    rows = []
+    for config in configurations(args):
+        env = dict(os.environ, HF_HUB_OFFLINE="1")
+        if config["threads"]:
+            env["OMP_NUM_THREADS"] = str(config["threads"])
+        cmd = [sys.executable, __file__, "--run-one", json.dumps(config), "--fixtures", str(folder)]
+        cmd += ["--sample-rate", str(args.sample_rate)]
+        proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+        row = {k: config[k] for k in ("engine", "model", "compute_type", "threads")}
+        if proc.returncode == 0:
+            row.update(json.loads(proc.stdout.strip().splitlines()[-1]))
+        else:
+            row["error"] = (proc.stderr.strip().splitlines() or ["failed"])[-1]
+        rows.append(row)
+        print("  ".join(f"{k}={row.get(k, '')}" for k in FIELDS if row.get(k, "") != ""))
+
+    with open(args.json, "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=2)
+    with open(args.csv, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"wrote {args.json} and {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
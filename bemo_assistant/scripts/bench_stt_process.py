@@ -0,0 +1,100 @@
+﻿import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio.backends import create_backend, load_wav  # noqa: E402
+from audio.bus import AudioBus  # noqa: E402
+from audio.metrics import LatencyStats  # noqa: E402
+from audio.stt import STTManager  # noqa: E402
+from audio.stt_process import close_worker  # noqa: E402
+from audio.vad import VADRecorder  # noqa: E402
+from storage.settings import AppSettings  # noqa: E402
+
+
+def gui_ticks(stop, frame_times, period=1 / 60):
+    # Stand-in for the Qt event loop: a 60 Hz timer doing a little Python work
+    # per frame. Frame time is the gap between ticks.
+    last = time.perf_counter()
+    deadline = last + period
+    while not stop.is_set():
+        sum(i * i for i in range(2000))
+        time.sleep(max(0.0, deadline - time.perf_counter()))
+        now = time.perf_counter()
+        frame_times.add((now - last) * 1000)
+        last = now
+        deadline = max(deadline + period, now)
+
+
+def vad_consumer(stop, reader, recorder):
+    while not stop.is_set():
+        frames = reader.read_block(timeout=0.1)
+        if frames is not None:
+            recorder.classify(frames)
+
+
+def run(args, clip, out_of_process):
+    settings = AppSettings(audio_backend=args.backend, sample_rate=args.sample_rate)
+    bus = AudioBus(sample_rate=args.sample_rate, backend=create_backend(settings))
+    stt = STTManager(model_name=args.model, out_of_process=out_of_process)
+    stt.preload([args.model]).join()
+    stt.transcribe(clip, args.sample_rate)  # warm up outside the measurement
+    stop = threading.Event()
+    frame_times = LatencyStats(maxlen=100000)
+    reader = bus.subscribe()
+    recorder = VADRecorder(sample_rate=args.sample_rate, source=bus)
+    bus.start()
+    threads = [
+        threading.Thread(target=gui_ticks, args=(stop, frame_times), daemon=True),
+        threading.Thread(target=vad_consumer, args=(stop, reader, recorder), daemon=True),
+    ]
+    for t in threads:
+        t.start()
+    calls = 0
+    end = time.perf_counter() + args.seconds
+    while time.perf_counter() < end:
+        stt.transcribe(clip, args.sample_rate)
+        calls += 1
+    stop.set()
+    for t in threads:
+        t.join()
+    bus.stop()
+    if out_of_process:
+        close_worker()
+    return calls, frame_times, bus.overflows, reader.overruns
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="GUI frame time and audio overflows while Whisper runs in-process vs in the STT worker process."
+    )
+    parser.add_argument("--wav", default="", help="clip to transcribe repeatedly (default: 3 s of noise)")
+    parser.add_argument("--model", default="small.en")
+    parser.add_argument("--seconds", type=float, default=20.0, help="measurement time per mode")
+    parser.add_argument("--backend", default="sounddevice", help="sounddevice (counts real overflows) or null")
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    args = parser.parse_args()
+
+    if args.wav:
+        clip = load_wav(args.wav, args.sample_rate)
+    else:
+        clip = (np.random.default_rng(0).standard_normal(args.sample_rate * 3) * 1000).astype(np.int16)
+
+    for label, out_of_process in (("in-process", False), ("worker process", True)):
+        calls, frame_times, overflows, overruns = run(args, clip, out_of_process)
+        values = np.array(frame_times.values())
+        s = frame_times.summary()
+        print(
+            f"{label:>14}: {calls} transcriptions  GUI frame p50 {s['p50_ms']} ms  p95 {s['p95_ms']} ms  "
+            f"max {values.max():.1f} ms  frames >33 ms {int((values > 33).sum())}  "
+            f"input overflows {overflows}  reader overruns {overruns}"
+        )
+
+
+if __name__ == "__main__":
+    main()
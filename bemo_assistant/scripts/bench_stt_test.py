@@ -0,0 +1,73 @@
+﻿import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio.backends import load_wav  # noqa: E402
+from audio.model_pool import ModelPool  # noqa: E402
+from audio.stt import STTManager, load_faster_whisper  # noqa: E402
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return float("nan")
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def time_tests(make_stt, audio, sample_rate, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        make_stt().transcribe(audio, sample_rate)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time the Settings STT test with a private model (old) and the shared model pool (new)."
+    )
+    parser.add_argument("--wav", default="", help="3 s test clip (default: silence)")
+    parser.add_argument("--model", default="small.en")
+    parser.add_argument("--other-model", default="tiny.en", help="a model the assistant is not using")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    args = parser.parse_args()
+
+    audio = load_wav(args.wav, args.sample_rate) if args.wav else np.zeros(args.sample_rate * 3, dtype=np.int16)
+    engine = dict(device=args.device, compute_type=args.compute_type)
+
+    # Before: every test built an STTManager with its own cache and reloaded the model
+    before = time_tests(
+        lambda: STTManager(model_name=args.model, pool=ModelPool(load_faster_whisper), **engine),
+        audio,
+        args.sample_rate,
+        args.runs,
+    )
+    print(f"private model per test: {', '.join(f'{t:.2f}' for t in before)} s   peak RSS {peak_rss_mb():.0f} MB")
+
+    # After: the running assistant already holds its model in the shared pool
+    assistant = STTManager(model_name=args.model, **engine)
+    assistant.preload([args.model]).join()
+    after = time_tests(
+        lambda: STTManager(model_name=args.model, transient=True, **engine), audio, args.sample_rate, args.runs
+    )
+    print(f"shared pool, same model: {', '.join(f'{t:.2f}' for t in after)} s   peak RSS {peak_rss_mb():.0f} MB")
+
+    other = time_tests(
+        lambda: STTManager(model_name=args.other_model, transient=True, **engine), audio, args.sample_rate, 1
+    )
+    loaded = [m["name"] for m in assistant.pool.stats()["models"]]
+    print(f"shared pool, {args.other_model}: {other[0]:.2f} s, loaded afterwards: {', '.join(loaded)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+﻿import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio.backends import create_backend  # noqa: E402
+from audio.metrics import LatencyStats  # noqa: E402
+from audio.playback import AudioPlayer  # noqa: E402
+from audio.tts import PiperTTS  # noqa: E402
+from storage.settings import AppSettings  # noqa: E402
+
+
+def first_sample_ms(tts, player, text):
+    # Reply text in hand -> first sample handed to the output device
+    stop = threading.Event()
+    start = time.perf_counter()
+    sample_rate, chunks = tts.stream_pcm(text)
+    player.play_stream(chunks, sample_rate, on_amplitude=lambda _level: stop.set(), stop_event=stop)
+    return (player.first_sample_at - start) * 1000
+
+
+def main():
+    defaults = AppSettings()
+    parser = argparse.ArgumentParser(
+        description="Time to first sample with the piper executable per reply vs the resident in-process voice."
+    )
+    parser.add_argument("--voice", default=defaults.tts_voice)
+    parser.add_argument("--speaker", default="")
+    parser.add_argument("--piper-path", default=defaults.piper_path)
+    parser.add_argument("--text", default="Sure! Here is a fun fact: octopuses have three hearts.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--backend", default="null", help="null (no sound) or sounddevice")
+    args = parser.parse_args()
+
+    player = AudioPlayer(backend=create_backend(AppSettings(audio_backend=args.backend)))
+    for label, in_process in (("piper executable", False), ("in-process", True)):
+        tts = PiperTTS(args.voice, speaker_id=args.speaker, piper_path=args.piper_path, in_process=in_process)
+        ok, message = tts.status()
+        if not ok:
+            print(f"{label:>16}: {message}")
+            continue
+        start = time.perf_counter()
+        loading = tts.preload()
+        if loading is not None:
+            loading.join()
+        load_ms = (time.perf_counter() - start) * 1000
+        stats = LatencyStats()
+        for _ in range(args.runs):
+            stats.add(first_sample_ms(tts, player, args.text))
+        s = stats.summary()
+        print(
+            f"{label:>16}: first sample p50 {s['p50_ms']} ms  p95 {s['p95_ms']} ms  "
+            f"(voice load at startup {load_ms:.0f} ms, engine used: {tts.last_engine})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+﻿import argparse
+import sys
+import wave
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio.backends import create_backend, load_wav  # noqa: E402
+from audio.bargein import VOCABULARY  # noqa: E402
+from audio.kws import KeywordSpotter  # noqa: E402
+from audio.vad import VADRecorder  # noqa: E402
+from storage.settings import SettingsManager  # noqa: E402
+
+
+def save_wav(path, audio, sample_rate):
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(np.asarray(audio, dtype=np.int16).tobytes())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enroll \"Hey Bemo\" (or barge-in word) recordings for the keyword spotter.")
+    parser.add_argument("--count", type=int, default=5, help="number of takes to record")
+    parser.add_argument("--import", dest="imports", nargs="*", default=[], help="existing WAVs to enroll instead")
+    parser.add_argument("--word", choices=VOCABULARY, help="enroll a barge-in word instead of the wake phrase")
+    parser.add_argument("--output", default="", help="template directory (default: from settings)")
+    args = parser.parse_args()
+
+    manager = SettingsManager()
+    settings = manager.load()
+    if args.word:
+        root = Path(args.output or settings.bargein_templates_dir or manager.data_dir / "bargein_templates")
+        out_dir = root / args.word
+        phrase, stem = args.word, args.word
+    else:
+        out_dir = Path(args.output or settings.wakeword_templates_dir or manager.data_dir / "wakeword_templates")
+        phrase, stem = "Hey Bemo", "hey_bemo"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    existing = len(list(out_dir.glob("*.wav")))
+
+    takes = [load_wav(p, settings.sample_rate) for p in args.imports]
+    if not takes:
+        recorder = VADRecorder(
+            sample_rate=settings.sample_rate,
+            aggressiveness=settings.vad_aggressiveness,
+            device=settings.mic_device,
+            backend=create_backend(settings),
+        )
+        for i in range(args.count):
+            input(f"[{i + 1}/{args.count}] Press Enter, then say \"{phrase}\"")
+            audio = recorder.record(max_record_ms=2500, min_record_ms=300, silence_ms=400)
+            if len(audio) == 0:
+                print("  nothing heard, skipped")
+                continue
+            takes.append(np.array(audio))
+
+    for i, audio in enumerate(takes):
+        path = out_dir / f"{stem}_{existing + i + 1:02d}.wav"
+        save_wav(path, audio, settings.sample_rate)
+        print(f"Saved {path} ({len(audio) / settings.sample_rate:.2f} s)")
+
+    if args.word:
+        spotter = KeywordSpotter.from_vocabulary(root, VOCABULARY, settings.sample_rate)
+    else:
+        spotter = KeywordSpotter.from_directory(out_dir, settings.sample_rate)
+    if spotter is not None:
+        print(f"{len(spotter.templates)} templates, derived threshold {spotter.threshold:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+﻿import argparse
+import io
+import json
+import time
+import wave
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+
+def read_upload(handler):
+    # Pull the "file" part out of a multipart/form-data body
+    length = int(handler.headers.get("Content-Length", 0))
+    body = handler.rfile.read(length)
+    header = f"Content-Type: {handler.headers.get('Content-Type', '')}\r\n\r\n".encode()
+    message = BytesParser(policy=HTTP).parsebytes(header + body)
+    for part in message.iter_parts():
+        if part.get_param("name", header="content-disposition") == "file":
+            return part.get_payload(decode=True)
+    return b""
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stand-in for whisper.cpp's server: same flags and /health + /inference endpoints."
+    )
+    parser.add_argument("-m", "--model", default="")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--load-s", type=float, default=0.5, help="simulated model load time")
+    parser.add_argument("--infer-ms", type=float, default=20.0, help="simulated decode time per request")
+    parser.add_argument("--text", default="", help="fixed reply (default: describes the audio received)")
+    parser.add_argument("--exit-after", type=int, default=0, help="exit after this many requests (restart tests)")
+    args = parser.parse_args()
+
+    state = {"requests": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *a):
+            pass
+
+        def _reply(self, code, payload, content_type="application/json"):
+            data = payload.encode() if isinstance(payload, str) else json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._reply(200, {"status": "ok"})
+            elif self.path == "/":
+                self._reply(200, "<html>fake whisper.cpp server</html>", "text/html")
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/inference":
+                self._reply(404, {"error": "not found"})
+                return
+            with wave.open(io.BytesIO(read_upload(self)), "rb") as wf:
+                seconds = wf.getnframes() / wf.getframerate()
+            time.sleep(args.infer_ms / 1000)
+            self._reply(200, {"text": args.text or f" {seconds:.2f} seconds of audio"})
+            state["requests"] += 1
+            if args.exit_after and state["requests"] >= args.exit_after:
+                self.server.shutdown_requested = True
+
+    time.sleep(args.load_s)
+    server = HTTPServer((args.host, args.port), Handler)
+    server.shutdown_requested = False
+    while not server.shutdown_requested:
+        server.handle_request()
+
+
+if __name__ == "__main__":
+    main()
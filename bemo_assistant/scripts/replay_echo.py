@@ -0,0 +1,193 @@
+﻿import argparse
+import sys
+import threading
+import wave
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio.aec import EchoCancellingReader, EchoReference  # noqa: E402
+from audio.backends import NullBackend, load_wav  # noqa: E402
+from audio.bargein import BargeInDetector, load_spotter  # noqa: E402
+from audio.bus import AudioBus  # noqa: E402
+from audio.vad import VADRecorder  # noqa: E402
+
+
+def room_response(sample_rate, delay_ms, gain, rng):
+    # Direct path after delay_ms followed by a 60 ms exponentially decaying tail
+    delay = int(sample_rate * delay_ms / 1000)
+    tail = int(sample_rate * 0.06)
+    ir = np.zeros(delay + tail)
+    ir[delay] = gain
+    ir[delay + 1 :] = rng.standard_normal(tail - 1) * gain * 0.15 * np.exp(-np.arange(1, tail) / (tail / 5))
+    return ir
+
+
+class Session:
+    # One second of room noise, then Bemo gives `replies` answers with a pause
+    # in between and the user barges into the last one. Each step() is 20 ms:
+    # the player "plays" a block of TTS (feeding the echo reference) and the
+    # mic captures its echo, the user's voice and the room noise.
+    def __init__(self, args, tts, tts_rate, speech, rng):
+        rate = args.sample_rate
+        self.tts = tts
+        self.tts_rate = tts_rate
+        tts_mic = load_wav(args.tts, rate).astype(np.float64) / 32768.0
+        echo = np.convolve(tts_mic, room_response(rate, args.delay_ms, args.echo_gain, rng))
+        self.lead = rate
+        self.reply = len(echo) + rate
+        total = self.lead + self.reply * args.replies
+        mic = np.zeros(total)
+        for i in range(args.replies):
+            start = self.lead + i * self.reply
+            mic[start : start + len(echo)] += echo
+        barge = self.lead + (args.replies - 1) * self.reply + int(args.barge_at * rate)
+        user = speech.astype(np.float64) / 32768.0
+        mic[barge : barge + len(user)] += user[: total - barge]
+        mic += rng.standard_normal(total) * 10 ** (args.noise_db / 20)
+        self.mic = np.clip(mic * 32768, -32768, 32767).astype(np.int16)
+        self.user = (barge, barge + len(user))
+        self.bus = AudioBus(sample_rate=rate, backend=NullBackend())
+        self.reference = EchoReference(self.bus)
+        self.mic_block = int(rate * 0.02)
+        self.out_block = int(tts_rate * 0.02)
+
+    def step(self):
+        pos = self.bus.position
+        if pos >= len(self.mic):
+            return False
+        if pos >= self.lead:
+            offset = (pos - self.lead) % self.reply
+            if offset == 0:
+                self.reference.begin(0.0)
+            played = offset * self.tts_rate // self.bus.sample_rate
+            if played < len(self.tts):
+                self.reference.feed(self.tts[played : played + self.out_block], self.tts_rate)
+        self.bus.write(self.mic[pos : pos + self.mic_block])
+        return True
+
+    def reply_index(self, position):
+        return max(0, (position - self.lead) // self.reply)
+
+
+class LiveReader:
+    # Advances the session just enough to satisfy each read, so the reader
+    # stays as close behind the "microphone" as StopListener would
+    def __init__(self, reader, session, done):
+        self.reader = reader
+        self.session = session
+        self.done = done
+
+    def read_block(self, max_frames=8, timeout=None):
+        while self.reader.available() < self.reader.frame_samples:
+            if not self.session.step():
+                self.done.set()
+                return None
+        return self.reader.read_block(max_frames, timeout)
+
+    def unread(self, frames):
+        self.reader.unread(frames)
+
+
+def start(args, session, cancel):
+    while session.bus.position < session.lead:
+        session.step()
+    recorder = VADRecorder(
+        sample_rate=args.sample_rate, aggressiveness=args.vad_aggressiveness, source=session.bus
+    )
+    reader = session.bus.subscribe()
+    if cancel:
+        reader = EchoCancellingReader(reader, session.reference)
+    done = threading.Event()
+    return recorder, reader, done, LiveReader(reader, session, done)
+
+
+def run(args, session, cancel):
+    # Utterance-at-a-time listening without Whisper: every segment would be one STT call
+    recorder, reader, done, live = start(args, session, cancel)
+    segments = []
+    while not done.is_set():
+        audio = recorder.record(stop_event=done, reader=live, max_record_ms=1200, min_record_ms=200, silence_ms=300)
+        if len(audio):
+            segments.append((reader.position - len(audio), reader.position))
+    return reader, segments
+
+
+def run_detector(args, session, cancel):
+    # StopListener's streaming loop with enrolled templates. Returns every
+    # detection as (bus position, word, confidence) and the DTW checks made.
+    recorder, reader, done, live = start(args, session, cancel)
+    spotter = load_spotter(args.templates, args.sample_rate)
+    detector = BargeInDetector(args.sample_rate, spotter=spotter, threshold=args.threshold)
+    hits = []
+    while True:
+        frames = live.read_block()
+        if frames is None:
+            break
+        word = detector.push(frames, recorder.classify(frames), reader.position)
+        if word is not None:
+            hits.append((reader.position, word, detector.confidence))
+            detector.reset()
+    return detector, hits
+
+
+def session_for(args, tts, tts_rate, speech):
+    return Session(args, tts, tts_rate, speech, np.random.default_rng(args.seed))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay Bemo's TTS with a user barging in, with and without echo cancellation."
+    )
+    parser.add_argument("--tts", required=True, help="WAV of Bemo speaking (any rate)")
+    parser.add_argument("--speech", required=True, help="WAV of the user saying e.g. \"stop\"")
+    parser.add_argument("--replies", type=int, default=3, help="TTS replies; the user interrupts the last")
+    parser.add_argument("--barge-at", type=float, default=2.0, help="seconds into playback the user speaks")
+    parser.add_argument("--delay-ms", type=float, default=40.0, help="speaker-to-mic delay")
+    parser.add_argument("--echo-gain", type=float, default=0.6)
+    parser.add_argument("--noise-db", type=float, default=-50.0, help="room noise in dBFS")
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--vad-aggressiveness", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--templates", default="", help="barge-in template dir (<dir>/<word>/*.wav) to time detection")
+    parser.add_argument("--threshold", type=float, default=0.5, help="barge-in confidence threshold")
+    args = parser.parse_args()
+
+    with wave.open(args.tts, "rb") as wf:
+        tts_rate = wf.getframerate()
+    tts = load_wav(args.tts, tts_rate).astype(np.float32) / 32768.0
+    speech = load_wav(args.speech, args.sample_rate)
+
+    for label, cancel in (("plain", False), ("echo cancelled", True)):
+        session = session_for(args, tts, tts_rate, speech)
+        reader, segments = run(args, session, cancel)
+        user_start, user_end = session.user
+        spurious = [0] * args.replies
+        for s, e in segments:
+            if e <= user_start or s >= user_end:
+                spurious[min(session.reply_index(s), args.replies - 1)] += 1
+        barge_in = any(s < user_end and e > user_start for s, e in segments)
+        line = f"{label:>15}: {len(segments)} STT calls, spurious per reply {spurious}, barge-in heard: {barge_in}"
+        if cancel:
+            line += f", mic level {-reader.reduction_db():.1f} dB over {reader.cancelled_frames} frames"
+        print(line)
+        if args.templates:
+            detector, hits = run_detector(args, session_for(args, tts, tts_rate, speech), cancel)
+            rate = args.sample_rate
+            false = [h for h in hits if not user_start <= h[0] < user_end + rate]
+            heard = [h for h in hits if user_start <= h[0] < user_end + rate]
+            line = f"{'':>15}  streaming detector: {detector.checks} checks, {len(false)} false triggers"
+            if heard:
+                position, word, confidence = heard[0]
+                # Audio time from the end of the --speech clip to the detection
+                after = (position - user_end) * 1000 / rate
+                line += f", heard {word!r} ({confidence:.2f}) {after:+.0f} ms from the end of the word"
+            else:
+                line += ", barge-in missed"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+﻿import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio.backends import load_wav  # noqa: E402
+from audio.endpoint import Endpointer  # noqa: E402
+from audio.vad import VADRecorder, frame_energy_db  # noqa: E402
+
+
+def replay(audio, recorder, endpointer, silence_ms, min_record_ms):
+    # Mirrors VADRecorder's turn loop over a whole session; an endpoint is
+    # premature when speech resumes before the fixed silence_ms would have run out.
+    n = len(audio) // recorder.frame_samples
+    frames = audio[: n * recorder.frame_samples].reshape(n, recorder.frame_samples)
+    flags = recorder.classify(frames)
+    energies = frame_energy_db(frames)
+    frame_ms = recorder.frame_ms
+    premature = 0
+    triggered = False
+    voiced_ms = 0
+    endpointer.begin(silence_ms)
+    for i in range(n):
+        if not triggered:
+            if flags[i]:
+                triggered = True
+                voiced_ms = 0
+                endpointer.begin(silence_ms)
+            continue
+        voiced_ms += frame_ms
+        if not endpointer.update(bool(flags[i]), float(energies[i]), can_end=voiced_ms >= min_record_ms):
+            continue
+        lookahead = flags[i + 1 : i + 1 + int(silence_ms / frame_ms)]
+        if lookahead.any():
+            premature += 1
+        triggered = False
+    return premature
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded sessions through the endpointer.")
+    parser.add_argument("paths", nargs="+", help="WAV files or directories of WAV files (one session per file)")
+    parser.add_argument("--aggressiveness", type=int, nargs="+", default=[0, 1, 2, 3])
+    parser.add_argument("--silence-ms", type=int, default=800)
+    parser.add_argument("--min-record-ms", type=int, default=300)
+    parser.add_argument("--vad-aggressiveness", type=int, default=2)
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    args = parser.parse_args()
+
+    files = []
+    for p in args.paths:
+        path = Path(p)
+        files.extend(sorted(path.glob("*.wav")) if path.is_dir() else [path])
+    if not files:
+        parser.error("no WAV files found")
+    sessions = [load_wav(f, args.sample_rate) for f in files]
+
+    for aggressiveness in args.aggressiveness:
+        endpoints = 0
+        premature = 0
+        latencies = []
+        for audio in sessions:
+            recorder = VADRecorder(sample_rate=args.sample_rate, aggressiveness=args.vad_aggressiveness)
+            endpointer = Endpointer(aggressiveness=aggressiveness, frame_ms=recorder.frame_ms)
+            premature += replay(audio, recorder, endpointer, args.silence_ms, args.min_record_ms)
+            endpoints += endpointer.endpoints
+            latencies.extend(endpointer.latency.values())
+        lat = np.array(latencies) if latencies else np.zeros(1)
+        rate = premature / endpoints if endpoints else 0.0
+        print(
+            f"aggressiveness {aggressiveness}: {endpoints} endpoints  latency mean {lat.mean():.0f} ms  "
+            f"p50 {np.percentile(lat, 50):.0f} ms  p95 {np.percentile(lat, 95):.0f} ms  premature {rate:.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,8 @@ class AppSettings:
     wakeword_model: str = "tiny.en"
     wakeword_threshold: float = 0.6
     openwakeword_model_path: str = ""
+    wakeword_templates_dir: str = ""  # enrolled "Hey Bemo" WAVs; empty = <data dir>/wakeword_templates
+    kws_threshold: float = 0.0  # 0 = derive from the enrolled templates
 
     stt_engine: str = "faster-whisper"  # faster-whisper | whisper.cpp
     whisper_model: str = "small.en"
@@ -22,11 +24,24 @@ class AppSettings:
     whisper_compute_type: str = "int8"
     whisper_cpp_path: str = ""
     whisper_cpp_model: str = ""
+    whisper_cpp_server_path: str = ""  # whisper.cpp server binary; empty = whisper-server next to whisper_cpp_path
+    stt_out_of_process: bool = False  # run faster-whisper in a worker process (restart to apply)
+    streaming_stt: bool = False  # transcribe while the user is still talking (faster-whisper)
+    stt_model_budget_mb: int = 1024  # estimated memory for loaded Whisper models before the least recent is dropped
+    stt_cascade_model: str = ""  # e.g. tiny.en: decode turns with it first, whisper_model only when unsure; empty = off
+    stt_cascade_logprob: float = -0.6  # escalate when a segment's average log-probability is below this
+    stt_cascade_no_speech: float = 0.5  # ... or its no-speech probability is above this
+    game_stt_model: str = ""  # model for game answers (decoded against the valid moves); empty = wakeword_model
 
     tts_voice: str = "models/piper/en_US-lessac-medium.onnx"
     tts_speaker: str = ""
     piper_path: str = ""
+    tts_cache_mb: int = 64  # disk space for synthesized phrases that repeat (0 = no cache)
+    tts_in_process: bool = True  # keep the voice loaded via piper-tts; false = run the piper executable per reply
 
+    audio_backend: str = "sounddevice"  # sounddevice | replay | null
+    replay_input_wav: str = ""
+    capture_output_wav: str = ""
     mic_device: str = ""
     speaker_device: str = ""
     sample_rate: int = 16000
@@ -34,8 +49,17 @@ class AppSettings:
     min_record_ms: int = 300
     max_record_ms: int = 12000
     silence_ms: int = 800
+    echo_cancellation: bool = True  # subtract Bemo's own voice while listening for "stop"
+    aec_delay_ms: int = 0  # extra speaker-to-mic delay on top of the reported stream latencies
+    bargein_threshold: float = 0.5  # confidence needed to stop Bemo mid-reply
+    bargein_templates_dir: str = ""  # <dir>/<word>/*.wav for stop/quiet/wait/cancel; empty = <data dir>/bargein_templates
+    transcript_gate: bool = True  # drop Whisper noise ("Thank you.", "you") and ask again when unsure
+    gate_min_logprob: float = -1.0  # below this average log-probability Bemo asks you to repeat
+    gate_max_no_speech: float = 0.6  # above this no-speech probability (and unsure) the transcript is dropped
+    endpoint_aggressiveness: int = 1  # 0 = always wait silence_ms, 1-3 = end turns earlier
 
     history_max_messages: int = 12
+    pipelined_speech: bool = False  # start speaking the first sentence while the LLM is still writing the rest
 
     camera_enabled: bool = False
     kiosk_mode: bool = False
@@ -0,0 +1,54 @@
+﻿import sys
+import threading
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio.backends import NullBackend, WavReplayBackend, _ThreadStream  # noqa: E402
+
+
+def test_thread_stream_needs_a_run_loop():
+    with pytest.raises(TypeError):
+        _ThreadStream(samplerate=16000, channels=1, dtype="int16", blocksize=480, callback=None, realtime=True)
+
+
+def test_null_input_follows_realtime_flag():
+    blocks = []
+    done = threading.Event()
+
+    def callback(indata, frames, time_info, status):
+        blocks.append(indata.copy())
+        if len(blocks) == 100:
+            done.set()
+
+    stream = NullBackend(realtime=False).input_stream(16000, 1, "int16", 480, callback)
+    started = time.monotonic()
+    with stream:
+        assert done.wait(2.0)
+    # 100 blocks are 3 s of audio at realtime pace
+    assert time.monotonic() - started < 1.0
+    assert not np.concatenate(blocks).any()
+
+
+def test_replay_input_plays_the_file_once(tmp_path):
+    path = tmp_path / "clip.wav"
+    samples = (np.arange(1600) % 100).astype(np.int16)
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(samples.tobytes())
+    blocks = []
+    backend = WavReplayBackend(path, realtime=False)
+    stream = backend.input_stream(16000, 1, "int16", 480, lambda data, *_: blocks.append(data.copy()))
+    with stream:
+        assert stream.finished.wait(2.0)
+    played = np.concatenate(blocks)[:, 0]
+    assert len(played) == 4 * 480
+    assert np.array_equal(played[:1600], samples)
+    assert not played[1600:].any()
@@ -0,0 +1,80 @@
+﻿import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio.bargein import BargeInDetector, vocabulary_confidence  # noqa: E402
+
+RATE = 16000
+FRAME = 480
+
+
+@pytest.mark.parametrize(
+    "text, word",
+    [
+        ("Stop.", "stop"),
+        ("Stop it!", "stop"),
+        ("Wait, wait.", "wait"),
+        ("Be quiet", "quiet"),
+        ("Shh.", "quiet"),
+        ("Hold on.", "wait"),
+        ("Never mind", "cancel"),
+        ("CANCEL", "cancel"),
+    ],
+)
+def test_commands_match(text, word):
+    assert vocabulary_confidence(text) == (word, 1.0)
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["What?", "top of the hour", "Let's shop", "quite right", "It was cancelled", "I waited", "stopped", "hold", ""],
+)
+def test_near_misses_do_not_match(text):
+    assert vocabulary_confidence(text) == (None, 0.0)
+
+
+def speech(frames):
+    return np.full((frames, FRAME), 1000, dtype=np.int16), np.ones(frames, dtype=bool)
+
+
+def silence(frames):
+    return np.zeros((frames, FRAME), dtype=np.int16), np.zeros(frames, dtype=bool)
+
+
+def feed(detector, *blocks):
+    position = 0
+    word = None
+    for frames, flags in blocks:
+        for i in range(len(frames)):
+            position += FRAME
+            word = detector.push(frames[i : i + 1], flags[i : i + 1], position) or word
+    return word
+
+
+def test_decodes_once_the_burst_pauses():
+    heard = []
+    detector = BargeInDetector(RATE, transcribe=lambda audio: heard.append(len(audio)) or "stop")
+    # 300 ms of speech, then a 150 ms pause
+    assert feed(detector, speech(10), silence(4)) is None
+    assert heard == []
+    assert feed(detector, silence(1)) == "stop"
+    assert len(heard) == 1
+
+
+def test_long_speech_is_decoded_once_per_window():
+    heard = []
+    detector = BargeInDetector(RATE, transcribe=lambda audio: heard.append(len(audio)) or "so what do you think")
+    assert feed(detector, speech(100)) is None
+    # 3 s of talk: one decode per 900 ms window, each exactly one window long
+    assert len(heard) == 3
+    assert set(heard) == {detector.window_samples}
+
+
+def test_ordinary_talk_does_not_interrupt():
+    detector = BargeInDetector(RATE, transcribe=lambda audio: "what time is it")
+    assert feed(detector, speech(10), silence(10)) is None
+    assert detector.checks == 1
@@ -0,0 +1,98 @@
+﻿import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio.backends import NullBackend  # noqa: E402
+from audio.bus import AudioBus  # noqa: E402
+
+
+def make_bus(buffer_seconds=1):
+    # Written to directly; the input stream is never started
+    return AudioBus(sample_rate=16000, frame_ms=30, buffer_seconds=buffer_seconds, backend=NullBackend())
+
+
+def frames(bus, count, first=0):
+    return np.arange(first, first + count * bus.frame_samples, dtype=np.int64).astype(np.int16)
+
+
+def test_reader_starts_live_or_in_the_past():
+    bus = make_bus()
+    bus.write(frames(bus, 3))
+    live = bus.subscribe()
+    past = bus.subscribe(start=bus.frame_samples)
+    assert live.available() == 0
+    assert past.available() == 2 * bus.frame_samples
+    assert live.read(timeout=0) is None
+    assert past.read(timeout=0)[0] == bus.frame_samples
+
+
+def test_read_block_returns_whole_frames_in_order():
+    bus = make_bus()
+    reader = bus.subscribe()
+    bus.write(frames(bus, 5))
+    bus.write(np.zeros(bus.frame_samples // 2, dtype=np.int16))
+    block = reader.read_block(max_frames=3, timeout=0)
+    assert block.shape == (3, bus.frame_samples)
+    assert block[0, 0] == 0 and block[2, -1] == 3 * bus.frame_samples - 1
+    # The half frame at the end stays until it is complete
+    assert reader.read_block(max_frames=8, timeout=0).shape == (2, bus.frame_samples)
+    assert reader.read_block(timeout=0) is None
+
+
+def test_unread_replays_frames():
+    bus = make_bus()
+    reader = bus.subscribe()
+    bus.write(frames(bus, 2))
+    first = reader.read(timeout=0).copy()
+    reader.unread(1)
+    assert np.array_equal(reader.read(timeout=0), first)
+
+
+def test_overrun_skips_to_oldest_sample_and_counts():
+    bus = make_bus()
+    reader = bus.subscribe()
+    bus.write(frames(bus, bus.capacity // bus.frame_samples + 4))
+    frame = reader.read(timeout=0)
+    assert reader.overruns == 1
+    assert reader.dropped_samples == 4 * bus.frame_samples
+    assert reader.position == bus.position - bus.capacity + bus.frame_samples
+    assert frame[0] == np.int16(4 * bus.frame_samples)
+
+
+def test_frames_near_the_overwrite_point_are_copied():
+    bus = make_bus()
+    reader = bus.subscribe()
+    bus.write(frames(bus, bus.capacity // bus.frame_samples + 1))
+    block = reader.read_block(max_frames=2, timeout=0)
+    kept = block.copy()
+    bus.write(np.full(4 * bus.frame_samples, 7, dtype=np.int16))
+    assert np.array_equal(block, kept)
+
+
+def test_frames_far_from_the_writer_are_views():
+    bus = make_bus()
+    reader = bus.subscribe()
+    bus.write(frames(bus, 4))
+    block = reader.read_block(max_frames=2, timeout=0)
+    assert np.shares_memory(block, bus._ring)
+
+
+def test_wrapped_read_is_contiguous():
+    bus = make_bus()
+    total = bus.capacity // bus.frame_samples
+    bus.write(frames(bus, total - 1))
+    reader = bus.subscribe()
+    bus.write(frames(bus, 2, first=1000))
+    block = reader.read_block(max_frames=2, timeout=0)
+    assert np.array_equal(block.reshape(-1), frames(bus, 2, first=1000))
+
+
+def test_closed_reader_returns_none():
+    bus = make_bus()
+    reader = bus.subscribe()
+    bus.write(frames(bus, 2))
+    reader.close()
+    assert reader.read(timeout=0) is None
@@ -0,0 +1,83 @@
+﻿import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio.endpoint import Endpointer  # noqa: E402
+
+
+def run(endpointer, pattern, energy=60.0):
+    # pattern: (speech, frames) pairs; returns the frame index the turn ended on
+    index = 0
+    for speech, frames in pattern:
+        for _ in range(frames):
+            if endpointer.update(speech, energy):
+                return index
+            index += 1
+    return None
+
+
+def learn_pauses(endpointer, pause_frames, count=8):
+    endpointer.begin(800)
+    for _ in range(count):
+        run(endpointer, [(True, 10), (False, pause_frames)])
+    run(endpointer, [(True, 10)])
+
+
+def test_aggressiveness_zero_waits_for_silence_ms():
+    endpointer = Endpointer(aggressiveness=0)
+    endpointer.begin(600)
+    assert run(endpointer, [(True, 10), (False, 40)]) == 10 + 19
+
+
+def test_waits_silence_ms_until_pauses_are_learned():
+    endpointer = Endpointer(aggressiveness=2)
+    endpointer.begin(600)
+    assert endpointer.learned_pause_ms() is None
+    assert run(endpointer, [(True, 10), (False, 40)]) == 10 + 19
+    assert endpointer.early_endpoints == 0
+
+
+def test_learned_pauses_shorten_the_wait():
+    endpointer = Endpointer(aggressiveness=2)
+    learn_pauses(endpointer, pause_frames=6)
+    assert endpointer.learned_pause_ms() == 180
+    ended = run(endpointer, [(False, 40)])
+    # 180 ms learned pause plus the 90 ms margin
+    assert ended == 8
+    assert endpointer.early_endpoints == 1
+
+
+def test_wait_never_drops_below_the_minimum():
+    endpointer = Endpointer(aggressiveness=3)
+    learn_pauses(endpointer, pause_frames=2)
+    endpointer.set_partial_text("what time is it?")
+    assert endpointer.threshold_ms() == endpointer.min_silence_ms
+
+
+def test_complete_question_shortens_the_wait():
+    endpointer = Endpointer(aggressiveness=2)
+    learn_pauses(endpointer, pause_frames=10)
+    plain = endpointer.threshold_ms()
+    endpointer.set_partial_text("what is the weather like today?")
+    assert endpointer.threshold_ms() < plain
+    endpointer.set_partial_text("what is the")
+    assert endpointer.threshold_ms() == plain
+
+
+def test_falling_energy_shortens_the_wait():
+    endpointer = Endpointer(aggressiveness=2)
+    learn_pauses(endpointer, pause_frames=10)
+    plain = endpointer.threshold_ms()
+    for energy in range(70, 40, -3):
+        endpointer.update(True, float(energy))
+    endpointer.update(False, 30.0)
+    assert endpointer.threshold_ms() < plain
+
+
+def test_cannot_end_before_the_minimum_turn():
+    endpointer = Endpointer(aggressiveness=0)
+    endpointer.begin(300)
+    for _ in range(20):
+        assert not endpointer.update(False, 30.0, can_end=False)
+    assert endpointer.update(False, 30.0)
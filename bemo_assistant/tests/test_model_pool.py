@@ -0,0 +1,121 @@
+﻿import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio.model_pool import ModelPool, estimate_mb  # noqa: E402
+
+SIZES = {"tiny": 100, "base": 200, "small": 500}
+
+
+def make_pool(budget_mb=700):
+    loads = []
+
+    def loader(name, device, compute_type):
+        loads.append(name)
+        return object()
+
+    pool = ModelPool(loader, budget_mb=budget_mb, estimate=lambda name, compute_type: SIZES[name])
+    return pool, loads
+
+
+def key(name):
+    return (name, "cpu", "int8")
+
+
+def test_hit_returns_the_loaded_model():
+    pool, loads = make_pool()
+    model = pool.get("tiny")
+    assert pool.get("tiny") is model
+    assert loads == ["tiny"]
+    assert (pool.hits, pool.misses) == (1, 1)
+
+
+def test_least_recently_used_is_evicted_over_budget():
+    pool, _loads = make_pool(budget_mb=700)
+    pool.get("tiny")
+    pool.get("base")
+    pool.get("tiny")
+    pool.get("small")
+    assert pool.keys() == [key("tiny"), key("small")]
+    assert pool.evictions == 1
+
+
+def test_oversized_model_is_kept_alone():
+    pool, _loads = make_pool(budget_mb=300)
+    pool.get("tiny")
+    pool.get("small")
+    assert pool.keys() == [key("small")]
+
+
+def test_pinned_model_is_never_evicted():
+    pool, _loads = make_pool(budget_mb=600)
+    pool.get("base")
+    pool.pin(key("base"))
+    pool.get("small")
+    assert key("base") in pool
+    pool.unpin(key("base"))
+    pool.get("tiny")
+    assert key("base") not in pool
+
+
+def test_lease_pins_while_open_and_can_drop():
+    pool, _loads = make_pool()
+    with pool.lease("small", drop=True):
+        assert pool.refs(key("small")) == 1
+    assert pool.refs(key("small")) == 0
+    assert key("small") not in pool
+
+
+def test_retain_keeps_referenced_models():
+    pool, _loads = make_pool()
+    pool.get("tiny")
+    pool.get("base")
+    pool.pin(key("tiny"))
+    pool.retain(lambda k: False)
+    assert pool.keys() == [key("tiny")]
+
+
+def test_concurrent_gets_load_once():
+    release = threading.Event()
+    loads = []
+
+    def loader(name, device, compute_type):
+        loads.append(name)
+        release.wait(2.0)
+        return object()
+
+    pool = ModelPool(loader, estimate=lambda name, compute_type: 1)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.get("tiny"))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    release.set()
+    for t in threads:
+        t.join()
+    assert loads == ["tiny"]
+    assert len(set(map(id, results))) == 1
+
+
+def test_failed_load_is_retried():
+    calls = []
+
+    def loader(name, device, compute_type):
+        calls.append(name)
+        if len(calls) == 1:
+            raise RuntimeError("no model")
+        return object()
+
+    pool = ModelPool(loader, estimate=lambda name, compute_type: 1)
+    with pytest.raises(RuntimeError):
+        pool.get("tiny")
+    assert pool.get("tiny") is not None
+    assert len(calls) == 2
+
+
+def test_estimate_uses_the_checkpoint_size():
+    assert estimate_mb("tiny.en") < estimate_mb("Systran/faster-whisper-small") < estimate_mb("large-v3")
+    assert estimate_mb("small", "float16") == 2 * estimate_mb("small", "int8")
@@ -0,0 +1,55 @@
+﻿import sys
+import types
+import wave
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from audio.backends import load_wav  # noqa: E402
+import replay_echo  # noqa: E402
+
+FIXTURES = ROOT / "scripts" / "fixtures" / "stt"
+
+
+def session_args(seed, barge_at):
+    return types.SimpleNamespace(
+        tts=str(FIXTURES / "remember.wav"),
+        speech=str(FIXTURES / "stop.wav"),
+        replies=3,
+        barge_at=barge_at,
+        delay_ms=40.0,
+        echo_gain=0.6,
+        noise_db=-50.0,
+        sample_rate=16000,
+        vad_aggressiveness=2,
+        seed=seed,
+    )
+
+
+def replay(args, cancel):
+    with wave.open(args.tts, "rb") as wf:
+        tts_rate = wf.getframerate()
+    tts = load_wav(args.tts, tts_rate).astype(np.float32) / 32768.0
+    speech = load_wav(args.speech, args.sample_rate)
+    session = replay_echo.session_for(args, tts, tts_rate, speech)
+    _reader, segments = replay_echo.run(args, session, cancel)
+    user_start, user_end = session.user
+    spurious = sum(1 for s, e in segments if e <= user_start or s >= user_end)
+    heard = any(s < user_end and e > user_start for s, e in segments)
+    return spurious, heard
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+@pytest.mark.parametrize("barge_at", [1.0, 2.0, 3.0])
+def test_echo_cancelling_keeps_barge_in(seed, barge_at):
+    args = session_args(seed, barge_at)
+    plain, plain_heard = replay(args, cancel=False)
+    cancelled, heard = replay(args, cancel=True)
+    assert plain_heard
+    assert heard
+    assert cancelled < plain
@@ -0,0 +1,58 @@
+﻿import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from llm.sentences import SentenceSplitter  # noqa: E402
+
+
+def split(text, chunk=3, **kwargs):
+    # Feeds the text a few characters at a time, as the LLM streams it
+    splitter = SentenceSplitter(**kwargs)
+    sentences = []
+    for i in range(0, len(text), chunk):
+        sentences += splitter.feed(text[i : i + chunk])
+    rest = splitter.flush()
+    return sentences + ([rest] if rest else [])
+
+
+def test_sentences_are_cut_as_they_complete():
+    splitter = SentenceSplitter()
+    assert splitter.feed("The weather is nice today. It might") == ["The weather is nice today."]
+    assert splitter.feed(" rain later! ") == ["It might rain later!"]
+    assert splitter.flush() is None
+
+
+def test_abbreviations_do_not_end_a_sentence():
+    text = "Dr. Smith lives on Main St. in town. Bring snacks, drinks, etc. and a coat."
+    assert split(text) == ["Dr. Smith lives on Main St. in town.", "Bring snacks, drinks, etc. and a coat."]
+
+
+def test_no_is_an_abbreviation_only_before_a_number():
+    assert split("He wore No. 5 all season. It was his lucky number.") == [
+        "He wore No. 5 all season.",
+        "It was his lucky number.",
+    ]
+    assert split("I asked and she said no. Then we left for home.") == [
+        "I asked and she said no.",
+        "Then we left for home.",
+    ]
+
+
+def test_decimals_are_not_cut():
+    assert split("Pi is about 3.14 and e is 2.72 roughly. Neat, right?") == [
+        "Pi is about 3.14 and e is 2.72 roughly.",
+        "Neat, right?",
+    ]
+
+
+def test_short_sentences_merge_with_the_next():
+    assert split("Sure! Here is the plan for today.") == ["Sure! Here is the plan for today."]
+
+
+def test_kept_phrases_stay_on_their_own():
+    assert split("Sure! Here is the plan for today.", keep={"Sure!"}) == ["Sure!", "Here is the plan for today."]
+
+
+def test_line_breaks_end_short_sentences():
+    assert split("Steps:\nMix the flour and water.") == ["Steps:", "Mix the flour and water."]
@@ -0,0 +1,127 @@
+﻿import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio.stt_scheduler import (  # noqa: E402
+    PRIORITY_BARGE_IN,
+    PRIORITY_TURN,
+    PRIORITY_WAKE,
+    JobCancelled,
+    STTScheduler,
+)
+
+
+class FakeSTT:
+    def transcribe(self, audio, *args, **kwargs):
+        return f"heard {audio}"
+
+
+@pytest.fixture
+def scheduler():
+    sched = STTScheduler(FakeSTT(), workers=1, reserved=1)
+    yield sched
+    sched.close()
+
+
+def blocker():
+    started, release = threading.Event(), threading.Event()
+
+    def fn():
+        started.set()
+        release.wait(2.0)
+        return "blocked"
+
+    return fn, started, release
+
+
+def test_queued_jobs_run_most_urgent_first(scheduler):
+    fn, started, release = blocker()
+    first = scheduler.submit(PRIORITY_WAKE, fn)
+    assert started.wait(1.0)
+    order = []
+    jobs = [
+        scheduler.submit(PRIORITY_WAKE, order.append, "wake"),
+        scheduler.submit(PRIORITY_TURN, order.append, "turn 1"),
+        scheduler.submit(PRIORITY_TURN, order.append, "turn 2"),
+    ]
+    release.set()
+    for job in [first] + jobs:
+        job.wait()
+    assert order == ["turn 1", "turn 2", "wake"]
+
+
+def test_barge_in_does_not_wait_behind_a_running_decode(scheduler):
+    fn, started, release = blocker()
+    running = scheduler.submit(PRIORITY_WAKE, fn)
+    assert started.wait(1.0)
+    done = threading.Event()
+    urgent = scheduler.submit(PRIORITY_BARGE_IN, lambda: done.set() or "stop")
+    assert done.wait(1.0)
+    assert urgent.wait() == "stop"
+    release.set()
+    assert running.wait() == "blocked"
+
+
+def test_reserved_lane_takes_only_barge_in(scheduler):
+    fn, started, release = blocker()
+    scheduler.submit(PRIORITY_TURN, fn)
+    assert started.wait(1.0)
+    turn = scheduler.submit(PRIORITY_TURN, lambda: "turn")
+    assert not turn.done.wait(0.2)
+    release.set()
+    assert turn.wait() == "turn"
+
+
+def test_cancel_drops_queued_jobs_of_that_class(scheduler):
+    fn, started, release = blocker()
+    scheduler.submit(PRIORITY_TURN, fn)
+    assert started.wait(1.0)
+    wake = scheduler.submit(PRIORITY_WAKE, lambda: "wake")
+    turn = scheduler.submit(PRIORITY_TURN, lambda: "turn")
+    scheduler.cancel(PRIORITY_WAKE)
+    with pytest.raises(JobCancelled):
+        wake.wait()
+    release.set()
+    assert turn.wait() == "turn"
+    assert scheduler.stats()["wake"]["cancelled"] == 1
+
+
+def test_cancel_discards_a_running_result(scheduler):
+    fn, started, release = blocker()
+    job = scheduler.submit(PRIORITY_WAKE, fn)
+    assert started.wait(1.0)
+    scheduler.cancel(PRIORITY_WAKE)
+    release.set()
+    with pytest.raises(JobCancelled):
+        job.wait()
+    assert scheduler.stats()["wake"]["completed"] == 0
+
+
+def test_errors_reach_the_caller(scheduler):
+    def fail():
+        raise ValueError("bad audio")
+
+    with pytest.raises(ValueError):
+        scheduler.run(PRIORITY_TURN, fail)
+
+
+def test_client_decodes_at_its_priority(scheduler):
+    client = scheduler.client(PRIORITY_TURN)
+    assert client.transcribe("hello") == "heard hello"
+    assert scheduler.stats()["turn"]["completed"] == 1
+
+
+def test_close_cancels_what_is_queued():
+    sched = STTScheduler(FakeSTT(), workers=1, reserved=0)
+    fn, started, release = blocker()
+    sched.submit(PRIORITY_TURN, fn)
+    assert started.wait(1.0)
+    queued = sched.submit(PRIORITY_TURN, lambda: "late")
+    sched.close()
+    release.set()
+    with pytest.raises(JobCancelled):
+        queued.wait()
@@ -0,0 +1,40 @@
+﻿import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio.stt import TranscriptionResult  # noqa: E402
+from audio.transcript_gate import DROP, PASS, REPEAT, TranscriptGate  # noqa: E402
+
+
+def test_short_emphatic_repeat_passes():
+    gate = TranscriptGate()
+    assert gate.check(TranscriptionResult("No no no!")) == PASS
+    assert gate.check(TranscriptionResult("stop stop stop", avg_logprob=-0.4, no_speech_prob=0.05)) == PASS
+
+
+def test_repetition_loop_is_dropped():
+    gate = TranscriptGate()
+    assert gate.check(TranscriptionResult("you you you you you you")) == DROP
+    assert gate.check(TranscriptionResult("the the the", avg_logprob=-1.4, no_speech_prob=0.2)) == DROP
+
+
+def test_noise_phrases_need_doubtful_probabilities():
+    gate = TranscriptGate()
+    assert gate.check(TranscriptionResult("Thank you.", avg_logprob=-0.8, no_speech_prob=0.4)) == DROP
+    assert gate.check(TranscriptionResult("you", avg_logprob=-0.5, no_speech_prob=0.02)) == DROP
+    assert gate.check(TranscriptionResult("Thank you!", avg_logprob=-0.1, no_speech_prob=0.01)) == PASS
+
+
+def test_without_probabilities_only_loops_are_dropped():
+    # Streamed and whisper.cpp transcripts carry no probabilities
+    gate = TranscriptGate()
+    for text in ("Thank you.", "you", "Oh", "I", "Stop! Stop! Stop!", "no no no no no"):
+        assert gate.check(TranscriptionResult(text)) == PASS, text
+    assert gate.check(TranscriptionResult("you " * 6)) == DROP
+
+
+def test_unsure_speech_is_repeated_not_dropped():
+    gate = TranscriptGate()
+    assert gate.check(TranscriptionResult("what is the weather", avg_logprob=-1.3, no_speech_prob=0.1)) == REPEAT
+    assert gate.stats()["llm_turns_saved"] == 1
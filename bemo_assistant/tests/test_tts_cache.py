@@ -0,0 +1,81 @@
+﻿import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio.tts_cache import TTSCache  # noqa: E402
+
+CLIP = np.arange(500, dtype=np.int16)
+CLIP_BYTES = 44 + 2 * len(CLIP)
+
+
+def cache_for(folder, clips):
+    return TTSCache(folder, max_mb=(clips * CLIP_BYTES + 10) / (1024 * 1024))
+
+
+def age(cache, text, used_at):
+    os.utime(cache.folder / cache.key("v", "s", text), (used_at, used_at))
+
+
+def test_text_is_normalized_in_the_key(tmp_path):
+    cache = cache_for(tmp_path, 4)
+    cache.put("v", "s", "Hello   there ", CLIP, 22050)
+    audio, rate = cache.get("v", "s", "Hello there")
+    assert rate == 22050
+    assert np.array_equal(audio, CLIP)
+    assert ("v", "s", "Hello there") in cache
+    assert ("v", "other", "Hello there") not in cache
+
+
+def test_misses_and_hits_are_counted(tmp_path):
+    cache = cache_for(tmp_path, 4)
+    assert cache.get("v", "s", "Hi") is None
+    cache.put("v", "s", "Hi", CLIP, 16000)
+    cache.get("v", "s", "Hi")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+    assert stats["entries"] == 1 and stats["bytes"] == CLIP_BYTES
+
+
+def test_least_recently_used_is_evicted_first(tmp_path):
+    cache = cache_for(tmp_path, 2)
+    cache.put("v", "s", "first", CLIP, 16000)
+    cache.put("v", "s", "second", CLIP, 16000)
+    age(cache, "first", 1000)
+    age(cache, "second", 2000)
+    # Use order comes from the files, so it survives a restart
+    cache = cache_for(tmp_path, 2)
+    assert cache.get("v", "s", "first") is not None
+    cache.put("v", "s", "third", CLIP, 16000)
+    assert ("v", "s", "second") not in cache
+    assert ("v", "s", "first") in cache and ("v", "s", "third") in cache
+    assert not (tmp_path / cache.key("v", "s", "second")).exists()
+    assert cache.evictions == 1
+    assert cache.bytes <= cache.max_bytes
+
+
+def test_the_new_entry_is_kept_even_when_too_big(tmp_path):
+    cache = cache_for(tmp_path, 1)
+    cache.put("v", "s", "small", CLIP, 16000)
+    cache.put("v", "s", "long", np.zeros(5000, dtype=np.int16), 16000)
+    assert ("v", "s", "long") in cache
+    assert ("v", "s", "small") not in cache
+
+
+def test_a_broken_file_is_a_miss(tmp_path):
+    cache = cache_for(tmp_path, 4)
+    cache.put("v", "s", "Hi", CLIP, 16000)
+    (tmp_path / cache.key("v", "s", "Hi")).write_bytes(b"not a wav")
+    assert cache.get("v", "s", "Hi") is None
+    assert ("v", "s", "Hi") not in cache
+    assert cache.misses == 1
+
+
+def test_no_temp_files_are_left_behind(tmp_path):
+    cache = cache_for(tmp_path, 4)
+    cache.put("v", "s", "Hi", CLIP, 16000)
+    cache.put("v", "s", "Hi", CLIP, 16000)
+    assert [p.suffix for p in tmp_path.iterdir()] == [".wav"]
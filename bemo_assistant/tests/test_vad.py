@@ -0,0 +1,105 @@
+﻿import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio.energy_vad import EnergyVAD  # noqa: E402
+from audio.vad import VADRecorder  # noqa: E402
+
+RATE = 16000
+FRAME = 480
+
+
+def noise(frames, level, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(frames * FRAME) * level).astype(np.int16).reshape(frames, FRAME)
+
+
+def voiced(frames, level=3000):
+    # A 150 Hz voice with harmonics: peaky spectrum, few zero crossings
+    t = np.arange(frames * FRAME) / RATE
+    wave = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 8))
+    return (wave * level / 2).astype(np.int16).reshape(frames, FRAME)
+
+
+def calibrated_vad():
+    vad = EnergyVAD(RATE, FRAME, aggressiveness=2)
+    vad.calibrate(noise(20, 30).reshape(-1))
+    return vad
+
+
+def test_calibration_waits_for_enough_frames():
+    vad = EnergyVAD(RATE, FRAME, aggressiveness=2, calibration_ms=300)
+    assert not vad.classify(voiced(5)).any()
+    assert not vad.calibrated
+    vad.classify(noise(5, 30))
+    assert vad.calibrated
+
+
+def test_voice_is_speech_and_room_noise_is_not():
+    vad = calibrated_vad()
+    assert vad.classify(voiced(10)).all()
+    assert not vad.classify(noise(10, 30, seed=1)).any()
+
+
+def test_moderate_hiss_is_not_speech():
+    vad = calibrated_vad()
+    # Well above the floor, but spectrally flat with many zero crossings
+    assert not vad.classify(noise(10, 200, seed=2)).any()
+
+
+def test_noise_floor_follows_a_quieter_room():
+    vad = calibrated_vad()
+    before = vad.noise_floor
+    vad.classify(noise(30, 5, seed=3))
+    assert vad.noise_floor < before - 5
+
+
+class _EnergyRecorder(VADRecorder):
+    # Deterministic classifier so the recorder logic is tested, not the VAD
+    def classify(self, frames):
+        return np.abs(frames.astype(np.int32)).max(axis=1) > 1000
+
+
+def _reader(blocks):
+    pending = list(blocks)
+    unread = []
+
+    def read_block(timeout=None):
+        return pending.pop(0) if pending else None
+
+    return read_block, unread.append, unread
+
+
+def test_recording_keeps_preroll_and_hands_back_trailing_frames():
+    recorder = _EnergyRecorder(sample_rate=RATE)
+    quiet = np.zeros((20, FRAME), dtype=np.int16)
+    loud = np.full((10, FRAME), 2000, dtype=np.int16)
+    blocks = [quiet[:8], quiet[8:16], quiet[16:], loud[:8], loud[8:], np.zeros((40, FRAME), dtype=np.int16)]
+    read_block, unread, handed_back = _reader(blocks)
+    audio = recorder._record_frames(read_block, None, (12000, 300, 300), unread=unread)
+    # 300 ms of pre-roll (the last nine quiet frames plus the first loud one), the speech, then 300 ms of silence
+    assert len(audio) == (9 + 10 + 10) * FRAME
+    assert not audio[: 9 * FRAME].any()
+    assert (audio[9 * FRAME : 19 * FRAME] == 2000).all()
+    assert handed_back == [30]
+
+
+def test_recording_without_speech_is_empty():
+    recorder = _EnergyRecorder(sample_rate=RATE)
+    blocks = [np.zeros((8, FRAME), dtype=np.int16) for _ in range(10)]
+    read_block, unread, _handed_back = _reader(blocks)
+    audio = recorder._record_frames(read_block, None, (600, 300, 300), unread=unread)
+    assert len(audio) == 0
+
+
+def test_recorded_frames_do_not_alias_the_source():
+    recorder = _EnergyRecorder(sample_rate=RATE)
+    block = np.full((20, FRAME), 2000, dtype=np.int16)
+    block[10:] = 0
+    read_block, unread, _handed_back = _reader([block])
+    audio = recorder._record_frames(read_block, None, (12000, 90, 300), unread=unread)
+    block[:] = 7
+    assert (audio[:FRAME] == 2000).all()
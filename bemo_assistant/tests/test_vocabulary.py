@@ -0,0 +1,108 @@
+﻿import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio.vocabulary import snap  # noqa: E402
+from games.guess_number import GuessNumberGame  # noqa: E402
+from games.rps import RPSGame  # noqa: E402
+from games.tictactoe import POSITIONS, TicTacToeGame  # noqa: E402
+from games.trivia import TriviaGame  # noqa: E402
+
+NUMBERS = [str(i) for i in range(1, 21)] + ["quit"]
+
+
+def test_guess_number_vocabulary():
+    game = GuessNumberGame()
+    game.start()
+    assert game.vocabulary() == NUMBERS
+
+
+def test_rps_vocabulary():
+    assert RPSGame().vocabulary() == ["rock", "paper", "scissors", "quit"]
+
+
+def test_tictactoe_vocabulary_lists_free_squares_only():
+    game = TicTacToeGame()
+    game.start()
+    vocabulary = game.vocabulary()
+    assert [str(i) for i in range(1, 10)] + list(POSITIONS) + ["quit"] == vocabulary
+    game.board[0] = "X"
+    game.board[4] = "O"
+    vocabulary = game.vocabulary()
+    assert "1" not in vocabulary and "top left" not in vocabulary
+    assert "5" not in vocabulary and "center" not in vocabulary
+    assert "2" in vocabulary and "top center" in vocabulary
+
+
+def test_trivia_vocabulary_has_letters_and_choices():
+    game = TriviaGame()
+    game.current = {"question": "?", "choices": ["Venus", "Mars", "Jupiter", "Mercury"], "answer": 1}
+    assert game.vocabulary() == ["A", "B", "C", "D", "Venus", "Mars", "Jupiter", "Mercury", "quit"]
+    game.current = None
+    assert game.vocabulary() == ["A", "B", "C", "D", "quit"]
+
+
+def test_number_words_snap_to_digits():
+    assert snap("Seven.", NUMBERS) == "7"
+    assert snap("I think it's 12", NUMBERS) == "12"
+    assert snap("number twelve", NUMBERS) == "12"
+    assert snap("twenty", NUMBERS) == "20"
+    assert snap("to", NUMBERS) == "2"
+
+
+def test_multi_word_numbers_are_parsed_first():
+    assert snap("twenty one", NUMBERS) is None
+    assert snap("twenty-one", NUMBERS) is None
+    assert snap("twenty one", [str(i) for i in range(1, 31)]) == "21"
+
+
+def test_several_numbers_are_not_a_guess():
+    assert snap("one two", NUMBERS) is None
+    assert snap("3 or 4", NUMBERS) is None
+
+
+def test_out_of_range_numbers_snap_to_nothing():
+    assert snap("100", NUMBERS) is None
+    assert snap("thirty", NUMBERS) is None
+    assert snap("zero", NUMBERS) is None
+
+
+def test_homophones_count_only_on_their_own():
+    assert snap("I want to go for 7", NUMBERS) == "7"
+    letters = ["A", "B", "C", "D", "quit"]
+    assert snap("see", letters) == "C"
+    assert snap("answer see", letters) == "C"
+    assert snap("I want to see", letters) is None
+
+
+def test_letters_after_a_carrier_or_last():
+    letters = ["A", "B", "C", "D", "Venus", "Mars", "quit"]
+    assert snap("answer B", letters) == "B"
+    assert snap("I think it's D", letters) == "D"
+    assert snap("Bee.", letters) == "B"
+    assert snap("I think Mars", letters) == "Mars"
+
+
+def test_commands_are_not_fuzzy_matched():
+    vocabulary = ["rock", "paper", "scissors", "quit"]
+    assert snap("quit", vocabulary) == "quit"
+    assert snap("I quit", vocabulary) == "quit"
+    assert snap("quiet", vocabulary) is None
+    assert snap("quite", vocabulary) is None
+
+
+def test_near_misses_snap_to_longer_entries():
+    vocabulary = ["rock", "paper", "scissors", "quit"]
+    assert snap("scissor", vocabulary) == "scissors"
+    assert snap("I pick rock", vocabulary) == "rock"
+    assert snap("pepper", vocabulary) is None
+    assert snap("", vocabulary) is None
+
+
+def test_tictactoe_positions_prefer_the_longest_match():
+    game = TicTacToeGame()
+    game.start()
+    assert snap("top center please", game.vocabulary()) == "top center"
+    assert snap("center", game.vocabulary()) == "center"
+    assert snap("square five", game.vocabulary()) == "5"
@@ -23,13 +23,11 @@ from PySide6.QtWidgets import (
 )
 
 from ui.widgets import FaceWidget, TranscriptPanel, GamePanel
-from audio.tts import PiperTTS
-from audio.playback import AudioPlayer
 from storage.settings import AppSettings
 
 
 class SettingsDialog(QDialog):
-    def __init__(self, settings: AppSettings, models, verify_fn=None, stt_test_fn=None, parent=None):
+    def __init__(self, settings: AppSettings, models, verify_fn=None, stt_test_fn=None, tts_test_fn=None, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Bemo Settings")
         self.setObjectName("settingsDialog")
@@ -38,6 +36,7 @@ class SettingsDialog(QDialog):
         self._models = models or []
         self._verify_fn = verify_fn
         self._stt_test_fn = stt_test_fn
+        self._tts_test_fn = tts_test_fn
 
         layout = QVBoxLayout(self)
         form = QFormLayout()
@@ -214,21 +213,13 @@ class SettingsDialog(QDialog):
         voice = self.tts_voice.text().strip()
         if not voice:
             return
+        if not self._tts_test_fn:
+            self.tts_download_status.setText("TTS test not available.")
+            return
         try:
-            tts = PiperTTS(
-                voice,
-                speaker_id=self.tts_speaker.text().strip(),
-                piper_path=self.piper_path.text().strip(),
-            )
-            player = AudioPlayer()
-            wav = tts.synthesize("Hello. This is a Bemo voice test.")
-            player.play_wav(wav)
-            try:
-                import os
-                os.remove(wav)
-            except OSError:
-                pass
-            self.tts_download_status.setText("TTS OK.")
+            # Plays through the assistant's own output stream and backend
+            engine = self._tts_test_fn(self._collect_settings())
+            self.tts_download_status.setText(f"TTS OK ({engine}).")
         except Exception as exc:
             self.tts_download_status.setText(f"TTS error: {exc}")
 
@@ -488,8 +479,8 @@ class MainWindow(QMainWindow):
         else:
             self.showNormal()
 
-    def open_settings(self, settings: AppSettings, models, verify_fn=None, stt_test_fn=None):
-        dialog = SettingsDialog(settings, models, verify_fn, stt_test_fn, self)
+    def open_settings(self, settings: AppSettings, models, verify_fn=None, stt_test_fn=None, tts_test_fn=None):
+        dialog = SettingsDialog(settings, models, verify_fn, stt_test_fn, tts_test_fn, self)
         if dialog.exec() == QDialog.Accepted:
             self.settings_result = dialog.result_settings()
         else: